@@ -1,16 +1,33 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 import uvicorn
 
 from app.api import match_router, status_router
+from app.settings import Settings
+from app.yolo import BallYoloDetector, PlayerYoloDetector
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cargar y calentar los modelos una sola vez antes de aceptar requests
+    if Settings.WARMUP_MODELS_ON_STARTUP:
+        for detector in (PlayerYoloDetector(), BallYoloDetector()):
+            try:
+                detector.warmup()
+            except Exception as e:
+                print(f"⚠️ No se pudo precargar el modelo {detector.model_path}: {e}")
+    yield
+
 
 app = FastAPI(
     title="Padel Match Analysis API",
     description="API para analizar partidos de padel usando detección de jugadores y pelota",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir conexiones desde el frontend
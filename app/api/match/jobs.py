@@ -0,0 +1,104 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Literal
+
+from app.metrics import metrics
+from app.settings import Settings
+from .video_response import UploadVideoResponse
+
+JobStatus = Literal["queued", "processing", "completed", "failed"]
+
+
+@dataclass
+class Job:
+    job_id: str
+    filename: str
+    status: JobStatus = "queued"
+    frames_done: int = 0
+    total_frames: int = 0
+    result: UploadVideoResponse | None = None  # None en los jobs que generan un video anotado
+    error: str | None = None
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: datetime | None = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "completed":
+            return 1.0
+        return self.frames_done / self.total_frames if self.total_frames > 0 else 0.0
+
+    def update_progress(self, frames_done: int, total_frames: int) -> None:
+        self.frames_done = frames_done
+        self.total_frames = total_frames
+
+
+@dataclass
+class JobManager:
+    """
+    Cola de jobs de análisis en memoria. El procesamiento corre en un pool de
+    threads con concurrencia limitada para no bloquear el event loop de uvicorn.
+    Los jobs terminados se conservan para consultar su resultado hasta que vencen
+    (retention_seconds) o hasta que hay más de max_finished terminados; los que
+    están en cola o procesándose nunca se descartan.
+    """
+
+    max_workers: int = Settings.MAX_CONCURRENT_JOBS
+    retention_seconds: int = Settings.JOB_RETENTION_SECONDS
+    max_finished: int = Settings.MAX_FINISHED_JOBS
+    _jobs: dict[str, Job] = field(default_factory=dict, init=False)
+    _executor: ThreadPoolExecutor | None = field(default=None, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def submit(self, filename: str, task: Callable[[Job], UploadVideoResponse | None]) -> Job:
+        job = Job(job_id=uuid.uuid4().hex, filename=filename)
+        with self._lock:
+            self._evict_finished()
+            self._jobs[job.job_id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="match-job")
+        self._executor.submit(self._run, job, task)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            self._evict_finished()
+            return self._jobs.get(job_id)
+
+    def _evict_finished(self) -> None:
+        """Descarta los jobs terminados vencidos y los más viejos por encima de max_finished (con el lock tomado)"""
+        finished = sorted(
+            (job.finished_at, job.job_id) for job in self._jobs.values() if job.finished_at is not None
+        )
+        expired = datetime.now() - timedelta(seconds=self.retention_seconds)
+        excess = len(finished) - self.max_finished
+        for index, (finished_at, job_id) in enumerate(finished):
+            if index < excess or finished_at < expired:
+                del self._jobs[job_id]
+                metrics.increment("padel_jobs_evicted_total")
+
+    def active_jobs(self) -> int:
+        return sum(1 for job in list(self._jobs.values()) if job.status in ("queued", "processing"))
+
+    def queued_jobs(self) -> int:
+        return sum(1 for job in list(self._jobs.values()) if job.status == "queued")
+
+    def _run(self, job: Job, task: Callable[[Job], UploadVideoResponse | None]) -> None:
+        job.status = "processing"
+        try:
+            job.result = task(job)
+            job.status = "completed"
+        except Exception as e:
+            print(f"❌ Job {job.job_id} falló: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now()
+            metrics.increment("padel_jobs_total", status=job.status)
+
+
+job_manager = JobManager()
+metrics.register_gauge("padel_jobs_active", "Jobs en cola o procesándose", job_manager.active_jobs)
+metrics.register_gauge("padel_jobs_queued", "Jobs esperando un worker libre", job_manager.queued_jobs)
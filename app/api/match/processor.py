@@ -2,20 +2,26 @@ import os
 import datetime
 import re
 
-import shutil
 import urllib
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request
-from fastapi.responses import FileResponse, StreamingResponse, Response
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Header, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
 from pathlib import Path
 import cv2
 from app.match import PadelMatchProcessor
-from .video_response import UploadVideoResponse
+from app.match.profiling import FrameWindowProfiler
+from app.metrics import metrics
+from app.settings import Settings
+from .jobs import Job, job_manager
+from .renders import PendingRender, RenderManager
+from .uploads import ResumableUploadManager, StoredUpload, UploadSession, UploadSizeLimitRoute, content_length, save_upload_file
+from .video_response import CreateUploadRequest, JobResponse, JobStatusResponse, ReanalyzeRequest, StageTimingResponse
+from .video_response import UploadSessionResponse, UploadVideoResponse
 from app.match import PadelMatchProcessor
-import subprocess
 from pathlib import Path
 
-match_router = APIRouter(prefix="/match", tags=["match"])
+# Los uploads que exceden el tamaño máximo se rechazan antes de leer el body
+match_router = APIRouter(prefix="/match", tags=["match"], route_class=UploadSizeLimitRoute)
 
 
 def get_match_processor() -> PadelMatchProcessor:
@@ -25,17 +31,13 @@ def get_match_processor() -> PadelMatchProcessor:
 VIDEOS_DIR = Path("videos")
 VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
 
-@match_router.post("/upload-video", response_model=UploadVideoResponse)
-async def upload_and_process_video(
-    file: UploadFile = File(...),
-    match_processor: PadelMatchProcessor = Depends(get_match_processor)
-) -> UploadVideoResponse:
-    input_path = VIDEOS_DIR / file.filename
-    with open(input_path, "wb") as buffer:
-        buffer.write(await file.read())
+upload_manager = ResumableUploadManager(upload_dir=VIDEOS_DIR / ".uploads")
+render_manager = RenderManager(render_dir=VIDEOS_DIR / ".renders")
+metrics.register_gauge("padel_video_renders_pending", "Videos anotados registrados que todavía no se generaron", render_manager.pending_renders)
 
+def _process_uploaded_video(job: Job, stored: StoredUpload, filename: str, match_processor: PadelMatchProcessor) -> UploadVideoResponse:
     # separar nombre y extensión
-    base_name, ext = os.path.splitext(file.filename)
+    base_name, ext = os.path.splitext(filename)
 
     # evitar duplicar el sufijo _h264
     if base_name.endswith("_h264"):
@@ -44,31 +46,32 @@ async def upload_and_process_video(
     processed_video_filename = f"processed_{base_name}_h264{ext}"
     output_path = str(VIDEOS_DIR / processed_video_filename)
 
-    # Procesar video (OpenCV y anotaciones)
-    final_stats = match_processor.process_video_with_output(
-        str(input_path),
-        output_path=output_path
-    )
-
-    # ---- Agregar audio silencioso para compatibilidad HTML5 ----
-    h264_with_audio = str(VIDEOS_DIR / f"processed_{base_name}_h264_audio{ext}")
-    ffmpeg_path = shutil.which("ffmpeg")
-    if ffmpeg_path:
-        subprocess.run([
-            ffmpeg_path, "-y",
-            "-i", output_path,
-            "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
-            "-c:v", "libx264",         # <-- re-codificar a H.264
-            "-preset", "fast",
-            "-pix_fmt", "yuv420p",    # <-- formato compatible HTML5
-            "-c:a", "aac",
-            "-shortest",
-            h264_with_audio
-        ], check=True)
-        processed_video_filename = h264_with_audio.split("/")[-1]
-        output_path = h264_with_audio
+    match_processor.progress_callback = job.update_progress
+    if Settings.DEFERRED_RENDERING and match_processor.detection_cache is not None:
+        # Solo inferencia y golpes: el video anotado se genera en la primera descarga
+        # a partir de las detecciones que process_video deja en el cache
+        final_stats = match_processor.process_video(str(stored.path), video_sha256=stored.sha256)
+        render_manager.register(processed_video_filename, PendingRender(
+            video_path=str(stored.path),
+            output_path=output_path,
+            detection_key=match_processor.detection_cache_key(str(stored.path), stored.sha256),
+            decoder=match_processor.decoder,
+            decode_max_size=match_processor.decode_max_size,
+            hit_events=match_processor.hit_events
+        ))
+        message = "Video analizado exitosamente; el video procesado se genera al descargarlo"
     else:
-        print("⚠️ ffmpeg no encontrado. No se agregará audio al video.")
+        # Procesar video (OpenCV, anotaciones y encoding)
+        final_stats = match_processor.process_video_with_output(
+            str(stored.path),
+            output_path=output_path,
+            video_sha256=stored.sha256
+        )
+
+        # El writer ya codifica H.264 + audio silencioso en una sola pasada (o cae a un codec de OpenCV)
+        output_path = final_stats.processed_video_path
+        processed_video_filename = Path(output_path).name
+        message = "Video procesado exitosamente"
 
     return UploadVideoResponse(
         total_hits=final_stats.total_hits,
@@ -76,25 +79,190 @@ async def upload_and_process_video(
         total_frames=final_stats.total_frames,
         video_duration=final_stats.video_duration,
         fps=final_stats.fps,
-        filename=file.filename,
-        message="Video procesado exitosamente",
+        filename=filename,
+        message=message,
         processed_video_path=output_path,
-        processed_video_filename=processed_video_filename
+        processed_video_filename=processed_video_filename,
+        stage_timings={
+            stage: StageTimingResponse.model_validate(timing) for stage, timing in match_processor.stage_timings.summary().items()
+        } if metrics.enabled else None,
+        profile_filename=Path(final_stats.profile_path).name if final_stats.profile_path else None
+    )
+
+
+@match_router.post("/upload-video", response_model=JobResponse, status_code=202)
+async def upload_and_process_video(
+    file: UploadFile = File(...),
+    profile: bool = False,
+    match_processor: PadelMatchProcessor = Depends(get_match_processor)
+) -> JobResponse:
+    input_path = VIDEOS_DIR / file.filename
+    stored = await save_upload_file(file, input_path)
+    return _submit_processing_job(stored, file.filename, match_processor, profile)
+
+
+def _submit_processing_job(stored: StoredUpload, filename: str, match_processor: PadelMatchProcessor, profile: bool = False) -> JobResponse:
+    # ?profile=true perfila este job aunque Settings.PROFILING_ENABLED esté apagado
+    if profile and match_processor.profiler is None:
+        match_processor.profiler = FrameWindowProfiler()
+
+    job = job_manager.submit(
+        filename,
+        lambda job: _process_uploaded_video(job, stored, filename, match_processor)
+    )
+
+    return JobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        filename=filename,
+        message="Video recibido, procesamiento en cola",
+        size_bytes=stored.size,
+        sha256=stored.sha256
+    )
+
+
+def _upload_session_response(session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=session.upload_id,
+        filename=session.filename,
+        total_size=session.total_size,
+        received_bytes=session.received_bytes,
+        complete=session.complete
+    )
+
+
+@match_router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+async def create_resumable_upload(upload: CreateUploadRequest) -> UploadSessionResponse:
+    session = upload_manager.create(upload.filename, upload.total_size)
+    return _upload_session_response(session)
+
+
+@match_router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_resumable_upload(upload_id: str) -> UploadSessionResponse:
+    return _upload_session_response(upload_manager.get(upload_id))
+
+
+@match_router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_video_range(
+    upload_id: str,
+    request: Request,
+    content_range: str | None = Header(default=None)
+) -> UploadSessionResponse:
+    session = await upload_manager.append(upload_id, content_range, request.stream(), content_length(request))
+    return _upload_session_response(session)
+
+
+@match_router.post("/uploads/{upload_id}/complete", response_model=JobResponse, status_code=202)
+async def complete_resumable_upload(
+    upload_id: str,
+    sha256: str | None = None,
+    profile: bool = False,
+    match_processor: PadelMatchProcessor = Depends(get_match_processor)
+) -> JobResponse:
+    session = upload_manager.get(upload_id)
+    stored = upload_manager.complete(upload_id, VIDEOS_DIR / session.filename, expected_sha256=sha256)
+    return _submit_processing_job(stored, session.filename, match_processor, profile)
+
+
+@match_router.post("/reanalyze", response_model=UploadVideoResponse)
+def reanalyze_video(
+    request: ReanalyzeRequest,
+    match_processor: PadelMatchProcessor = Depends(get_match_processor)
+) -> UploadVideoResponse:
+    """Recalcula golpes con nuevos umbrales desde las detecciones cacheadas, sin volver a correr YOLO"""
+    thresholds = request.model_dump(exclude={"sha256", "filename"}, exclude_none=True)
+    for name, value in thresholds.items():
+        setattr(match_processor, name, value)
+
+    try:
+        final_stats = match_processor.reanalyze(video_sha256=request.sha256)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return UploadVideoResponse(
+        total_hits=final_stats.total_hits,
+        hits_per_player=final_stats.hits_per_player,
+        total_frames=final_stats.total_frames,
+        video_duration=final_stats.video_duration,
+        fps=final_stats.fps,
+        filename=request.filename,
+        message="Video re-analizado desde el cache de detecciones"
+    )
+
+
+def _get_job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+
+@match_router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str) -> JobStatusResponse:
+    job = _get_job_or_404(job_id)
+    return JobStatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        filename=job.filename,
+        frames_done=job.frames_done,
+        total_frames=job.total_frames,
+        progress=job.progress,
+        error=job.error
+    )
+
+
+@match_router.get("/jobs/{job_id}/result", response_model=UploadVideoResponse)
+async def get_job_result(job_id: str) -> UploadVideoResponse:
+    job = _get_job_or_404(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"El procesamiento falló: {job.error}")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail="El video todavía se está procesando")
+    if job.result is None:
+        raise HTTPException(status_code=404, detail="El job no tiene resultado de análisis")
+    return job.result
+
+
+@match_router.get("/jobs/{job_id}/profile")
+async def download_job_profile(job_id: str):
+    job = _get_job_or_404(job_id)
+    if job.result is None or job.result.profile_filename is None:
+        raise HTTPException(status_code=404, detail="El job no tiene perfil")
+
+    return FileResponse(
+        VIDEOS_DIR / job.result.profile_filename,
+        media_type="application/octet-stream",
+        filename=job.result.profile_filename
     )
 
 
 @match_router.get("/download-processed-video/{filename}")
 async def download_processed_video(filename: str):
+    """
+    Con Settings.DEFERRED_RENDERING la primera descarga encola la generación del
+    video anotado y responde 202 con el job; al terminar el job la descarga sirve
+    el archivo generado.
+    """
     decoded_filename = urllib.parse.unquote(filename)
-    file_path = VIDEOS_DIR / decoded_filename
-
+    render_job = render_manager.request(decoded_filename)
+    if render_job is not None:
+        response = JobResponse(
+            job_id=render_job.job_id,
+            status=render_job.status,
+            filename=decoded_filename,
+            message="El video procesado se está generando; volver a descargarlo cuando termine el job"
+        )
+        return JSONResponse(status_code=202, content=response.model_dump(), headers={"Retry-After": "5"})
+
+    # Sin ffmpeg el writer puede haber generado el video con otra extensión
+    file_path = render_manager.rendered_path(decoded_filename) or VIDEOS_DIR / decoded_filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Video procesado no encontrado")
 
     return FileResponse(
         file_path,
         media_type="video/mp4",
-        filename=decoded_filename
+        filename=file_path.name
     )
 
 
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from app.data_models import HitEvent
+from app.match import PadelMatchProcessor
+from app.metrics import metrics
+from app.settings import Settings
+from app.video.reader import DecoderBackend
+from .jobs import Job, job_manager
+
+
+class PendingRender(BaseModel):
+    """Lo que deja el análisis para generar el video anotado más tarde"""
+
+    video_path: str
+    output_path: str
+    detection_key: str  # entrada del cache de detecciones con las del análisis
+    decoder: DecoderBackend  # las detecciones están en coordenadas de los frames de este decoder y tamaño
+    decode_max_size: int
+    hit_events: list[HitEvent]
+    rendered_path: str | None = None  # solo si el writer cayó a otro contenedor (.avi sin ffmpeg)
+
+
+@dataclass
+class RenderManager:
+    """
+    Videos anotados pendientes. El job de análisis registra, bajo el nombre del
+    video procesado, un JSON chico en `render_dir` con la clave de las detecciones
+    en el cache y los golpes; las detecciones quedan en disco y el registro
+    sobrevive a un reinicio del servidor. La primera descarga encola el render en
+    job_manager (comparte el límite de MAX_CONCURRENT_JOBS con los análisis) y las
+    descargas que llegan mientras tanto reciben el mismo job. Cuando el render
+    termina (o ya no se puede hacer porque el cache expulsó las detecciones) el
+    registro se borra y las descargas sirven el archivo generado; si el render
+    falla por otro motivo el registro queda y la próxima descarga lo reintenta. Si
+    el writer generó el video con otra extensión, el registro queda solo para
+    resolver el nombre pedido al archivo real. Los registros
+    que nadie descarga vencen a los retention_seconds y solo se guardan los
+    max_pending más recientes.
+    """
+
+    render_dir: Path
+    retention_seconds: int = Settings.RENDER_RETENTION_SECONDS
+    max_pending: int = Settings.MAX_PENDING_RENDERS
+    _jobs: dict[str, Job] = field(default_factory=dict, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def register(self, filename: str, render: PendingRender) -> None:
+        # Un nuevo análisis con el mismo nombre reemplaza al anterior y se vuelve a generar
+        self.render_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.render_dir / f".tmp-{uuid.uuid4().hex}"
+        tmp_path.write_text(render.model_dump_json())
+        with self._lock:
+            os.replace(tmp_path, self._render_path(filename))
+            self._expire_pending()
+
+    def request(self, filename: str) -> Job | None:
+        """Job que genera el video de `filename` (lo encola si hace falta); None si no tiene un render pendiente"""
+        if Path(filename).name != filename:
+            return None
+        with self._lock:
+            job = self._jobs.get(filename)
+            if job is not None:
+                return job
+
+            render = self._load(filename)
+            if render is None or render.rendered_path is not None:
+                return None
+            job = self._jobs[filename] = job_manager.submit(filename, partial(self._render, filename=filename, render=render))
+            return job
+
+    def rendered_path(self, filename: str) -> Path | None:
+        """Archivo generado para `filename` cuando el writer usó otro nombre; None si es el mismo"""
+        if Path(filename).name != filename:
+            return None
+        render = self._load(filename)
+        return Path(render.rendered_path) if render is not None and render.rendered_path is not None else None
+
+    def pending_renders(self) -> int:
+        return sum(1 for path in self.render_dir.glob("*.json") if PendingRender.model_validate_json(path.read_text()).rendered_path is None)
+
+    def _render(self, job: Job, filename: str, render: PendingRender) -> None:
+        try:
+            processor = PadelMatchProcessor(
+                decoder=render.decoder,
+                decode_max_size=render.decode_max_size,
+                progress_callback=job.update_progress
+            )
+            cached = processor.detection_cache.get(render.detection_key) if processor.detection_cache is not None else None
+            if cached is None:
+                # No se puede reintentar: el registro se descarta y la descarga pasa a dar 404
+                self._drop(filename, render)
+                raise LookupError("Las detecciones del análisis ya no están en el cache; hay que volver a analizar el video")
+
+            processed_path = processor.render_video(render.video_path, render.output_path, cached.detections, render.hit_events)
+            metrics.increment("padel_video_renders_total")
+            with self._lock:
+                if self._load(filename) != render:
+                    return
+                if Path(processed_path) == Path(render.output_path):
+                    self._render_path(filename).unlink()
+                else:
+                    self._render_path(filename).write_text(render.model_copy(update={"rendered_path": processed_path}).model_dump_json())
+        finally:
+            with self._lock:
+                del self._jobs[filename]
+
+    def _drop(self, filename: str, render: PendingRender) -> None:
+        with self._lock:
+            # Si mientras tanto se registró un análisis nuevo con el mismo nombre, ese queda pendiente
+            if self._load(filename) == render:
+                self._render_path(filename).unlink()
+
+    def _render_path(self, filename: str) -> Path:
+        return self.render_dir / f"{filename}.json"
+
+    def _load(self, filename: str) -> PendingRender | None:
+        try:
+            return PendingRender.model_validate_json(self._render_path(filename).read_text())
+        except FileNotFoundError:
+            return None
+
+    def _expire_pending(self) -> None:
+        """Borra los registros vencidos y los más viejos por encima de max_pending (con el lock tomado)"""
+        pending = sorted(
+            (path for path in self.render_dir.glob("*.json") if path.name[:-len(".json")] not in self._jobs),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True
+        )
+        expired = time.time() - self.retention_seconds
+        for index, path in enumerate(pending):
+            if index >= self.max_pending or path.stat().st_mtime < expired:
+                path.unlink()
+                metrics.increment("padel_video_renders_expired_total")
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Callable, Coroutine, Literal
+
+from fastapi import HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.settings import Settings
+
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # boundaries y headers de las partes del form
+
+
+def content_length(request: Request) -> int | None:
+    value = request.headers.get("content-length")
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail="Content-Length inválido")
+    return int(value)
+
+
+class UploadSizeLimitRoute(APIRoute):
+    """
+    Rechaza con 413 los requests cuyo Content-Length supera MAX_UPLOAD_SIZE_BYTES
+    antes de que FastAPI lea el body: con un parámetro File(...) el multipart se
+    parsea completo (a un archivo temporal) antes de llegar al endpoint. Sin
+    Content-Length (chunked) el límite lo controla save_upload_file al copiar.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        max_size = Settings.MAX_UPLOAD_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES
+
+        async def limited_handler(request: Request) -> Response:
+            size = content_length(request)
+            if size is not None and size > max_size:
+                raise HTTPException(status_code=413, detail=f"El video supera el tamaño máximo de {Settings.MAX_UPLOAD_SIZE_BYTES} bytes")
+            return await handler(request)
+
+        return limited_handler
+
+
+def _open_binary(path: Path, mode: Literal["wb", "r+b"]) -> BinaryIO:
+    # open() tiene un overload por modo: con el modo fijo, run_in_threadpool recibe un tipo concreto
+    return open(path, mode)
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+async def save_upload_file(file: UploadFile, destination: Path, max_size: int = Settings.MAX_UPLOAD_SIZE_BYTES) -> StoredUpload:
+    """
+    Escribe el upload a disco en chunks de tamaño fijo calculando el checksum al
+    vuelo; la escritura y el hash corren en el threadpool para no bloquear el event loop
+    """
+    hasher = hashlib.sha256()
+    size = 0
+
+    def write(buffer: BinaryIO, chunk: bytes) -> None:
+        hasher.update(chunk)
+        buffer.write(chunk)
+
+    try:
+        buffer = await run_in_threadpool(_open_binary, destination, "wb")
+        try:
+            while chunk := await file.read(Settings.UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(status_code=413, detail=f"El video supera el tamaño máximo de {max_size} bytes")
+                await run_in_threadpool(write, buffer, chunk)
+        finally:
+            await run_in_threadpool(buffer.close)
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
+    return StoredUpload(path=destination, size=size, sha256=hasher.hexdigest())
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    total_size: int
+    part_path: Path
+    received_bytes: int = 0
+    last_activity: float = field(default_factory=time.time)
+    _hasher: "hashlib._Hash" = field(default_factory=hashlib.sha256, repr=False)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def complete(self) -> bool:
+        return self.received_bytes == self.total_size
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+
+@dataclass
+class ResumableUploadManager:
+    """
+    Uploads reanudables por rangos: el cliente envía el archivo en partes con
+    `Content-Range: bytes start-end/total` y, si la conexión se corta, consulta
+    `received_bytes` y continúa desde ese offset en vez de reiniciar la transferencia.
+    Las partes deben llegar en orden para poder calcular el checksum al vuelo.
+    Una sesión sin actividad por más de session_ttl_seconds se descarta y se borra
+    su .part, igual que los .part que quedaron de sesiones de un proceso anterior.
+    """
+
+    upload_dir: Path
+    max_size: int = Settings.MAX_UPLOAD_SIZE_BYTES
+    session_ttl_seconds: int = Settings.UPLOAD_SESSION_TTL_SECONDS
+    _sessions: dict[str, UploadSession] = field(default_factory=dict, init=False)
+
+    def create(self, filename: str, total_size: int) -> UploadSession:
+        if total_size <= 0:
+            raise HTTPException(status_code=400, detail="total_size debe ser mayor a 0")
+        if total_size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"El video supera el tamaño máximo de {self.max_size} bytes")
+
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self._expire_sessions()
+        self._remove_orphan_parts()
+        upload_id = uuid.uuid4().hex
+        session = UploadSession(
+            upload_id=upload_id,
+            filename=Path(filename).name,
+            total_size=total_size,
+            part_path=self.upload_dir / f"{upload_id}.part"
+        )
+        session.part_path.touch()
+        self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        self._expire_sessions()
+        session = self._sessions.get(upload_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Upload no encontrado")
+        return session
+
+    def _expire_sessions(self) -> None:
+        expired = time.time() - self.session_ttl_seconds
+        for upload_id, session in list(self._sessions.items()):
+            # Una sesión recibiendo una parte no se descarta aunque la parte tarde más que el TTL
+            if session.last_activity < expired and not session._lock.locked():
+                del self._sessions[upload_id]
+                session.part_path.unlink(missing_ok=True)
+
+    def _remove_orphan_parts(self) -> None:
+        """Borra los .part vencidos que no pertenecen a ninguna sesión (p. ej. de antes de reiniciar el servidor)"""
+        expired = time.time() - self.session_ttl_seconds
+        active_parts = {session.part_path for session in self._sessions.values()}
+        for part_path in self.upload_dir.glob("*.part"):
+            if part_path in active_parts:
+                continue
+            try:
+                if part_path.stat().st_mtime < expired:
+                    part_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    async def append(
+        self, upload_id: str, content_range: str | None, chunks: AsyncIterator[bytes], content_length: int | None = None
+    ) -> UploadSession:
+        session = self.get(upload_id)
+        start, end = self._parse_content_range(session, content_range)
+        expected_size = end - start + 1
+        # Se rechaza antes de leer el body si el tamaño declarado no coincide con el rango
+        if content_length is not None and content_length != expected_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Content-Length ({content_length}) no coincide con el rango declarado ({expected_size} bytes)"
+            )
+
+        async with session._lock:
+            session.last_activity = time.time()
+            if start != session.received_bytes:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Offset inválido: se esperaba {session.received_bytes}, se recibió {start}"
+                )
+
+            def write(buffer: BinaryIO, chunk: bytes) -> None:
+                buffer.write(chunk)
+                session._hasher.update(chunk)
+
+            written = 0
+            buffer = await run_in_threadpool(_open_binary, session.part_path, "r+b")
+            try:
+                await run_in_threadpool(buffer.seek, start)
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if written > expected_size:
+                        break
+                    await run_in_threadpool(write, buffer, chunk)
+                    session.received_bytes += len(chunk)
+                await run_in_threadpool(buffer.truncate, session.received_bytes)
+            finally:
+                await run_in_threadpool(buffer.close)
+            session.last_activity = time.time()
+
+            if written != expected_size:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"El rango declarado tiene {expected_size} bytes pero se recibieron {written}; reanudar desde {session.received_bytes}"
+                )
+        return session
+
+    def complete(self, upload_id: str, destination: Path, expected_sha256: str | None = None) -> StoredUpload:
+        session = self.get(upload_id)
+        if not session.complete:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incompleto: {session.received_bytes} de {session.total_size} bytes"
+            )
+        if expected_sha256 is not None and expected_sha256.lower() != session.sha256:
+            raise HTTPException(status_code=422, detail="El checksum SHA-256 no coincide")
+
+        os.replace(session.part_path, destination)
+        del self._sessions[upload_id]
+        return StoredUpload(path=destination, size=session.total_size, sha256=session.sha256)
+
+    def _parse_content_range(self, session: UploadSession, content_range: str | None) -> tuple[int, int]:
+        if content_range is None:
+            raise HTTPException(status_code=400, detail="Falta el header Content-Range")
+        match = CONTENT_RANGE_PATTERN.fullmatch(content_range.strip())
+        if match is None:
+            raise HTTPException(status_code=400, detail="Content-Range inválido, se espera 'bytes start-end/total'")
+
+        start, end, total = (int(value) for value in match.groups())
+        if total != session.total_size or start > end or end >= total:
+            raise HTTPException(status_code=416, detail="Rango fuera del tamaño declarado del upload")
+        return start, end
@@ -1,5 +1,10 @@
 from pydantic import BaseModel
 
+class StageTimingResponse(BaseModel):
+    seconds: float
+    calls: int
+    ms_per_call: float
+
 class UploadVideoResponse(BaseModel):
     total_hits: int
     hits_per_player: dict[str, int]
@@ -10,3 +15,41 @@ class UploadVideoResponse(BaseModel):
     message: str
     processed_video_path: str = None
     processed_video_filename: str = None
+    stage_timings: dict[str, StageTimingResponse] | None = None  # solo con Settings.METRICS_ENABLED
+    profile_filename: str | None = None  # solo si el job se perfiló
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+    message: str
+    size_bytes: int | None = None
+    sha256: str | None = None
+
+class ReanalyzeRequest(BaseModel):
+    sha256: str
+    filename: str
+    hit_distance_threshold: float | None = None
+    min_distance_threshold: float | None = None
+    min_frames_between_hits: int | None = None
+    min_confidence_threshold: float | None = None
+
+class CreateUploadRequest(BaseModel):
+    filename: str
+    total_size: int
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    total_size: int
+    received_bytes: int
+    complete: bool
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+    frames_done: int
+    total_frames: int
+    progress: float
+    error: str | None = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class HealthResponse(BaseModel):
     status: str
@@ -17,4 +17,15 @@ class APIInfoResponse(BaseModel):
     name: str
     version: str
     description: str
-    endpoints: dict[str, str]
\ No newline at end of file
+    endpoints: dict[str, str]
+
+class ModelInfoResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_path: str
+    device: str
+    precision: str
+    backend: str
+    load_seconds: float
+    memory_mb: float
+    rss_delta_mb: float
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Dict, Any
 import platform
@@ -6,7 +7,9 @@ import psutil
 import os
 from pathlib import Path
 from datetime import datetime
-from .response import HealthResponse, SystemInfoResponse, APIInfoResponse
+from app.metrics import metrics
+from app.yolo import model_registry
+from .response import HealthResponse, SystemInfoResponse, APIInfoResponse, ModelInfoResponse
 
 status_router = APIRouter(prefix="/status", tags=["status"])
 
@@ -43,6 +46,28 @@ async def system_info() -> SystemInfoResponse:
     )
 
 
+@status_router.get("/models", response_model=list[ModelInfoResponse])
+async def models_info() -> list[ModelInfoResponse]:
+    return [
+        ModelInfoResponse(
+            model_path=loaded.model_path,
+            device=loaded.device,
+            precision=loaded.precision,
+            backend=loaded.backend,
+            load_seconds=loaded.load_seconds,
+            memory_mb=loaded.memory_bytes / (1024**2),
+            rss_delta_mb=loaded.rss_delta_bytes / (1024**2)
+        )
+        for loaded in model_registry.loaded_models()
+    ]
+
+
+@status_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_info() -> PlainTextResponse:
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @status_router.get("/api", response_model=APIInfoResponse)
 async def api_info() -> APIInfoResponse:
     return APIInfoResponse(
@@ -51,8 +76,14 @@ async def api_info() -> APIInfoResponse:
         description="API para analizar partidos de padel usando detección de jugadores y pelota",
         endpoints={
             "upload_video": "/match/upload-video",
+            "resumable_upload": "/match/uploads",
+            "job_status": "/match/jobs/{job_id}",
+            "job_result": "/match/jobs/{job_id}/result",
+            "reanalyze": "/match/reanalyze",
             "health": "/status/health",
             "system": "/status/system",
+            "models": "/status/models",
+            "metrics": "/status/metrics",
             "api_info": "/status/api"
         }
     )
@@ -1,5 +1,6 @@
 from .result import DetectionResultFrame, DetectionResultVideo, HitCandidate
 from .hit_events import HitEvent
 from .match_stats import MatchStatistics
+from .detection_table import CLASS_NAMES, DetectionTable, DetectionTableBuilder
 
-__all__ = ["DetectionResultFrame", "DetectionResultVideo", "HitEvent", "MatchStatistics","HitCandidate"]
\ No newline at end of file
+__all__ = ["DetectionResultFrame", "DetectionResultVideo", "HitEvent", "MatchStatistics","HitCandidate", "CLASS_NAMES", "DetectionTable", "DetectionTableBuilder"]
\ No newline at end of file
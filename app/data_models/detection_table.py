@@ -0,0 +1,172 @@
+from dataclasses import dataclass, field
+from typing import Iterator, Literal
+
+import numpy as np
+from numpy import ndarray
+
+from .result import DetectionResultFrame, DetectionResultVideo
+
+CLASS_NAMES: tuple[Literal["ball", "player"], ...] = ("ball", "player")
+
+
+@dataclass
+class DetectionTable:
+    """
+    Detecciones de un rango de frames guardadas por columnas (arrays de NumPy)
+    en vez de un objeto pydantic por detección. Las filas están ordenadas por
+    frame, así que las detecciones de un frame son un slice contiguo (vistas,
+    sin copias). La conversión a DetectionResultFrame queda para el borde de la API.
+
+    Por detección ocupa 29 bytes: frame (int32), clase (uint8), track ID (int32),
+    confianza (float32) y x1/y1/x2/y2 (float32). Ver benchmarks/bench_detection_store.py.
+    """
+
+    frame_index: ndarray  # int32
+    class_index: ndarray  # uint8, índice en CLASS_NAMES
+    track_id: ndarray  # int32
+    confidence: ndarray  # float32
+    boxes: ndarray  # float32 (N x 4): x1, y1, x2, y2
+    frame_start: int = 0  # rango de frames cubierto [frame_start, frame_stop)
+    frame_stop: int = 0
+    _offsets: ndarray | None = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def empty(cls, frame_start: int = 0, frame_stop: int = 0) -> "DetectionTable":
+        return cls(
+            frame_index=np.empty(0, dtype=np.int32),
+            class_index=np.empty(0, dtype=np.uint8),
+            track_id=np.empty(0, dtype=np.int32),
+            confidence=np.empty(0, dtype=np.float32),
+            boxes=np.empty((0, 4), dtype=np.float32),
+            frame_start=frame_start,
+            frame_stop=frame_stop
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame_number: int,
+        class_name: Literal["ball", "player"],
+        boxes: ndarray,
+        confidences: ndarray,
+        track_ids: ndarray
+    ) -> "DetectionTable":
+        """Tabla con las detecciones de un único frame"""
+        count = len(boxes)
+        return cls(
+            frame_index=np.full(count, frame_number, dtype=np.int32),
+            class_index=np.full(count, CLASS_NAMES.index(class_name), dtype=np.uint8),
+            track_id=np.asarray(track_ids, dtype=np.int32),
+            confidence=np.asarray(confidences, dtype=np.float32),
+            boxes=np.asarray(boxes, dtype=np.float32).reshape(count, 4),
+            frame_start=frame_number,
+            frame_stop=frame_number + 1
+        )
+
+    @classmethod
+    def concatenate(cls, tables: list["DetectionTable"]) -> "DetectionTable":
+        """Une tablas de rangos de frames; las filas se reordenan por frame de forma estable"""
+        if not tables:
+            return cls.empty()
+        frame_index = np.concatenate([table.frame_index for table in tables])
+        order = np.argsort(frame_index, kind="stable")
+        return cls(
+            frame_index=frame_index[order],
+            class_index=np.concatenate([table.class_index for table in tables])[order],
+            track_id=np.concatenate([table.track_id for table in tables])[order],
+            confidence=np.concatenate([table.confidence for table in tables])[order],
+            boxes=np.concatenate([table.boxes for table in tables])[order],
+            frame_start=min(table.frame_start for table in tables),
+            frame_stop=max(table.frame_stop for table in tables)
+        )
+
+    def __len__(self) -> int:
+        return len(self.frame_index)
+
+    @property
+    def x1(self) -> ndarray:
+        return self.boxes[:, 0]
+
+    @property
+    def y1(self) -> ndarray:
+        return self.boxes[:, 1]
+
+    @property
+    def x2(self) -> ndarray:
+        return self.boxes[:, 2]
+
+    @property
+    def y2(self) -> ndarray:
+        return self.boxes[:, 3]
+
+    @property
+    def nbytes(self) -> int:
+        return (self.frame_index.nbytes + self.class_index.nbytes + self.track_id.nbytes
+                + self.confidence.nbytes + self.boxes.nbytes)
+
+    def _rows(self, rows: slice | ndarray, frame_start: int, frame_stop: int) -> "DetectionTable":
+        return DetectionTable(
+            frame_index=self.frame_index[rows],
+            class_index=self.class_index[rows],
+            track_id=self.track_id[rows],
+            confidence=self.confidence[rows],
+            boxes=self.boxes[rows],
+            frame_start=frame_start,
+            frame_stop=frame_stop
+        )
+
+    def frame(self, frame_number: int) -> "DetectionTable":
+        """Detecciones de un frame como vistas sobre las columnas (O(1) tras el primer acceso)"""
+        if not self.frame_start <= frame_number < self.frame_stop:
+            raise IndexError(f"Frame {frame_number} fuera del rango [{self.frame_start}, {self.frame_stop})")
+        if self._offsets is None:
+            self._offsets = np.searchsorted(self.frame_index, np.arange(self.frame_start, self.frame_stop + 1))
+        position = frame_number - self.frame_start
+        rows = slice(self._offsets[position], self._offsets[position + 1])
+        return self._rows(rows, frame_number, frame_number + 1)
+
+    def frames(self) -> Iterator[tuple[int, "DetectionTable"]]:
+        for frame_number in range(self.frame_start, self.frame_stop):
+            yield frame_number, self.frame(frame_number)
+
+    def select_class(self, class_name: Literal["ball", "player"]) -> "DetectionTable":
+        mask = self.class_index == CLASS_NAMES.index(class_name)
+        return self._rows(mask, self.frame_start, self.frame_stop)
+
+    def track_labels(self) -> list[str]:
+        """Track IDs como los class_id (str) que usan HitEvent y la API"""
+        return [str(track_id) for track_id in self.track_id.tolist()]
+
+    def to_detections(self) -> list[DetectionResultFrame]:
+        return [
+            DetectionResultFrame(
+                box=box,
+                confidence=confidence,
+                class_name=CLASS_NAMES[class_index],
+                class_id=str(track_id),
+                frame_number=frame_number
+            )
+            for frame_number, class_index, track_id, confidence, box in zip(
+                self.frame_index.tolist(),
+                self.class_index.tolist(),
+                self.track_id.tolist(),
+                self.confidence.tolist(),
+                self.boxes.tolist()
+            )
+        ]
+
+    def to_result_video(self) -> DetectionResultVideo:
+        return DetectionResultVideo(frame_detections=self.to_detections())
+
+
+@dataclass
+class DetectionTableBuilder:
+    """Acumula tablas parciales (por frame o por batch) y las concatena una sola vez al final"""
+
+    _tables: list[DetectionTable] = field(default_factory=list)
+
+    def append(self, table: DetectionTable) -> None:
+        self._tables.append(table)
+
+    def build(self) -> DetectionTable:
+        return DetectionTable.concatenate(self._tables)
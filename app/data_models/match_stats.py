@@ -7,3 +7,4 @@ class MatchStatistics(BaseModel):
     video_duration: float = Field(default=0.0)
     fps: float = Field(default=0.0)
     processed_video_path: str = Field(default="")  # Ruta del video procesado
+    profile_path: str = Field(default="")  # Perfil del análisis, si el job se perfiló
@@ -7,6 +7,7 @@ class DetectionResultFrame(BaseModel):
     confidence: float = Field(ge=0, le=1)
     class_name: Literal["ball", "player"]
     class_id: str
+    frame_number: int | None = None
 
 class DetectionResultVideo(BaseModel):
     frame_detections: list[DetectionResultFrame]
@@ -0,0 +1,27 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from app.settings import Settings
+
+_file_hashes: dict[tuple[str, int, int], str] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def file_sha256(path: str | Path, chunk_size: int = Settings.UPLOAD_CHUNK_SIZE) -> str:
+    """SHA-256 del contenido de un archivo; se memoriza por (ruta, tamaño, mtime) para no releer los pesos"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    cached = _file_hashes.get(key)
+    if cached is not None:
+        return cached
+
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+    with _file_hashes_lock:
+        _file_hashes[key] = digest
+    return digest
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from app.data_models import DetectionTable
+from app.metrics import metrics
+from app.settings import Settings
+
+CACHE_COLUMNS = ("frame_index", "class_index", "track_id", "confidence", "boxes")
+METADATA_FILE = "meta.json"
+
+
+@dataclass
+class CachedDetections:
+    key: str
+    detections: DetectionTable
+    total_frames: int
+    fps: float
+    width: int
+    height: int
+
+
+@dataclass
+class DetectionCache:
+    """
+    Cache en disco de las detecciones crudas (jugadores y pelota) de cada video.
+    Cada entrada es un directorio con una columna de la DetectionTable por
+    archivo .npy, que se abre con memory-map, más un meta.json con los datos del
+    video. La clave combina el hash del contenido del video con la firma de los
+    detectores (hash de los pesos, umbrales, tracker). La expulsión es LRU por
+    fecha de último acceso hasta quedar bajo `max_bytes`.
+    """
+
+    cache_dir: Path
+    max_bytes: int = Settings.DETECTION_CACHE_MAX_BYTES
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @staticmethod
+    def make_key(video_sha256: str, detector_signature: dict) -> str:
+        payload = json.dumps({"video": video_sha256, "detectors": detector_signature}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> CachedDetections | None:
+        entry_dir = self.cache_dir / key
+        metadata_path = entry_dir / METADATA_FILE
+        if not metadata_path.exists():
+            metrics.increment("padel_detection_cache_requests_total", result="miss")
+            return None
+
+        metrics.increment("padel_detection_cache_requests_total", result="hit")
+        metadata = json.loads(metadata_path.read_text())
+        columns = {name: np.load(entry_dir / f"{name}.npy", mmap_mode="r") for name in CACHE_COLUMNS}
+        # Marcar el acceso para la política LRU
+        os.utime(metadata_path)
+
+        return CachedDetections(
+            key=key,
+            detections=DetectionTable(**columns, frame_start=metadata["frame_start"], frame_stop=metadata["frame_stop"]),
+            total_frames=metadata["total_frames"],
+            fps=metadata["fps"],
+            width=metadata["width"],
+            height=metadata["height"]
+        )
+
+    def put(self, key: str, detections: DetectionTable, total_frames: int, fps: float, width: int, height: int) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Se escribe en un directorio temporal y se publica con un rename atómico
+        tmp_dir = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+        tmp_dir.mkdir()
+        try:
+            for name in CACHE_COLUMNS:
+                np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(getattr(detections, name)))
+            size_bytes = sum(path.stat().st_size for path in tmp_dir.iterdir())
+            metadata = {
+                "frame_start": detections.frame_start,
+                "frame_stop": detections.frame_stop,
+                "total_frames": total_frames,
+                "fps": fps,
+                "width": width,
+                "height": height,
+                "size_bytes": size_bytes,
+                "created_at": time.time()
+            }
+            (tmp_dir / METADATA_FILE).write_text(json.dumps(metadata))
+
+            entry_dir = self.cache_dir / key
+            with self._lock:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(tmp_dir, entry_dir)
+                self._evict(keep=key)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return entry_dir
+
+    def size_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self) -> list[tuple[Path, float, int]]:
+        entries: list[tuple[Path, float, int]] = []
+        if not self.cache_dir.exists():
+            return entries
+        for entry_dir in self.cache_dir.iterdir():
+            metadata_path = entry_dir / METADATA_FILE
+            if entry_dir.name.startswith(".") or not metadata_path.exists():
+                continue
+            size_bytes = json.loads(metadata_path.read_text())["size_bytes"]
+            entries.append((entry_dir, metadata_path.stat().st_mtime, size_bytes))
+        return entries
+
+    def _evict(self, keep: str) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_bytes = sum(size for _, _, size in entries)
+        for entry_dir, _, size in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if entry_dir.name == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_bytes -= size
+            print(f"🗑️ Detecciones expulsadas del cache: {entry_dir.name}")
+
+
+def default_detection_cache() -> DetectionCache | None:
+    if not Settings.DETECTION_CACHE_ENABLED:
+        return None
+    return DetectionCache(cache_dir=Path(Settings.DETECTION_CACHE_DIR))
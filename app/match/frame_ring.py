@@ -0,0 +1,114 @@
+from dataclasses import InitVar, dataclass, field
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+from numpy import ndarray
+
+from app.metrics import StageTimings
+from app.yolo.abstract import AbstractYoloDetector
+from .sharding import ShardResult, detect_raw, init_shard_worker
+
+_ALIGNMENT = 64
+
+
+@dataclass
+class SharedFrameRing:
+    """
+    Slots de frames en un segmento de multiprocessing.shared_memory: el proceso que
+    decodifica escribe cada frame en un slot y los workers leen vistas NumPy de la
+    misma memoria, sin serializar los ndarray. Cada slot tiene un contador de
+    lectores en el encabezado del segmento; acquire() lo toma con la cantidad de
+    lectores que lo van a usar y vuelve a estar libre cuando todos llamaron a release().
+    """
+
+    name: str | None
+    slots: int
+    shape: tuple[int, int, int]
+    lock: Any  # multiprocessing.Lock del contexto que crea los workers
+    create: InitVar[bool] = False
+    _memory: shared_memory.SharedMemory = field(init=False, repr=False)
+    _refcounts: ndarray = field(init=False, repr=False)
+    _frames: ndarray = field(init=False, repr=False)
+
+    def __post_init__(self, create: bool) -> None:
+        # Contadores int32 al principio del segmento, frames a partir de un offset alineado
+        header = -(-self.slots * 4 // _ALIGNMENT) * _ALIGNMENT
+        if create:
+            self._memory = shared_memory.SharedMemory(create=True, size=header + self.slots * int(np.prod(self.shape)))
+            self.name = self._memory.name
+        else:
+            self._memory = shared_memory.SharedMemory(name=self.name)
+        self._refcounts = np.ndarray((self.slots,), dtype=np.int32, buffer=self._memory.buf)
+        self._frames = np.ndarray((self.slots, *self.shape), dtype=np.uint8, buffer=self._memory.buf, offset=header)
+        if create:
+            self._refcounts[:] = 0
+
+    def spec(self) -> tuple:
+        """Lo que necesita un worker para abrir el mismo ring (se pasa al crear el proceso, por el lock)"""
+        return self.name, self.slots, self.shape, self.lock
+
+    def frame(self, slot: int) -> ndarray:
+        return self._frames[slot]
+
+    def acquire(self, readers: int) -> int | None:
+        """Toma un slot libre para `readers` lectores; None si están todos en uso"""
+        with self.lock:
+            free = np.flatnonzero(self._refcounts == 0)
+            if len(free) == 0:
+                return None
+            slot = int(free[0])
+            self._refcounts[slot] = readers
+            return slot
+
+    def release(self, slot: int) -> None:
+        with self.lock:
+            if self._refcounts[slot] <= 0:
+                raise RuntimeError(f"El slot {slot} ya estaba libre")
+            self._refcounts[slot] -= 1
+
+    def in_use(self) -> int:
+        with self.lock:
+            return int(np.count_nonzero(self._refcounts))
+
+    def close(self) -> None:
+        # Las vistas tienen que soltarse antes de cerrar el segmento
+        del self._refcounts, self._frames
+        self._memory.close()
+
+    def unlink(self) -> None:
+        self._memory.unlink()
+
+
+_worker: dict[str, Any] = {}
+
+
+def init_ring_worker(
+    ring_spec: tuple,
+    torch_threads: int,
+    metrics_enabled: bool,
+    player_detector: AbstractYoloDetector,
+    ball_detector: AbstractYoloDetector
+) -> None:
+    """Initializer del pool: abre el ring y deja los detectores del proceso listos para todos los batches"""
+    init_shard_worker(torch_threads, metrics_enabled)
+    _worker.update(ring=SharedFrameRing(*ring_spec), player_detector=player_detector, ball_detector=ball_detector)
+
+
+def detect_ring_batch(slots: list[int], start: int) -> ShardResult:
+    """
+    Corre en un worker: infiere ambos modelos sobre los frames de `slots` (frames
+    start, start + 1, ...) leyéndolos del ring y suelta su referencia a cada slot.
+    Devuelve solo las detecciones crudas.
+    """
+    ring: SharedFrameRing = _worker["ring"]
+    timings = StageTimings()
+    try:
+        players, balls = detect_raw(
+            [ring.frame(slot) for slot in slots], start, _worker["player_detector"], _worker["ball_detector"], timings
+        )
+    finally:
+        for slot in slots:
+            ring.release(slot)
+    return ShardResult(start=start, stop=start + len(slots), players=players, balls=balls, timings=timings)
+
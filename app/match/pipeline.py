@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from app.metrics import metrics
+
+_END = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    input_stall_seconds: float = 0.0  # esperando trabajo de la etapa anterior
+    output_stall_seconds: float = 0.0  # bloqueada por backpressure de la etapa siguiente
+    wall_seconds: float = 0.0
+
+    @property
+    def stalled_seconds(self) -> float:
+        return self.input_stall_seconds + self.output_stall_seconds
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+class StagedPipeline:
+    """
+    Ejecuta una fuente y una cadena de etapas, cada una en su propio thread,
+    conectadas por colas acotadas. Cada etapa procesa los items en orden FIFO
+    con un único thread, así que el orden de salida es determinístico.
+    `on_thread_start` se llama al arrancar cada thread, dentro de él (p. ej. para
+    anotarlo en el profiler del job).
+    """
+
+    def __init__(
+        self,
+        source_name: str,
+        source: Iterable[Any],
+        stages: list[tuple[str, Callable[[Any], Any]]],
+        queue_size: int = 4,
+        item_count: Callable[[Any], int] = len,
+        on_thread_start: Callable[[], None] | None = None
+    ):
+        self.source_name = source_name
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.item_count = item_count
+        self.on_thread_start = on_thread_start
+        self.stats: list[StageStats] = []
+        self._queues: list[queue.Queue] = []
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+
+    def run(self) -> list[StageStats]:
+        queues = self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        metrics.track_queues(self)
+        self.stats = [StageStats(self.source_name)] + [StageStats(name) for name, _ in self.stages]
+
+        threads = [threading.Thread(target=self._run_source, args=(self.stats[0], queues[0]), name=self.source_name)]
+        for index, (name, fn) in enumerate(self.stages):
+            out_queue = queues[index + 1] if index + 1 < len(queues) else None
+            threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(self.stats[index + 1], fn, queues[index], out_queue),
+                name=name
+            ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def queue_depths(self) -> dict[str, int]:
+        """Items esperando en la cola de entrada de cada etapa"""
+        return {name: stage_queue.qsize() for (name, _), stage_queue in zip(self.stages, self._queues)}
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _put(self, out_queue: queue.Queue, item: Any) -> None:
+        while not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, in_queue: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _run_source(self, stats: StageStats, out_queue: queue.Queue) -> None:
+        start = time.perf_counter()
+        try:
+            if self.on_thread_start is not None:
+                self.on_thread_start()
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                busy_start = time.perf_counter()
+                item = next(iterator, _END)
+                stats.busy_seconds += time.perf_counter() - busy_start
+                if item is _END:
+                    break
+                stats.items += self.item_count(item)
+
+                stall_start = time.perf_counter()
+                self._put(out_queue, item)
+                stats.output_stall_seconds += time.perf_counter() - stall_start
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_queue, _END)
+            stats.wall_seconds = time.perf_counter() - start
+
+    def _run_stage(self, stats: StageStats, fn: Callable[[Any], Any], in_queue: queue.Queue, out_queue: queue.Queue | None) -> None:
+        start = time.perf_counter()
+        try:
+            if self.on_thread_start is not None:
+                self.on_thread_start()
+            while True:
+                stall_start = time.perf_counter()
+                item = self._get(in_queue)
+                stats.input_stall_seconds += time.perf_counter() - stall_start
+                if item is _END:
+                    break
+
+                busy_start = time.perf_counter()
+                result = fn(item)
+                stats.busy_seconds += time.perf_counter() - busy_start
+                stats.items += self.item_count(item)
+
+                if out_queue is not None:
+                    stall_start = time.perf_counter()
+                    self._put(out_queue, result)
+                    stats.output_stall_seconds += time.perf_counter() - stall_start
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if out_queue is not None:
+                self._put(out_queue, _END)
+            stats.wall_seconds = time.perf_counter() - start
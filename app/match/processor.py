@@ -1,16 +1,32 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import copy
+from pathlib import Path
 from dataclasses import dataclass, field
+import multiprocessing
 import cv2
 from tqdm import tqdm
 import os
+import numpy as np
 from numpy import ndarray
 from app.yolo.player_detector import PlayerYoloDetector
 from app.yolo.ball_detector import BallYoloDetector
-from app.data_models import DetectionResultFrame, HitEvent, MatchStatistics, HitCandidate
-from typing import TypeVar, Sequence
+from app.yolo.abstract import AbstractYoloDetector
+from app.data_models import DetectionTable, DetectionTableBuilder, HitEvent, MatchStatistics
+from app.yolo.batching import resolve_batch_size
+from app.metrics import StageTimings, metrics
+from app.settings import Settings
+from app.video import OverlayRenderer, VideoReader, open_video_reader, open_video_writer
+from app.hashing import file_sha256
+from .detection_cache import DetectionCache, default_detection_cache
+from .profiling import FrameWindowProfiler, default_profiler
+from .pipeline import StagedPipeline, StageStats
+from .scheduler import MotionGatedScheduler, SchedulerStats
+from .frame_ring import SharedFrameRing, detect_ring_batch, init_ring_worker
+from .sharding import ShardResult, default_shard_workers, detect_shard, init_shard_worker, shard_ranges
+from typing import Any, Callable, Iterator, Literal, Sequence
 
 
-T = TypeVar("T", bound=DetectionResultFrame)
-
 @dataclass
 class PadelMatchProcessor:
     hit_distance_threshold: float = 70.0 
@@ -22,109 +38,246 @@ class PadelMatchProcessor:
     match_stats: MatchStatistics = field(default_factory=MatchStatistics)
     hit_events: list[HitEvent] = field(default_factory=list)
     last_hit_frame: dict[str, int] = field(default_factory=dict)
+    batch_size: int = Settings.INFERENCE_BATCH_SIZE
+    execution_mode: Literal["serial", "pipelined", "sharded", "shared_memory"] = Settings.PROCESSOR_EXECUTION_MODE
+    shard_workers: int = Settings.PROCESSOR_SHARD_WORKERS
+    frame_ring_slots: int = Settings.FRAME_RING_SLOTS
+    pipeline_queue_size: int = 4
+    progress_callback: Callable[[int, int], None] | None = None
+    detection_cache: DetectionCache | None = field(default_factory=default_detection_cache)
+    decoder: Literal["auto", "pyav", "ffmpeg", "opencv"] = Settings.VIDEO_DECODER
+    decode_max_size: int = Settings.DECODE_MAX_SIZE
+    profiler: FrameWindowProfiler | None = field(default_factory=default_profiler)
+    overlay: OverlayRenderer = field(default_factory=OverlayRenderer)
+    frames_analyzed: int = field(default=0, init=False)
+    detections: DetectionTable = field(default_factory=DetectionTable.empty, init=False)
+    _detection_builder: DetectionTableBuilder = field(default_factory=DetectionTableBuilder, init=False, repr=False)
+    stage_stats: list[StageStats] = field(default_factory=list, init=False)
+    stage_timings: StageTimings = field(default_factory=StageTimings, init=False)
+    scheduler_stats: SchedulerStats | None = field(default=None, init=False)
         
-    def _calculate_distance(self, player_box: list[float], ball_box: list[float]) -> float:
-        if len(player_box) != 4 or len(ball_box) != 4:
-            return float('inf')
-        
-        player_center_x = (player_box[0] + player_box[2]) / 2
-        player_center_y = (player_box[1] + player_box[3]) / 2
+    def _detect_frame(self, frame: ndarray, frame_number: int, frame_step: int = 1) -> tuple[DetectionTable, DetectionTable]:
+        """Corre cada detector exactamente una vez sobre el frame; frame_step es la distancia al frame inferido anterior"""
+        return self._detect_batch([frame], frame_number, frame_step)[0]
 
-        ball_center_x = (ball_box[0] + ball_box[2]) / 2
-        ball_center_y = (ball_box[1] + ball_box[3]) / 2
-        
-        distance = ((player_center_x - ball_center_x) ** 2 + (player_center_y - ball_center_y) ** 2) ** 0.5
-        return distance
+    def _detect_batch(self, frames: list[ndarray], first_frame: int, frame_step: int = 1) -> list[tuple[DetectionTable, DetectionTable]]:
+        """
+        Corre cada detector una vez sobre el batch completo, guarda las detecciones
+        en la tabla columnar del video y devuelve las de cada frame (vistas, sin copias)
+        """
+        player_batch = self.player_detector.detect_batch(frames, first_frame, frame_step)
+        ball_batch = self.ball_detector.detect_batch(frames, first_frame, frame_step)
+        self._detection_builder.append(player_batch)
+        self._detection_builder.append(ball_batch)
+        self.frames_analyzed += len(frames)
+        return [
+            (player_batch.frame(frame_number), ball_batch.frame(frame_number))
+            for frame_number in range(first_frame, first_frame + len(frames) * frame_step, frame_step)
+        ]
 
-    def _filter_detections(self, detections: Sequence[T]) -> list[T]:
-        return [detection for detection in detections if detection.confidence >= self.min_confidence_threshold]
+    def _reset_detections(self) -> None:
+        # Los tracks arrancan de cero en cada video para que las detecciones cacheadas sean reproducibles
+        self.player_detector.reset_tracking()
+        self.ball_detector.reset_tracking()
+        self._detection_builder = DetectionTableBuilder()
+        self.detections = DetectionTable.empty()
 
-    def _detect_hits_in_frame(self, frame: ndarray, frame_number: int, timestamp: float) -> list[HitEvent]:
-        hits: list[HitEvent] = []
-        
-        if frame is None:
-            return hits
-        
-        player_detections = self.player_detector.process_frame(frame)
-        ball_detections = self.ball_detector.process_frame(frame)
+    def _finish_detections(self) -> None:
+        self.detections = self._detection_builder.build()
+        self._detection_builder = DetectionTableBuilder()
 
-        valid_player_detections = self._filter_detections(player_detections)
-        valid_ball_detections = self._filter_detections(ball_detections)
-        
-        if not valid_ball_detections or not valid_player_detections:
-            return hits
-        
-        hit_candidates: list[HitCandidate] = []
-        
-        for player_detection in valid_player_detections:
-            player_id = player_detection.class_id
-            
-            if player_id in self.last_hit_frame:
-                frames_since_last_hit = frame_number - self.last_hit_frame[player_id]
-                if frames_since_last_hit < self.min_frames_between_hits:
-                    continue
-            
+    def detection_cache_key(self, video_path: str | None, video_sha256: str | None = None) -> str:
+        """Clave del cache: contenido del video + hash de los pesos y configuración de ambos detectores"""
+        signature: dict[str, Any] = {
+            "player": {**self.player_detector.signature(), "weights_sha256": file_sha256(self.player_detector.model_path)},
+            "ball": {**self.ball_detector.signature(), "weights_sha256": file_sha256(self.ball_detector.model_path)}
+        }
+        if self.decode_max_size:
+            # Las detecciones están en coordenadas de los frames decodificados
+            signature["decode_max_size"] = self.decode_max_size
+        if video_sha256 is None:
+            if video_path is None:
+                raise ValueError("Se necesita video_path o video_sha256")
+            video_sha256 = file_sha256(video_path)
+        return DetectionCache.make_key(video_sha256, signature)
+
+    def _store_detections(self, video_path: str, video_sha256: str | None, width: int, height: int) -> None:
+        if self.detection_cache is None:
+            return
+        try:
+            key = self.detection_cache_key(video_path, video_sha256)
+            self.detection_cache.put(key, self.detections, self.match_stats.total_frames, self.match_stats.fps, width, height)
+        except OSError as e:
+            # El cache es una optimización: si falla, el análisis ya está hecho igual
+            print(f"⚠️ No se pudieron cachear las detecciones: {e}")
+
+    def _open_video(self, video_path: str) -> VideoReader:
+        return open_video_reader(video_path, self.decoder, self.decode_max_size)
+
+    def _read_frame_batches(self, cap: VideoReader, batch_size: int, reuse_buffers: bool = False) -> Iterator[list[ndarray]]:
+        """
+        Con reuse_buffers los frames de cada batch se decodifican sobre los buffers del
+        batch anterior: solo sirve si el consumidor termina con un batch antes de pedir
+        el siguiente (no en el pipeline, donde varios batches están en vuelo a la vez).
+        """
+        frames: list[ndarray] = []
+        buffers: list[ndarray] = []
+        while cap.isOpened():
+            with self._stage("decode"):
+                ret, frame = cap.read(buffers[len(frames)] if reuse_buffers and len(frames) < len(buffers) else None)
+            if not ret or frame is None:
+                break
+            frames.append(frame)
+            if len(frames) == batch_size:
+                yield frames
+                if reuse_buffers:
+                    buffers = frames
+                frames = []
+        if frames:
+            yield frames
+
+    def _report_progress(self, frames_done: int, total_frames: int) -> None:
+        if self.profiler is not None:
+            self.profiler.on_frame(frames_done)
+        if self.progress_callback is not None:
+            self.progress_callback(frames_done, total_frames)
+
+    def _reset_inference_counters(self) -> None:
+        self.frames_analyzed = 0
+        self.player_detector.inference_calls = 0
+        self.ball_detector.inference_calls = 0
+        self.stage_timings = StageTimings()
+        self.player_detector.timings = self.ball_detector.timings = self.stage_timings
+
+    def _begin_profiling(self) -> None:
+        if self.profiler is not None:
+            self.profiler.begin()
+
+    def _register_profiled_thread(self) -> None:
+        if self.profiler is not None:
+            self.profiler.register_thread()
+
+    def _finish_profiling(self, target_path: str) -> None:
+        """Escribe el perfil junto a `target_path` (el video procesado, o el original si no hay salida)"""
+        if self.profiler is None:
+            return
+        target = Path(target_path)
+        profile_path = self.profiler.finish(target.with_name(f"{target.stem}_profile{self.profiler.suffix}"))
+        if profile_path is not None:
+            self.match_stats.profile_path = str(profile_path)
+
+    def _stage(self, name: str):
+        """Mide un bloque como etapa del job en curso (no hace nada con las métricas deshabilitadas)"""
+        return metrics.stage(name, self.stage_timings)
+
+    def inferences_per_frame(self) -> dict[str, float]:
+        if self.frames_analyzed == 0:
+            return {"player": 0.0, "ball": 0.0}
+        return {
+            "player": self.player_detector.inference_calls / self.frames_analyzed,
+            "ball": self.ball_detector.inference_calls / self.frames_analyzed,
+        }
+
+    def _detect_table_hits(self, players: DetectionTable, balls: DetectionTable, frame_number: int, timestamp: float) -> list[HitEvent]:
+        if len(players) == 0 or len(balls) == 0:
+            return []
+
+        with self._stage("hits"):
+            return self._match_hits(
+                players.track_labels(),
+                players.boxes.tolist(),
+                players.confidence.tolist(),
+                balls.boxes.tolist(),
+                balls.confidence.tolist(),
+                frame_number,
+                timestamp
+            )
+
+    def _match_hits(
+        self,
+        player_ids: list[str],
+        player_boxes: list[list[float]],
+        player_confidences: list[float],
+        ball_boxes: list[list[float]],
+        ball_confidences: list[float],
+        frame_number: int,
+        timestamp: float
+    ) -> list[HitEvent]:
+        """
+        Matching jugador-pelota sobre los centros de las cajas: cada jugador toma la
+        pelota más cercana, se filtra por distancia y cooldown, se ordena por score y
+        se asigna de forma greedy 1 a 1. Con las cantidades reales (4 jugadores y 1-2
+        pelotas por frame) los loops sobre listas son más rápidos que operar con
+        arrays de NumPy, donde domina el costo fijo de cada operación
+        (ver benchmarks/bench_hit_matching.py). Solo se crean objetos pydantic para
+        los golpes aceptados.
+        """
+        min_confidence = self.min_confidence_threshold
+        balls = [
+            ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2, box, confidence)
+            for box, confidence in zip(ball_boxes, ball_confidences)
+            if confidence >= min_confidence
+        ]
+        if not balls:
+            return []
+
+        candidates = []
+        for player_id, player_box, player_confidence in zip(player_ids, player_boxes, player_confidences):
+            if player_confidence < min_confidence:
+                continue
+            # Jugador en cooldown desde su último golpe
+            last_hit = self.last_hit_frame.get(player_id)
+            if last_hit is not None and frame_number - last_hit < self.min_frames_between_hits:
+                continue
+
+            player_center_x = (player_box[0] + player_box[2]) / 2
+            player_center_y = (player_box[1] + player_box[3]) / 2
             best_distance = float('inf')
-            best_ball_detection = None
-            
-            for ball_detection in valid_ball_detections:
-                distance = self._calculate_distance(player_detection.box, ball_detection.box)
+            best_ball = None
+            for ball in balls:
+                distance = ((player_center_x - ball[0]) ** 2 + (player_center_y - ball[1]) ** 2) ** 0.5
                 if distance < best_distance:
                     best_distance = distance
-                    best_ball_detection = ball_detection
-            
-            if (self.min_distance_threshold <= best_distance <= self.hit_distance_threshold 
-                and best_ball_detection is not None):
-                
+                    best_ball = ball
+
+            if best_ball is not None and self.min_distance_threshold <= best_distance <= self.hit_distance_threshold:
                 distance_score = 1.0 - (best_distance / self.hit_distance_threshold)
-                confidence_score = (player_detection.confidence + best_ball_detection.confidence) / 2
-                total_score = distance_score * confidence_score
-
-                hit_candidates.append(
-                    HitCandidate(
-                        player_id=player_id,
-                        player_detection=player_detection,
-                        ball_detection=best_ball_detection,
-                        distance=best_distance,
-                        score=total_score
-                    )
-                )
-        
-        hit_candidates.sort(key=lambda x: x.score, reverse=True)
-        
+                confidence_score = (player_confidence + best_ball[3]) / 2
+                candidates.append((distance_score * confidence_score, player_id, player_box, player_confidence, best_ball))
+
+        # sort es estable: a igual score se respeta el orden de los jugadores
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        hits: list[HitEvent] = []
         used_players = set()
         used_ball_boxes = set()
-        
-        for candidate in hit_candidates:
-            player_id = candidate.player_id
-            ball_detection = candidate.ball_detection
-            
-            ball_box_tuple = tuple(ball_detection.box)
-            
+
+        for _, player_id, player_box, player_confidence, (_, _, ball_box, ball_confidence) in candidates:
+            ball_box_tuple = tuple(ball_box)
+
             if player_id not in used_players and ball_box_tuple not in used_ball_boxes:
-                hit_event = HitEvent(
+                hits.append(HitEvent(
                     player_id=player_id,
                     frame_number=frame_number,
                     timestamp=timestamp,
-                    player_confidence=candidate.player_detection.confidence,
-                    ball_confidence=ball_detection.confidence,
-                    player_box=candidate.player_detection.box,
-                    ball_box=ball_detection.box
-                )
-                hits.append(hit_event)
+                    player_confidence=player_confidence,
+                    ball_confidence=ball_confidence,
+                    player_box=player_box,
+                    ball_box=ball_box
+                ))
 
                 used_players.add(player_id)
                 used_ball_boxes.add(ball_box_tuple)
-                
+
                 self.last_hit_frame[player_id] = frame_number
-        
+
         return hits
     
-    def process_video(self, video_path: str) -> MatchStatistics:
+    def process_video(self, video_path: str, video_sha256: str | None = None) -> MatchStatistics:
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video no encontrado: {video_path}")
         
-        cap = cv2.VideoCapture(video_path)
+        cap = self._open_video(video_path)
         
         if not cap.isOpened():
             raise ValueError(f"No se pudo abrir el video: {video_path}")
@@ -135,43 +288,387 @@ class PadelMatchProcessor:
         
         self.hit_events.clear()
         self.last_hit_frame.clear()
+        self._reset_inference_counters()
+        self._reset_detections()
         self.match_stats = MatchStatistics(
             total_frames=total_frames,
             video_duration=duration,
             fps=fps
         )
         
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        batch_size = resolve_batch_size(self.batch_size, width, height)
+
+        self._begin_profiling()
+        try:
+            if self.execution_mode == "sharded":
+                self._run_sharded(video_path, cap, fps, batch_size, total_frames)
+            elif self.execution_mode == "shared_memory":
+                self._run_shared_memory(cap, fps, batch_size, total_frames)
+            elif self.execution_mode == "pipelined":
+                self._run_pipeline(cap, fps, batch_size, total_frames)
+            else:
+                self._run_serial(cap, fps, batch_size, total_frames)
+        finally:
+            cap.release()
+            self._finish_profiling(video_path)
+
+        self._finish_detections()
+        self._store_detections(video_path, video_sha256, width, height)
+        self._calculate_final_statistics()
+        
+        return self.match_stats
+
+    def _run_serial(self, cap: VideoReader, fps: float, batch_size: int, total_frames: int) -> None:
         with tqdm(total=total_frames, desc="Analizando partido", unit="frames") as pbar:
             frame_number = 0
             
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                timestamp = frame_number / fps if fps > 0 else 0
-                
-                frame_hits = self._detect_hits_in_frame(frame, frame_number, timestamp)
-                self.hit_events.extend(frame_hits)
-                
-                frame_number += 1
-                pbar.update(1)
-                
-                if frame_hits:
-                    pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
+            for frames in self._read_frame_batches(cap, batch_size, reuse_buffers=True):
+                for player_detections, ball_detections in self._detect_batch(frames, frame_number):
+                    timestamp = frame_number / fps if fps > 0 else 0
+                    
+                    frame_hits = self._detect_table_hits(player_detections, ball_detections, frame_number, timestamp)
+                    self.hit_events.extend(frame_hits)
+                    
+                    frame_number += 1
+                    pbar.update(1)
+                    self._report_progress(frame_number, total_frames)
+                    
+                    if frame_hits:
+                        pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
+
+    def _run_pipeline(self, cap: VideoReader, fps: float, batch_size: int, total_frames: int) -> None:
+        """Decodificación, inferencia y detección de golpes como etapas separadas, sin video de salida"""
+        inferred_frames = 0
+        frame_number = 0
+
+        def infer(frames: list[ndarray]) -> list[tuple[DetectionTable, DetectionTable]]:
+            nonlocal inferred_frames
+            detections = self._detect_batch(frames, inferred_frames)
+            inferred_frames += len(frames)
+            return detections
+
+        with tqdm(total=total_frames, desc="Analizando partido (pipeline)", unit="frames") as pbar:
+            def detect_hits(detections: list[tuple[DetectionTable, DetectionTable]]) -> None:
+                nonlocal frame_number
+                for player_detections, ball_detections in detections:
+                    timestamp = frame_number / fps if fps > 0 else 0
+                    frame_hits = self._detect_table_hits(player_detections, ball_detections, frame_number, timestamp)
+                    self.hit_events.extend(frame_hits)
+                    frame_number += 1
+                    if frame_hits:
+                        pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
+                pbar.update(len(detections))
+                self._report_progress(frame_number, total_frames)
+
+            pipeline = StagedPipeline(
+                "decode",
+                self._read_frame_batches(cap, batch_size),
+                [("inference", infer), ("hits", detect_hits)],
+                queue_size=self.pipeline_queue_size,
+                on_thread_start=self._register_profiled_thread
+            )
+            self.stage_stats = pipeline.run()
+
+        self._print_stage_stats()
+
+    def _run_sharded(self, video_path: str, cap: VideoReader, fps: float, batch_size: int, total_frames: int) -> None:
+        """
+        Decodificación e inferencia en un pool de procesos, un rango de frames por
+        shard y un modelo por proceso. Los workers devuelven detecciones crudas; el
+        tracking de jugadores y pelota, el cooldown de last_hit_frame y los golpes se
+        recorren acá en orden de frames sobre los shards unidos, así que el resultado
+        es el mismo que el secuencial sin necesidad de solapar rangos ni reconciliar IDs.
+        El recorte a la pelota predicha (tracking con ROI) no aplica: se infiere el frame completo.
+        """
+        workers = self.shard_workers or default_shard_workers()
+        ranges = shard_ranges(total_frames, workers)
+
+        # Cada shard vería otro "primer frame": la región de cancha automática se resuelve una vez acá
+        ret, first_frame = cap.read()
+        worker_detectors = self._worker_detectors(first_frame if ret else None)
+
+        torch_threads = max(1, default_shard_workers() // workers)
+        context = multiprocessing.get_context("spawn")
+        print(f"Procesando en {len(ranges)} shards con {workers} procesos ({torch_threads} threads de torch c/u)")
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=init_shard_worker, initargs=(torch_threads, metrics.enabled)
+        ) as pool:
+            futures = [
+                pool.submit(
+                    detect_shard, video_path, start, stop, *worker_detectors, batch_size, self.decoder, self.decode_max_size
+                )
+                for start, stop in ranges
+            ]
+            with tqdm(total=total_frames, desc="Analizando partido (shards)", unit="frames") as pbar:
+                # Los shards se unen en orden aunque terminen desordenados
+                for future in futures:
+                    shard = future.result()
+                    self._merge_worker_timings(shard.timings)
+                    for frame_number in range(shard.start, shard.stop):
+                        self._track_raw_frame(shard, frame_number, fps)
+
+                    self._count_worker_frames(shard)
+                    pbar.update(shard.stop - shard.start)
+                    self._report_progress(shard.stop, total_frames)
+
+    def _worker_detectors(self, first_frame: ndarray | None) -> tuple[AbstractYoloDetector, AbstractYoloDetector]:
+        """Copias de los detectores (jugadores, pelota) para los procesos del pool, con la región de cancha ya resuelta"""
+        player_detector, ball_detector = copy.deepcopy(self.player_detector), copy.deepcopy(self.ball_detector)
+        if first_frame is not None:
+            for worker_detector, detector in ((player_detector, self.player_detector), (ball_detector, self.ball_detector)):
+                worker_detector.preprocessor.court_roi = detector.preprocessor.roi_for(first_frame)
+        return player_detector, ball_detector
+
+    def _merge_worker_timings(self, timings: StageTimings) -> None:
+        if metrics.enabled:
+            # Lo que se midió en el worker (inferencia, y decodificación en los shards)
+            self.stage_timings.merge(timings)
+            for stage, seconds in timings.seconds.items():
+                metrics.observe_stage(stage, seconds, timings.calls[stage])
+
+    def _track_raw_frame(self, result: ShardResult, frame_number: int, fps: float) -> tuple[DetectionTable, DetectionTable, list[HitEvent]]:
+        """Tracking y golpes de un frame a partir de las detecciones crudas de un worker (en orden de frames)"""
+        players = result.players.frame(frame_number)
+        balls = result.balls.frame(frame_number)
+        with self._stage("tracking"):
+            player_detections = self.player_detector.track_frame(frame_number, players.boxes, players.confidence)
+            ball_detections = self.ball_detector.track_frame(frame_number, balls.boxes, balls.confidence)
+        self._detection_builder.append(player_detections)
+        self._detection_builder.append(ball_detections)
+
+        timestamp = frame_number / fps if fps > 0 else 0
+        frame_hits = self._detect_table_hits(player_detections, ball_detections, frame_number, timestamp)
+        self.hit_events.extend(frame_hits)
+        return player_detections, ball_detections, frame_hits
+
+    def _count_worker_frames(self, result: ShardResult) -> None:
+        frames_done = result.stop - result.start
+        self.frames_analyzed += frames_done
+        self.player_detector.inference_calls += frames_done
+        self.ball_detector.inference_calls += frames_done
+
+    def _run_shared_memory(
+        self, cap: VideoReader, fps: float, batch_size: int, total_frames: int, out=None, height: int = 0
+    ) -> None:
+        """
+        Inferencia en un pool de procesos sin copiar frames entre procesos: este proceso
+        decodifica cada frame directo en un slot de un SharedFrameRing y los workers
+        infieren sobre vistas NumPy de esa memoria y devuelven solo las detecciones.
+        Tracking, golpes y, si hay `out`, anotación y encoding se hacen acá en orden de
+        frames, como en el modo sharded. Con video de salida cada slot tiene dos
+        lectores (el worker y la anotación) y se reutiliza cuando ambos lo soltaron;
+        si no hay slots libres se espera al batch más viejo, lo que frena la decodificación.
+        """
+        workers = self.shard_workers or default_shard_workers()
+        shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        slots = max(self.frame_ring_slots or batch_size * (2 * workers + 1), batch_size)
+        readers = 1 if out is None else 2
+        context = multiprocessing.get_context("spawn")
+        ring = SharedFrameRing(None, slots, shape, context.Lock(), create=True)
+        torch_threads = max(1, default_shard_workers() // workers)
+        print(f"Procesando con {workers} procesos sobre {slots} slots de memoria compartida ({ring.name})")
+
+        pending: deque[tuple[Future, list[int]]] = deque()
+
+        def decode_into_slot() -> int | None:
+            slot = ring.acquire(readers)
+            while slot is None:
+                collect()
+                slot = ring.acquire(readers)
+            view = ring.frame(slot)
+            with self._stage("decode"):
+                ret, frame = cap.read(view)
+            if not ret or frame is None:
+                for _ in range(readers):
+                    ring.release(slot)
+                return None
+            if frame is not view:
+                np.copyto(view, frame)  # el backend no pudo decodificar directo en el slot
+            return slot
+
+        def collect() -> None:
+            future, batch_slots = pending.popleft()
+            result = future.result()
+            self._merge_worker_timings(result.timings)
+            for slot, frame_number in zip(batch_slots, range(result.start, result.stop)):
+                player_detections, ball_detections, frame_hits = self._track_raw_frame(result, frame_number, fps)
+                if out is not None:
+                    annotated_frame = self._create_annotated_frame(
+                        ring.frame(slot), player_detections, ball_detections, frame_hits, frame_number, height
+                    )
+                    with self._stage("encode"):
+                        out.write(annotated_frame)
+                    ring.release(slot)
+            self._count_worker_frames(result)
+            pbar.update(result.stop - result.start)
+            self._report_progress(result.stop, total_frames)
+
+        try:
+            with tqdm(total=total_frames, desc="Analizando partido (memoria compartida)", unit="frames") as pbar:
+                # La región de cancha automática se resuelve con el primer frame antes de crear los workers
+                first_slot = decode_into_slot()
+                worker_detectors = self._worker_detectors(ring.frame(first_slot) if first_slot is not None else None)
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=context,
+                    initializer=init_ring_worker,
+                    initargs=(ring.spec(), torch_threads, metrics.enabled, *worker_detectors)
+                ) as pool:
+                    batch_slots = [first_slot] if first_slot is not None else []
+                    frame_number = len(batch_slots)
+                    slot = first_slot
+                    while slot is not None:
+                        if len(batch_slots) == batch_size:
+                            pending.append((pool.submit(detect_ring_batch, batch_slots, frame_number - batch_size), batch_slots))
+                            batch_slots = []
+                        slot = decode_into_slot()
+                        if slot is not None:
+                            batch_slots.append(slot)
+                            frame_number += 1
+                    if batch_slots:
+                        pending.append((pool.submit(detect_ring_batch, batch_slots, frame_number - len(batch_slots)), batch_slots))
+                    while pending:
+                        collect()
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def reanalyze(self, video_path: str | None = None, video_sha256: str | None = None) -> MatchStatistics:
+        """
+        Recalcula golpes y MatchStatistics con los umbrales actuales a partir de las
+        detecciones cacheadas, sin decodificar el video ni correr los modelos.
+        Los umbrales de los detectores forman parte de la clave: bajar
+        min_confidence_threshold por debajo de ellos no recupera detecciones descartadas.
+        """
+        if self.detection_cache is None:
+            raise LookupError("El cache de detecciones está deshabilitado")
+        if video_path is None and video_sha256 is None:
+            raise ValueError("Se necesita video_path o video_sha256")
+
+        cached = self.detection_cache.get(self.detection_cache_key(video_path, video_sha256))
+        if cached is None:
+            raise LookupError("No hay detecciones cacheadas para este video y estos modelos")
+
+        fps = cached.fps
+        self.hit_events.clear()
+        self.last_hit_frame.clear()
+        self._reset_inference_counters()
+        self.detections = cached.detections
+        self.match_stats = MatchStatistics(
+            total_frames=cached.total_frames,
+            video_duration=cached.total_frames / fps if fps > 0 else 0,
+            fps=fps
+        )
+
+        players = cached.detections.select_class("player")
+        balls = cached.detections.select_class("ball")
+        frame_stop = cached.detections.frame_stop
+        for frame_number in range(cached.detections.frame_start, frame_stop):
+            timestamp = frame_number / fps if fps > 0 else 0
+            frame_hits = self._detect_table_hits(players.frame(frame_number), balls.frame(frame_number), frame_number, timestamp)
+            self.hit_events.extend(frame_hits)
+        self._report_progress(frame_stop, frame_stop)
 
         self._calculate_final_statistics()
-        
         return self.match_stats
-    
-    def process_video_with_output(self, video_path: str, output_path: str) -> MatchStatistics:
+
+    def render_video(self, video_path: str, output_path: str, detections: DetectionTable, hit_events: Sequence[HitEvent]) -> str:
+        """
+        Genera el video anotado a partir de detecciones y golpes ya calculados, sin
+        correr los modelos: decodifica, dibuja y codifica. Las detecciones tienen que
+        venir del mismo decoder y decode_max_size (están en coordenadas de esos frames).
+        El resultado es el mismo video que process_video_with_output. Fuera del modo
+        serial la decodificación, la anotación y el encoding corren como etapas de un
+        pipeline. Devuelve la ruta del archivo generado (sin ffmpeg puede terminar en .avi).
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video no encontrado: {video_path}")
+
+        cap = self._open_video(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"No se pudo abrir el video: {video_path}")
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        out, processed_path = open_video_writer(output_path, fps, width, height, timings=self.stage_timings)
+
+        players = detections.select_class("player")
+        balls = detections.select_class("ball")
+        hits_per_frame: dict[int, list[HitEvent]] = {}
+        for hit in hit_events:
+            hits_per_frame.setdefault(hit.frame_number, []).append(hit)
+
+        frame_number = 0
+        total_hits = 0
+
+        def annotate(frames: list[ndarray]) -> list[ndarray]:
+            nonlocal frame_number, total_hits
+            annotated_frames = []
+            for frame in frames:
+                if detections.frame_start <= frame_number < detections.frame_stop:
+                    player_detections, ball_detections = players.frame(frame_number), balls.frame(frame_number)
+                else:
+                    player_detections = ball_detections = DetectionTable.empty(frame_number, frame_number + 1)
+                frame_hits = hits_per_frame.get(frame_number, [])
+                total_hits += len(frame_hits)
+                annotated_frames.append(self._create_annotated_frame(
+                    frame, player_detections, ball_detections, frame_hits, frame_number, height, total_hits
+                ))
+                frame_number += 1
+            return annotated_frames
+
+        batch_size = resolve_batch_size(self.batch_size, width, height)
+        rendered = False
+        try:
+            with tqdm(total=total_frames, desc="Generando video anotado", unit="frames") as pbar:
+                def encode(annotated_frames: list[ndarray]) -> None:
+                    with self._stage("encode"):
+                        for annotated_frame in annotated_frames:
+                            out.write(annotated_frame)
+                    pbar.update(len(annotated_frames))
+                    self._report_progress(pbar.n, total_frames)
+
+                if self.execution_mode == "serial":
+                    for frames in self._read_frame_batches(cap, batch_size, reuse_buffers=True):
+                        encode(annotate(frames))
+                else:
+                    # Sin inferencia no hay nada que repartir entre procesos: los modos paralelos
+                    # solapan decodificación, anotación y encoding en threads
+                    pipeline = StagedPipeline(
+                        "decode",
+                        self._read_frame_batches(cap, batch_size),
+                        [("annotate", annotate), ("encode", encode)],
+                        queue_size=self.pipeline_queue_size,
+                        on_thread_start=self._register_profiled_thread
+                    )
+                    self.stage_stats = pipeline.run()
+                    self._print_stage_stats()
+            rendered = True
+        finally:
+            try:
+                cap.release()
+                out.release()
+            finally:
+                if not rendered:
+                    # Un video a medio escribir no se deja como si estuviera completo
+                    Path(processed_path).unlink(missing_ok=True)
+
+        print(f"Video anotado guardado en: {processed_path}")
+        return processed_path
+
+    def process_video_with_output(self, video_path: str, output_path: str, video_sha256: str | None = None) -> MatchStatistics:
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video no encontrado: {video_path}")
         
         if output_path is None:
             raise ValueError("No output_path provided")
         
-        cap = cv2.VideoCapture(video_path)
+        cap = self._open_video(video_path)
         if not cap.isOpened():
             raise ValueError(f"No se pudo abrir el video: {video_path}")
         
@@ -181,41 +678,13 @@ class PadelMatchProcessor:
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         duration = total_frames / fps if fps > 0 else 0
         
-        # Intentar diferentes codecs en orden de compatibilidad
-        codecs_to_try = [
-            ('mp4v', '.mp4'),      # MP4 nativo de OpenCV
-            ('XVID', '.avi'),      # AVI como fallback
-            ('MJPG', '.avi')       # Motion JPEG como último recurso
-        ]
-        
-        out = None
-        processed_path = None
-        
-        for codec, extension in codecs_to_try:
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*codec)
-                test_path = output_path.replace('.mp4', extension)
-                out = cv2.VideoWriter(test_path, fourcc, fps, (width, height))
-                
-                if out.isOpened():
-                    print(f"✅ Codec {codec} inicializado correctamente")
-                    processed_path = test_path
-                    break
-                else:
-                    print(f"⚠️ Codec {codec} falló, probando siguiente...")
-                    out.release()
-            except Exception as e:
-                print(f"⚠️ Error con codec {codec}: {e}")
-                if out:
-                    out.release()
-        
-        if not out or not out.isOpened():
-            raise ValueError("No se pudo inicializar ningún codec de video")
-        
-    # NOTE: la conversión a H.264 se realizará después de escribir el video (más abajo)
+        # Un único encoder: H.264 + audio silencioso vía ffmpeg, o un codec de OpenCV como fallback
+        out, processed_path = open_video_writer(output_path, fps, width, height, timings=self.stage_timings)
         
         self.hit_events.clear()
         self.last_hit_frame.clear()
+        self._reset_inference_counters()
+        self._reset_detections()
         self.match_stats = MatchStatistics(
             total_frames=total_frames,
             video_duration=duration,
@@ -230,92 +699,16 @@ class PadelMatchProcessor:
         print(f"  - Frames entre golpes: {self.min_frames_between_hits}")
         print(f"  - Confianza mínima: {self.min_confidence_threshold}")
         
+        batch_size = resolve_batch_size(self.batch_size, width, height)
+
+        self._begin_profiling()
         try:
-            with tqdm(total=total_frames, desc="Analizando partido con output", unit="frames") as pbar:
-                frame_number = 0
-                
-                while cap.isOpened():
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    timestamp = frame_number / fps if fps > 0 else 0
-                    
-                    # Detectar jugadores y pelota
-                    player_detections = self.player_detector.process_frame(frame)
-                    ball_detections = self.ball_detector.process_frame(frame)
-                    
-                    # Detectar golpes en este frame
-                    frame_hits = self._detect_hits_in_frame(frame, frame_number, timestamp)
-                    self.hit_events.extend(frame_hits)
-                    
-                    # Crear frame anotado
-                    annotated_frame = frame.copy()
-                    
-                    # Dibujar detecciones de jugadores
-                    for player_detection in player_detections:
-                        x1, y1, x2, y2 = map(int, player_detection.box)
-                        player_id = int(player_detection.class_id)
-                        confidence = player_detection.confidence
-                        
-                        # Color basado en el ID del jugador
-                        color = (0, 255, 0) if player_id % 2 == 0 else (255, 0, 0)  # Verde o Azul
-                        
-                        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                        
-                        label = f"Player {player_id} ({confidence:.2f})"
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                        cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                                    (x1 + label_size[0], y1), color, -1)
-                        cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # Dibujar detecciones de pelota
-                    for ball_detection in ball_detections:
-                        x1, y1, x2, y2 = map(int, ball_detection.box)
-                        confidence = ball_detection.confidence
-                        
-                        # Color rojo para la pelota
-                        color = (0, 0, 255)  # BGR - Rojo
-                        
-                        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                        
-                        label = f"Ball ({confidence:.2f})"
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                        cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                                    (x1 + label_size[0], y1), color, -1)
-                        cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # Dibujar golpes detectados en este frame
-                    for hit in frame_hits:
-                        # Dibujar línea entre jugador y pelota
-                        player_center_x = int((hit.player_box[0] + hit.player_box[2]) / 2)
-                        player_center_y = int((hit.player_box[1] + hit.player_box[3]) / 2)
-                        ball_center_x = int((hit.ball_box[0] + hit.ball_box[2]) / 2)
-                        ball_center_y = int((hit.ball_box[1] + hit.ball_box[3]) / 2)
-                        
-                        # Línea amarilla para golpes
-                        cv2.line(annotated_frame, (player_center_x, player_center_y), 
-                               (ball_center_x, ball_center_y), (0, 255, 255), 3)
-                        
-                        # Texto de golpe
-                        hit_text = f"HIT! Player {hit.player_id}"
-                        cv2.putText(annotated_frame, hit_text, (10, 30), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 3)
-                    
-                    # Agregar información del frame
-                    frame_info = f"Frame: {frame_number} | Hits: {len(self.hit_events)}"
-                    cv2.putText(annotated_frame, frame_info, (10, height - 20), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    
-                    out.write(annotated_frame)
-                    frame_number += 1
-                    pbar.update(1)
-                    
-                    # Actualizar descripción con golpes detectados
-                    if frame_hits:
-                        pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
+            if self.execution_mode == "pipelined":
+                self._run_output_pipeline(cap, out, fps, height, batch_size, total_frames)
+            elif self.execution_mode == "shared_memory":
+                self._run_shared_memory(cap, fps, batch_size, total_frames, out, height)
+            else:
+                self._run_output_serial(cap, out, fps, height, batch_size, total_frames)
         
         except Exception as e:
             print(f"Error durante el procesamiento: {e}")
@@ -323,54 +716,150 @@ class PadelMatchProcessor:
         finally:
             cap.release()
             out.release()
+            self._finish_profiling(processed_path)
 
-        # Después de cerrar los recursos, intentar convertir a H.264 para compatibilidad web
-        try:
-            import subprocess, shutil
-            ffmpeg_path = shutil.which('ffmpeg')
-            if ffmpeg_path and processed_path:
-                mp4_h264_path = processed_path.rsplit('.', 1)[0] + '_h264.mp4'
-                print(f"🔄 Intentando conversión a H.264 con ffmpeg: {ffmpeg_path}")
-                try:
-                    proc = subprocess.run([
-                        ffmpeg_path, '-y', '-i', processed_path,
-                        '-c:v', 'libx264', '-preset', 'fast', '-pix_fmt', 'yuv420p',
-                        '-c:a', 'aac', mp4_h264_path
-                    ], check=True, capture_output=True, text=True)
-                    print(f"✅ ffmpeg output: {proc.stdout}\n{proc.stderr}")
-                    if os.path.exists(mp4_h264_path):
-                        processed_path = mp4_h264_path
-                        print(f"✅ Video convertido a MP4 H.264: {mp4_h264_path}")
-                except subprocess.CalledProcessError as e:
-                    print(f"❌ ffmpeg falló: returncode={e.returncode} stdout={e.stdout} stderr={e.stderr}")
-            else:
-                print("⚠️ ffmpeg no encontrado en PATH. No se realizará re-encoding. Instala ffmpeg en la VM y añade al PATH para habilitar conversión H.264.")
-                print("   Windows: descargar https://ffmpeg.org/download.html o https://www.gyan.dev/ffmpeg/builds/ y añadir la carpeta bin al PATH")
-        except Exception as e:
-            print(f"⚠️ Error al intentar la conversión con ffmpeg: {e}")
-        except Exception as e:
-            print(f"⚠️ Error al intentar la conversión con ffmpeg: {e}")
-
+        self._finish_detections()
+        self._store_detections(video_path, video_sha256, width, height)
         self._calculate_final_statistics()
         
         # Retornar la ruta del archivo procesado (puede ser MP4 o AVI)
-        final_path = processed_path if processed_path else output_path
-        print(f"Video procesado guardado en: {final_path}")
+        print(f"Video procesado guardado en: {processed_path}")
         
         # Actualizar el atributo para que el API pueda acceder
-        self.processed_video_path = final_path
+        self.processed_video_path = processed_path
+        self.match_stats.processed_video_path = processed_path
         
         return self.match_stats
     
+    def _run_output_serial(self, cap: VideoReader, out, fps: float, height: int, batch_size: int, total_frames: int) -> None:
+        with tqdm(total=total_frames, desc="Analizando partido con output", unit="frames") as pbar:
+            frame_number = 0
+            
+            # Detectar jugadores y pelota por batches (una sola inferencia por modelo y frame)
+            for frames in self._read_frame_batches(cap, batch_size, reuse_buffers=True):
+                for frame, (player_detections, ball_detections) in zip(frames, self._detect_batch(frames, frame_number)):
+                    timestamp = frame_number / fps if fps > 0 else 0
+                    
+                    # Detectar golpes en este frame reutilizando las detecciones
+                    frame_hits = self._detect_table_hits(player_detections, ball_detections, frame_number, timestamp)
+                    self.hit_events.extend(frame_hits)
+                
+                    # Crear frame anotado
+                    annotated_frame = self._create_annotated_frame(
+                        frame, player_detections, ball_detections, frame_hits, frame_number, height
+                    )
+                    
+                    with self._stage("encode"):
+                        out.write(annotated_frame)
+                    frame_number += 1
+                    pbar.update(1)
+                    self._report_progress(frame_number, total_frames)
+                
+                    # Actualizar descripción con golpes detectados
+                    if frame_hits:
+                        pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
+
+    def _run_output_pipeline(self, cap: VideoReader, out, fps: float, height: int, batch_size: int, total_frames: int) -> None:
+        """
+        Decodificación, inferencia, detección de golpes, anotación y encoding corren
+        como etapas separadas conectadas por colas acotadas (backpressure).
+        """
+        frame_number = 0
+        inferred_frames = 0
+
+        def infer(frames: list[ndarray]) -> list[tuple[ndarray, DetectionTable, DetectionTable]]:
+            nonlocal inferred_frames
+            detections = self._detect_batch(frames, inferred_frames)
+            inferred_frames += len(frames)
+            return [(frame, players, balls) for frame, (players, balls) in zip(frames, detections)]
+
+        def detect_hits(batch: list[tuple[ndarray, DetectionTable, DetectionTable]]) -> list[tuple]:
+            nonlocal frame_number
+            analyzed: list[tuple] = []
+            for frame, players, balls in batch:
+                timestamp = frame_number / fps if fps > 0 else 0
+                frame_hits = self._detect_table_hits(players, balls, frame_number, timestamp)
+                self.hit_events.extend(frame_hits)
+                analyzed.append((frame, players, balls, frame_hits, frame_number, len(self.hit_events)))
+                frame_number += 1
+            return analyzed
+
+        def annotate(batch: list[tuple]) -> list[ndarray]:
+            return [
+                self._create_annotated_frame(frame, players, balls, frame_hits, number, height, total_hits)
+                for frame, players, balls, frame_hits, number, total_hits in batch
+            ]
+
+        with tqdm(total=total_frames, desc="Analizando partido (pipeline)", unit="frames") as pbar:
+            def encode(annotated_frames: list[ndarray]) -> None:
+                with self._stage("encode"):
+                    for annotated_frame in annotated_frames:
+                        out.write(annotated_frame)
+                pbar.update(len(annotated_frames))
+                self._report_progress(pbar.n, total_frames)
+
+            pipeline = StagedPipeline(
+                "decode",
+                self._read_frame_batches(cap, batch_size),
+                [("inference", infer), ("hits", detect_hits), ("annotate", annotate), ("encode", encode)],
+                queue_size=self.pipeline_queue_size,
+                on_thread_start=self._register_profiled_thread
+            )
+            self.stage_stats = pipeline.run()
+
+        self._print_stage_stats()
+
+    def _print_stage_stats(self) -> None:
+        for stats in self.stage_stats:
+            print(
+                f"  - {stats.name}: {stats.throughput:.1f} frames/s, ocupada {stats.busy_seconds:.2f}s, "
+                f"esperando entrada {stats.input_stall_seconds:.2f}s, bloqueada {stats.output_stall_seconds:.2f}s"
+            )
+
+    def _read_sampled_frame_batches(self, cap: VideoReader, batch_size: int, sample_rate: int, total_frames: int) -> Iterator[tuple[int, list[ndarray]]]:
+        """
+        Decodifica solo 1 de cada 'sample_rate' frames: el resto se avanza con grab(),
+        que no convierte ni copia la imagen. Devuelve (número del primer frame, frames);
+        los frames de un batch están separados exactamente por 'sample_rate'.
+        """
+        frames: list[ndarray] = []
+        first_frame = 0
+        frame_number = 0
+        while cap.isOpened():
+            if frame_number % sample_rate == 0:
+                with self._stage("decode"):
+                    ret, frame = cap.read()
+                if not ret or frame is None:
+                    break
+                if not frames:
+                    first_frame = frame_number
+                frames.append(frame)
+                if len(frames) == batch_size:
+                    yield first_frame, frames
+                    frames = []
+            else:
+                with self._stage("decode"):
+                    grabbed = cap.grab()
+                if not grabbed:
+                    break
+            frame_number += 1
+            self._report_progress(frame_number, total_frames)
+        if frames:
+            yield first_frame, frames
+
     def process_video_optimized(self, video_path: str, output_path: str = None, sample_rate: int = 5) -> MatchStatistics:
         """
         Versión optimizada que procesa solo 1 de cada 'sample_rate' frames para mayor velocidad
-        sample_rate=3 significa procesar 1 de cada 3 frames (3x más rápido)
+        sample_rate=3 significa procesar 1 de cada 3 frames (~3x más rápido).
+        Los números de frame y timestamps son los del video original y los golpes
+        se cuentan tal cual se detectan (sin extrapolar por el sample rate).
         """
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video no encontrado: {video_path}")
+        if sample_rate < 1:
+            raise ValueError("sample_rate debe ser mayor o igual a 1")
         
-        cap = cv2.VideoCapture(video_path)
+        cap = self._open_video(video_path)
         if not cap.isOpened():
             raise ValueError(f"No se pudo abrir el video: {video_path}")
         
@@ -381,60 +870,39 @@ class PadelMatchProcessor:
         duration = total_frames / fps if fps > 0 else 0
         
         # Calcular frames a procesar
-        frames_to_process = total_frames // sample_rate
-        estimated_duration = duration / sample_rate
+        frames_to_process = (total_frames + sample_rate - 1) // sample_rate
         
         print(f"Procesando video optimizado: {video_path}")
         print(f"Frames totales: {total_frames}, FPS: {fps:.2f}, Duración: {duration:.2f}s")
         print(f"Frames a procesar: {frames_to_process} (1 de cada {sample_rate})")
-        print(f"Tiempo estimado: {estimated_duration:.2f}s (vs {duration:.2f}s original)")
         
-        # Configurar video writer si se especifica output
+        # El video de salida solo tiene los frames analizados: se escribe a fps / sample_rate para conservar la duración
         out = None
         if output_path:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # mp4v - Compatible sin dependencias externas
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-            
-            # Verificar que el VideoWriter se inicializó correctamente
-            if not out.isOpened():
-                print("⚠️ mp4v falló, probando codec alternativo...")
-                # Probar codec alternativo
-                fourcc = cv2.VideoWriter_fourcc(*'XVID')
-                out = cv2.VideoWriter(output_path.replace('.mp4', '.avi'), fourcc, fps, (width, height))
-                if not out.isOpened():
-                    raise ValueError("No se pudo inicializar ningún codec de video")
-                print("✅ Usando codec XVID como alternativa")
-            else:
-                print("✅ Codec mp4v inicializado correctamente")
+            out, _ = open_video_writer(output_path, fps / sample_rate, width, height, timings=self.stage_timings)
         
         self.hit_events.clear()
         self.last_hit_frame.clear()
+        self._reset_inference_counters()
+        self._reset_detections()
         self.match_stats = MatchStatistics(
             total_frames=total_frames,
             video_duration=duration,
             fps=fps
         )
         
+        batch_size = resolve_batch_size(self.batch_size, width, height)
+
         try:
             with tqdm(total=frames_to_process, desc="Analizando partido (optimizado)", unit="frames") as pbar:
-                frame_number = 0
-                processed_frames = 0
-                
-                while cap.isOpened() and processed_frames < frames_to_process:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    # Solo procesar 1 de cada 'sample_rate' frames
-                    if frame_number % sample_rate == 0:
+                for first_frame, frames in self._read_sampled_frame_batches(cap, batch_size, sample_rate, total_frames):
+                    detections = self._detect_batch(frames, first_frame, sample_rate)
+                    for index, (frame, (player_detections, ball_detections)) in enumerate(zip(frames, detections)):
+                        frame_number = first_frame + index * sample_rate
                         timestamp = frame_number / fps if fps > 0 else 0
                         
-                        # Detectar jugadores y pelota
-                        player_detections = self.player_detector.process_frame(frame)
-                        ball_detections = self.ball_detector.process_frame(frame)
-                        
-                        # Detectar golpes en este frame
-                        frame_hits = self._detect_hits_in_frame(frame, frame_number, timestamp)
+                        # Detectar golpes en este frame reutilizando las detecciones
+                        frame_hits = self._detect_table_hits(player_detections, ball_detections, frame_number, timestamp)
                         self.hit_events.extend(frame_hits)
                         
                         # Crear frame anotado si hay output
@@ -442,96 +910,109 @@ class PadelMatchProcessor:
                             annotated_frame = self._create_annotated_frame(
                                 frame, player_detections, ball_detections, frame_hits, frame_number, height
                             )
-                            out.write(annotated_frame)
+                            with self._stage("encode"):
+                                out.write(annotated_frame)
                         
-                        processed_frames += 1
                         pbar.update(1)
                         
                         if frame_hits:
                             pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
                     
-                    frame_number += 1
-                    
-                    # Saltar frames no procesados
-                    if frame_number % sample_rate != 0:
-                        cap.read()  # Leer y descartar frame
-                    
         finally:
             cap.release()
             if out:
                 out.release()
         
-        # Ajustar estadísticas basado en el sample rate
+        self._finish_detections()
         self._calculate_final_statistics()
-        self.match_stats.total_hits = int(len(self.hit_events) * sample_rate)
         
         return self.match_stats
 
-    def _create_annotated_frame(self, frame, player_detections, ball_detections, frame_hits, frame_number, height):
-        """Crear frame anotado con detecciones y golpes"""
-        annotated_frame = frame.copy()
-        
-        # Dibujar detecciones de jugadores
-        for player_detection in player_detections:
-            x1, y1, x2, y2 = map(int, player_detection.box)
-            player_id = int(player_detection.class_id)
-            confidence = player_detection.confidence
-            
-            # Color basado en el ID del jugador
-            color = (0, 255, 0) if player_id % 2 == 0 else (255, 0, 0)  # Verde o Azul
-            
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-            
-            label = f"Player {player_id} ({confidence:.2f})"
-            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                        (x1 + label_size[0], y1), color, -1)
-            cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # Dibujar detecciones de pelota
-        for ball_detection in ball_detections:
-            x1, y1, x2, y2 = map(int, ball_detection.box)
-            confidence = ball_detection.confidence
-            
-            # Color rojo para la pelota
-            color = (0, 0, 255)  # BGR - Rojo
-            
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-            
-            label = f"Ball ({confidence:.2f})"
-            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                        (x1 + label_size[0], y1), color, -1)
-            cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # Dibujar golpes detectados en este frame
-        for hit in frame_hits:
-            # Dibujar línea entre jugador y pelota
-            player_center_x = int((hit.player_box[0] + hit.player_box[2]) / 2)
-            player_center_y = int((hit.player_box[1] + hit.player_box[3]) / 2)
-            ball_center_x = int((hit.ball_box[0] + hit.ball_box[2]) / 2)
-            ball_center_y = int((hit.ball_box[1] + hit.ball_box[3]) / 2)
-            
-            # Línea amarilla para golpes
-            cv2.line(annotated_frame, (player_center_x, player_center_y), 
-                   (ball_center_x, ball_center_y), (0, 255, 255), 3)
-            
-            # Texto de golpe
-            hit_text = f"HIT! Player {hit.player_id}"
-            cv2.putText(annotated_frame, hit_text, (10, 30), 
-                      cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 3)
-        
-        # Agregar información del frame
-        frame_info = f"Frame: {frame_number} | Hits: {len(self.hit_events)}"
-        cv2.putText(annotated_frame, frame_info, (10, height - 20), 
-                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        return annotated_frame
+    def process_video_adaptive(self, video_path: str, scheduler: MotionGatedScheduler | None = None) -> MatchStatistics:
+        """
+        Corre los modelos solo en los frames que elige el scheduler: densamente cerca
+        de un contacto predicho por la trayectoria de la pelota y espaciado cuando no
+        hay movimiento. Todos los frames se decodifican para el frame differencing.
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video no encontrado: {video_path}")
+
+        cap = self._open_video(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"No se pudo abrir el video: {video_path}")
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration = total_frames / fps if fps > 0 else 0
+
+        if scheduler is None:
+            scheduler = MotionGatedScheduler(contact_distance=self.hit_distance_threshold * 1.5)
+        scheduler.reset()
+
+        self.hit_events.clear()
+        self.last_hit_frame.clear()
+        self._reset_inference_counters()
+        self._reset_detections()
+        self.match_stats = MatchStatistics(
+            total_frames=total_frames,
+            video_duration=duration,
+            fps=fps
+        )
+
+        self._begin_profiling()
+        try:
+            with tqdm(total=total_frames, desc="Analizando partido (adaptativo)", unit="frames") as pbar:
+                frame_number = 0
+                last_inferred: int | None = None
+                while cap.isOpened():
+                    with self._stage("decode"):
+                        ret, frame = cap.read()
+                    if not ret or frame is None:
+                        break
+
+                    if scheduler.should_infer(frame_number, frame):
+                        # El tracker tiene que saber cuántos frames se saltearon desde la última inferencia
+                        frame_step = frame_number - last_inferred if last_inferred is not None else 1
+                        player_detections, ball_detections = self._detect_frame(frame, frame_number, frame_step)
+                        last_inferred = frame_number
+                        scheduler.observe(frame_number, player_detections, ball_detections)
+
+                        timestamp = frame_number / fps if fps > 0 else 0
+                        frame_hits = self._detect_table_hits(player_detections, ball_detections, frame_number, timestamp)
+                        self.hit_events.extend(frame_hits)
+                        if frame_hits:
+                            pbar.set_description(f"Analizando partido (Golpes: {len(self.hit_events)})")
+
+                    frame_number += 1
+                    pbar.update(1)
+                    self._report_progress(frame_number, total_frames)
+        finally:
+            cap.release()
+            self._finish_profiling(video_path)
+
+        self._finish_detections()
+        self.scheduler_stats = scheduler.stats
+        self._calculate_final_statistics()
+        print(
+            f"Frames inferidos: {scheduler.stats.frames_inferred}/{scheduler.stats.frames_seen} "
+            f"({scheduler.stats.skipped_share:.1%} salteados, {scheduler.stats.dense_frames} en zona de contacto)"
+        )
+
+        return self.match_stats
+
+    def _create_annotated_frame(self, frame, player_detections: DetectionTable, ball_detections: DetectionTable, frame_hits, frame_number, height, total_hits=None):
+        """Anota el frame sobre el mismo buffer: los llamadores no vuelven a usar el frame decodificado"""
+        if total_hits is None:
+            total_hits = len(self.hit_events)
+        with self._stage("annotate"):
+            return self.overlay.render(
+                frame, player_detections, ball_detections, frame_hits, f"Frame: {frame_number} | Hits: {total_hits}"
+            )
     
     def _calculate_final_statistics(self) -> None:
         self.match_stats.total_hits = len(self.hit_events)
+        metrics.increment("padel_frames_analyzed_total", self.frames_analyzed)
+        metrics.increment("padel_hits_detected_total", self.match_stats.total_hits)
         
         for hit in self.hit_events:
             player_id = hit.player_id
@@ -553,6 +1034,9 @@ class PadelMatchProcessor:
         print(f"Duración del video: {self.match_stats.video_duration:.2f} segundos")
         print(f"FPS: {self.match_stats.fps:.2f}")
         print(f"Total de frames: {self.match_stats.total_frames}")
+
+        inferences = self.inferences_per_frame()
+        print(f"Inferencias por frame: jugadores {inferences['player']:.2f}, pelota {inferences['ball']:.2f}")
         
         if self.match_stats.hits_per_player:
             print("\nGolpes por jugador:")
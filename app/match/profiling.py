@@ -0,0 +1,159 @@
+import cProfile
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Literal
+
+from app.settings import Settings
+
+ProfilingMode = Literal["sampling", "cprofile"]
+
+# cProfile no admite dos perfiles activos a la vez (desde Python 3.12 usa sys.monitoring,
+# que es global): un solo job se perfila con cProfile por proceso
+_cprofile_lock = threading.Lock()
+
+
+@dataclass
+class FrameWindowProfiler:
+    """
+    Perfila el análisis durante una ventana de `frames` frames a partir de
+    `start_frame`. En modo "sampling" un thread toma cada `sample_interval_ms` el
+    stack de los threads del job (el que llamó a begin y los que se anotan con
+    register_thread, como las etapas del pipeline) y los acumula en formato collapsed (`thread;archivo:función;... cantidad`, la
+    entrada de flamegraph.pl y speedscope). En modo "cprofile" se usa cProfile
+    y se guarda el .prof de pstats; cProfile se prende en begin y se apaga en
+    finish, los dos en el thread del job (on_frame puede llegar desde un thread del
+    pipeline), así que perfila el job completo sin ventana. Si otro job ya está
+    perfilándose con cProfile, este corre sin perfil.
+    Con start_frame=0 la ventana incluye la carga de modelos y el warmup. En modo
+    sharded solo se ve el proceso principal (tracking y golpes), no los workers.
+    """
+
+    start_frame: int = Settings.PROFILING_START_FRAME
+    frames: int = Settings.PROFILING_FRAMES
+    mode: ProfilingMode = Settings.PROFILING_MODE
+    sample_interval_ms: float = Settings.PROFILING_SAMPLE_INTERVAL_MS
+    stacks: Counter = field(default_factory=Counter, init=False)
+    samples: int = field(default=0, init=False)
+    _armed: bool = field(default=False, init=False, repr=False)
+    _running: bool = field(default=False, init=False, repr=False)
+    _done: bool = field(default=False, init=False, repr=False)
+    _threads: list[threading.Thread] = field(default_factory=list, init=False, repr=False)
+    _threads_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _sampler: threading.Thread | None = field(default=None, init=False, repr=False)
+    _profile: cProfile.Profile | None = field(default=None, init=False, repr=False)
+
+    @property
+    def suffix(self) -> str:
+        return ".collapsed" if self.mode == "sampling" else ".prof"
+
+    def begin(self) -> None:
+        """Arma la ventana al empezar un video; arranca ya si start_frame es 0"""
+        self.stacks.clear()
+        self.samples = 0
+        self._done = False
+        if self.mode == "cprofile":
+            self._start_cprofile()
+            return
+
+        self._armed = True
+        # Solo se muestrean los threads de este job: los del servidor y los de otros jobs
+        # concurrentes (incluso los que arrancan después) no son parte del análisis
+        with self._threads_lock:
+            self._threads = [threading.current_thread()]
+        if self.start_frame <= 0:
+            self._start()
+
+    def register_thread(self) -> None:
+        """Suma el thread actual (una etapa del pipeline del job) a los que se muestrean"""
+        with self._threads_lock:
+            self._threads.append(threading.current_thread())
+
+    def on_frame(self, frames_done: int) -> None:
+        if not self._armed or self._done:
+            return
+        if not self._running and frames_done >= self.start_frame:
+            self._start()
+        elif self._running and frames_done >= self.start_frame + self.frames:
+            self._stop_window()
+
+    def finish(self, output_path: str | Path) -> Path | None:
+        """Cierra la ventana (si el video terminó antes) y escribe el perfil; None si la ventana nunca empezó"""
+        if self._running:
+            self._stop_window()
+        self._armed = False
+        if not self._done:
+            return None
+
+        output_path = Path(output_path)
+        if self._profile is not None:
+            self._profile.dump_stats(output_path)
+            self._profile = None
+        else:
+            output_path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+        print(f"🔬 Perfil del análisis ({self.mode}) guardado en: {output_path}")
+        return output_path
+
+    def _start_cprofile(self) -> None:
+        if not _cprofile_lock.acquire(blocking=False):
+            print("⚠️ Otro job ya se está perfilando con cProfile; este job corre sin perfil")
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12+: otra herramienta de profiling ya tiene sys.monitoring
+            _cprofile_lock.release()
+            print(f"⚠️ No se pudo activar cProfile: {e}")
+            return
+        self._profile = profile
+        self._running = True
+
+    def _start(self) -> None:
+        self._running = True
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def _stop_window(self) -> None:
+        self._running = False
+        self._done = True
+        if self._profile is not None:
+            self._profile.disable()
+            _cprofile_lock.release()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_loop(self) -> None:
+        interval = self.sample_interval_ms / 1000
+        while not self._stop.wait(interval):
+            with self._threads_lock:
+                # Un thread terminado puede ceder su ident a un thread de otro job
+                self._threads = [thread for thread in self._threads if thread.is_alive()]
+                threads = list(self._threads)
+            current_frames = sys._current_frames()
+            for thread in threads:
+                frame = current_frames.get(thread.ident) if thread.ident is not None else None
+                if frame is not None:
+                    self.stacks[_collapse(thread.name, frame)] += 1
+            self.samples += 1
+
+
+def _collapse(thread_name: str, frame: FrameType | None) -> str:
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f"{Path(code.co_filename).name}:{code.co_name}")
+        frame = frame.f_back
+    labels.append(thread_name.replace(" ", "_"))
+    return ";".join(reversed(labels))
+
+
+def default_profiler() -> FrameWindowProfiler | None:
+    return FrameWindowProfiler() if Settings.PROFILING_ENABLED else None
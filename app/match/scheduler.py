@@ -0,0 +1,133 @@
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from app.data_models import DetectionTable, HitEvent
+
+
+@dataclass
+class SchedulerStats:
+    frames_seen: int = 0
+    frames_inferred: int = 0
+    dense_frames: int = 0  # frames con contacto predicho (se infieren todos)
+
+    @property
+    def skipped_share(self) -> float:
+        if self.frames_seen == 0:
+            return 0.0
+        return 1.0 - self.frames_inferred / self.frames_seen
+
+
+@dataclass
+class MotionGatedScheduler:
+    """
+    Decide en qué frames correr la inferencia completa. Cada frame se reduce a una
+    miniatura en escala de grises y se compara con la anterior (frame differencing);
+    con las últimas detecciones de pelota se extrapola su trayectoria a velocidad
+    constante. Cerca de un contacto predicho se infiere cada frame, con movimiento
+    cada `motion_stride` frames y con la imagen quieta (entre puntos) cada `idle_stride`.
+    """
+
+    motion_width: int = 320
+    pixel_threshold: int = 12  # diferencia de intensidad para contar un píxel como "en movimiento"
+    motion_fraction: float = 0.002  # fracción de píxeles en movimiento para considerar que hay juego
+    motion_stride: int = 2
+    idle_stride: int = 8
+    contact_distance: float = 120.0  # px entre la pelota predicha y el centro de un jugador
+    lookahead_frames: int = 6
+    stats: SchedulerStats = field(default_factory=SchedulerStats, init=False)
+    _previous_thumbnail: ndarray | None = field(default=None, init=False, repr=False)
+    _last_inferred_frame: int | None = field(default=None, init=False, repr=False)
+    _ball_track: list[tuple[int, ndarray]] = field(default_factory=list, init=False, repr=False)
+    _player_centers: ndarray = field(default_factory=lambda: np.empty((0, 2)), init=False, repr=False)
+
+    def reset(self) -> None:
+        self.stats = SchedulerStats()
+        self._previous_thumbnail = None
+        self._last_inferred_frame = None
+        self._ball_track = []
+        self._player_centers = np.empty((0, 2))
+
+    def should_infer(self, frame_number: int, frame: ndarray) -> bool:
+        moving = self._has_motion(frame)
+        self.stats.frames_seen += 1
+
+        if self._contact_predicted(frame_number):
+            stride = 1
+            self.stats.dense_frames += 1
+        elif moving:
+            stride = self.motion_stride
+        else:
+            stride = self.idle_stride
+
+        if self._last_inferred_frame is not None and frame_number - self._last_inferred_frame < stride:
+            return False
+        self._last_inferred_frame = frame_number
+        self.stats.frames_inferred += 1
+        return True
+
+    def observe(self, frame_number: int, players: DetectionTable, balls: DetectionTable) -> None:
+        """Actualiza la trayectoria de la pelota y las posiciones de los jugadores con un frame inferido"""
+        if len(players) > 0:
+            self._player_centers = (players.boxes[:, :2] + players.boxes[:, 2:]).astype(np.float64) / 2
+
+        if len(balls) > 0:
+            box = balls.boxes[int(np.argmax(balls.confidence))].astype(np.float64)
+            self._ball_track = self._ball_track[-1:] + [(frame_number, (box[:2] + box[2:]) / 2)]
+        elif self._ball_track and frame_number - self._ball_track[-1][0] > 2 * self.lookahead_frames:
+            # La pelota se perdió hace demasiado como para extrapolar
+            self._ball_track = []
+
+    def _has_motion(self, frame: ndarray) -> bool:
+        height, width = frame.shape[:2]
+        scale = self.motion_width / width
+        thumbnail = cv2.resize(frame, (self.motion_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+
+        previous, self._previous_thumbnail = self._previous_thumbnail, thumbnail
+        if previous is None:
+            return True
+        moving_pixels = cv2.countNonZero(cv2.threshold(cv2.absdiff(thumbnail, previous), self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        return moving_pixels >= self.motion_fraction * thumbnail.size
+
+    def _contact_predicted(self, frame_number: int) -> bool:
+        if not self._ball_track or len(self._player_centers) == 0:
+            return False
+
+        last_frame, last_center = self._ball_track[-1]
+        velocity = np.zeros(2)
+        if len(self._ball_track) == 2:
+            first_frame, first_center = self._ball_track[0]
+            velocity = (last_center - first_center) / (last_frame - first_frame)
+
+        steps = np.arange(frame_number, frame_number + self.lookahead_frames + 1) - last_frame
+        predicted = last_center[None, :] + steps[:, None] * velocity[None, :]
+        distances = np.linalg.norm(predicted[:, None, :] - self._player_centers[None, :, :], axis=2)
+        return bool((distances <= self.contact_distance).any())
+
+
+def hit_recall(baseline: list[HitEvent], candidate: list[HitEvent], frame_tolerance: int = 3, max_center_distance: float = 50.0) -> float:
+    """
+    Fracción de los golpes de `baseline` (inferencia completa) que aparecen en `candidate`.
+    Los IDs de jugador pueden cambiar al inferir menos frames, así que se empareja 1 a 1
+    por cercanía en frames y por la posición del jugador.
+    """
+    if not baseline:
+        return 1.0
+
+    def center(box: list[float]) -> ndarray:
+        return np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2])
+
+    matched = 0
+    used: set[int] = set()
+    for hit in baseline:
+        for index, other in enumerate(candidate):
+            if index in used or abs(other.frame_number - hit.frame_number) > frame_tolerance:
+                continue
+            if np.linalg.norm(center(other.player_box) - center(hit.player_box)) <= max_center_distance:
+                used.add(index)
+                matched += 1
+                break
+    return matched / len(baseline)
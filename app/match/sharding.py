@@ -0,0 +1,121 @@
+import os
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from app.data_models import DetectionTable
+from app.metrics import StageTimings, metrics
+from app.settings import Settings
+from app.video import open_video_reader
+from app.video.reader import DecoderBackend
+from app.yolo.abstract import AbstractYoloDetector
+
+
+@dataclass
+class ShardResult:
+    """Detecciones crudas (sin tracking) de un rango de frames [start, stop)"""
+
+    start: int
+    stop: int
+    players: DetectionTable
+    balls: DetectionTable
+    timings: StageTimings
+
+
+def shard_ranges(total_frames: int, shards: int) -> list[tuple[int, int | None]]:
+    """Parte el video en rangos contiguos; el último llega hasta el final real del archivo"""
+    shards = max(1, min(shards, total_frames))
+    bounds = np.linspace(0, total_frames, shards + 1).astype(int)
+    ranges: list[tuple[int, int | None]] = [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def init_shard_worker(torch_threads: int, metrics_enabled: bool = False) -> None:
+    # Cada worker usa su parte de los cores para no sobresuscribir la CPU
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    metrics.enabled = metrics_enabled
+
+
+def detect_shard(
+    video_path: str,
+    start: int,
+    stop: int | None,
+    player_detector: AbstractYoloDetector,
+    ball_detector: AbstractYoloDetector,
+    batch_size: int,
+    decoder: DecoderBackend = Settings.VIDEO_DECODER,
+    decode_max_size: int = Settings.DECODE_MAX_SIZE
+) -> ShardResult:
+    """
+    Corre en un proceso del pool: decodifica el rango y ejecuta ambos modelos
+    (cada proceso carga su propia instancia vía model_registry). No aplica tracking:
+    eso depende del frame anterior y se hace al unir los shards en orden.
+    """
+    cap = open_video_reader(video_path, decoder, decode_max_size)
+    if not cap.isOpened():
+        raise ValueError(f"No se pudo abrir el video: {video_path}")
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    timings = StageTimings()
+    player_tables: list[DetectionTable] = []
+    ball_tables: list[DetectionTable] = []
+    frame_number = start
+
+    def flush(frames: list[np.ndarray], first_frame: int) -> None:
+        players, balls = detect_raw(frames, first_frame, player_detector, ball_detector, timings)
+        player_tables.append(players)
+        ball_tables.append(balls)
+
+    # Cada batch se decodifica sobre los buffers del anterior, que ya pasó por los modelos
+    frames: list[np.ndarray] = []
+    buffers: list[np.ndarray] = []
+    while stop is None or frame_number < stop:
+        with metrics.stage("decode", timings):
+            ret, frame = cap.read(buffers[len(frames)] if len(frames) < len(buffers) else None)
+        if not ret or frame is None:
+            break
+        frames.append(frame)
+        frame_number += 1
+        if len(frames) == batch_size:
+            flush(frames, frame_number - len(frames))
+            buffers, frames = frames, []
+    if frames:
+        flush(frames, frame_number - len(frames))
+    cap.release()
+
+    players = DetectionTable.concatenate(player_tables)
+    balls = DetectionTable.concatenate(ball_tables)
+    players.frame_start = balls.frame_start = start
+    players.frame_stop = balls.frame_stop = frame_number
+    return ShardResult(start=start, stop=frame_number, players=players, balls=balls, timings=timings)
+
+
+def detect_raw(
+    frames: list[np.ndarray],
+    start: int,
+    player_detector: AbstractYoloDetector,
+    ball_detector: AbstractYoloDetector,
+    timings: StageTimings
+) -> tuple[DetectionTable, DetectionTable]:
+    """Detecciones de ambos modelos para los frames start, start + 1, ..., sin tracking (track_id = -1)"""
+    player_detector.timings = ball_detector.timings = timings
+    tables: dict[str, list[DetectionTable]] = {}
+    for detector in (player_detector, ball_detector):
+        tables[detector.class_name] = [
+            DetectionTable.from_frame(start + offset, detector.class_name, boxes, confidences, np.full(len(boxes), -1))
+            for offset, (boxes, confidences) in enumerate(detector._detect_frames(frames))
+        ]
+    players = DetectionTable.concatenate(tables[player_detector.class_name])
+    balls = DetectionTable.concatenate(tables[ball_detector.class_name])
+    players.frame_start = balls.frame_start = start
+    players.frame_stop = balls.frame_stop = start + len(frames)
+    return players, balls
+
+
+def default_shard_workers() -> int:
+    return os.cpu_count() or 1
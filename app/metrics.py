@@ -0,0 +1,177 @@
+import contextlib
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, Protocol
+
+from app.settings import Settings
+
+STAGES = (
+    "decode", "preprocess", "player_inference", "ball_inference", "tracking",
+    "hits", "annotate", "encode", "ffmpeg"
+)
+
+_DISABLED = contextlib.nullcontext()
+
+
+@dataclass
+class StageTimings:
+    """Tiempo y cantidad de llamadas por etapa de un job (las etapas del pipeline corren en threads distintos)"""
+
+    seconds: dict[str, float] = field(default_factory=dict)
+    calls: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, stage: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def merge(self, other: "StageTimings") -> None:
+        for stage, seconds in other.seconds.items():
+            self.add(stage, seconds, other.calls[stage])
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {
+            stage: {
+                "seconds": self.seconds[stage],
+                "calls": self.calls[stage],
+                "ms_per_call": self.seconds[stage] / self.calls[stage] * 1000
+            }
+            for stage in sorted(self.seconds, key=lambda stage: STAGES.index(stage) if stage in STAGES else len(STAGES))
+        }
+
+    def __getstate__(self) -> dict:
+        # Viaja entre procesos (shards): el lock no es serializable
+        return {"seconds": self.seconds, "calls": self.calls}
+
+    def __setstate__(self, state: dict) -> None:
+        self.seconds = state["seconds"]
+        self.calls = state["calls"]
+        self._lock = threading.Lock()
+
+
+class QueueDepthSource(Protocol):
+    def queue_depths(self) -> dict[str, int]: ...
+
+
+class _StageTimer:
+    __slots__ = ("registry", "stage", "timings", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str, timings: StageTimings | None):
+        self.registry = registry
+        self.stage = stage
+        self.timings = timings
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.registry.observe_stage(self.stage, elapsed)
+        if self.timings is not None:
+            self.timings.add(self.stage, elapsed)
+
+
+@dataclass
+class MetricsRegistry:
+    """
+    Métricas del proceso en formato Prometheus: tiempo por etapa del análisis,
+    contadores (cache de modelos y de detecciones, jobs, frames) y gauges que se
+    leen al exportar (jobs activos, profundidad de colas). Con `enabled=False`
+    stage() devuelve un context manager nulo compartido y los contadores retornan
+    de inmediato, así que la instrumentación no mide nada ni toma locks.
+    """
+
+    enabled: bool = Settings.METRICS_ENABLED
+    _stage_seconds: dict[str, float] = field(default_factory=dict, init=False)
+    _stage_calls: dict[str, int] = field(default_factory=dict, init=False)
+    _counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = field(default_factory=dict, init=False)
+    _gauges: dict[str, tuple[str, Callable[[], float]]] = field(default_factory=dict, init=False)
+    _queue_sources: weakref.WeakSet = field(default_factory=weakref.WeakSet, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def stage(self, name: str, timings: StageTimings | None = None) -> contextlib.AbstractContextManager:
+        """Mide el bloque como etapa `name`, en el total del proceso y en `timings` (el job)"""
+        if not self.enabled:
+            return _DISABLED
+        return _StageTimer(self, name, timings)
+
+    def observe_stage(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self._stage_seconds[name] = self._stage_seconds.get(name, 0.0) + seconds
+            self._stage_calls[name] = self._stage_calls.get(name, 0) + calls
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        self._gauges[name] = (help_text, read)
+
+    def track_queues(self, source: QueueDepthSource) -> None:
+        """Registra un pipeline en curso; se deja de exportar cuando el objeto se libera"""
+        if self.enabled:
+            self._queue_sources.add(source)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stage_seconds.clear()
+            self._stage_calls.clear()
+            self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP padel_metrics_enabled 1 si la instrumentación está activa (Settings.METRICS_ENABLED)",
+            "# TYPE padel_metrics_enabled gauge",
+            f"padel_metrics_enabled {int(self.enabled)}"
+        ]
+
+        with self._lock:
+            stage_seconds = dict(self._stage_seconds)
+            stage_calls = dict(self._stage_calls)
+            counters = dict(self._counters)
+
+        lines += [
+            "# HELP padel_stage_seconds_total Tiempo acumulado por etapa del análisis",
+            "# TYPE padel_stage_seconds_total counter"
+        ]
+        lines += [f'padel_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}' for stage, seconds in sorted(stage_seconds.items())]
+        lines += [
+            "# HELP padel_stage_calls_total Llamadas medidas por etapa del análisis",
+            "# TYPE padel_stage_calls_total counter"
+        ]
+        lines += [f'padel_stage_calls_total{{stage="{stage}"}} {calls}' for stage, calls in sorted(stage_calls.items())]
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name, (help_text, read) in sorted(self._gauges.items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {read():g}"]
+
+        depths: dict[str, int] = {}
+        for source in list(self._queue_sources):
+            for queue_name, depth in source.queue_depths().items():
+                depths[queue_name] = depths.get(queue_name, 0) + depth
+        lines += [
+            "# HELP padel_pipeline_queue_depth Items esperando en la cola de entrada de cada etapa del pipeline",
+            "# TYPE padel_pipeline_queue_depth gauge"
+        ]
+        lines += [f'padel_pipeline_queue_depth{{stage="{stage}"}} {depth}' for stage, depth in sorted(depths.items())]
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,5 +9,46 @@ class Settings(BaseSettings):
 
     BALL_MODEL_PATH: str = "models/last.pt"
     PLAYER_MODEL_PATH: str = "models/player_yolo11.pt"
+    MODEL_DEVICE: str = "cpu"
+    MODEL_PRECISION: Literal["fp32", "fp16", "int8_dynamic", "int8_static"] = "fp32"
+    PLAYER_MODEL_PRECISION: Literal["", "fp32", "fp16", "int8_dynamic", "int8_static"] = ""  # "" = MODEL_PRECISION
+    BALL_MODEL_PRECISION: Literal["", "fp32", "fp16", "int8_dynamic", "int8_static"] = ""  # "" = MODEL_PRECISION
+    INFERENCE_BACKEND: Literal["torch", "onnxruntime", "openvino"] = "torch"
+    INFERENCE_THREADS: int = 0  # hilos de ONNX Runtime / OpenVINO; 0 = por defecto del runtime
+    MODEL_EXPORT_DIR: str = "models/.exports"
+    QUANTIZATION_CALIBRATION_DIR: str = "videos/calibration"  # videos de donde salen los frames para calibrar int8_static (no los subidos)
+    QUANTIZATION_CALIBRATION_FRAMES: int = 64
+    VIDEO_DECODER: Literal["auto", "pyav", "ffmpeg", "opencv"] = "opencv"  # auto = PyAV, pipe de ffmpeg u OpenCV, el primero disponible
+    DECODER_THREADS: int = 0  # 0 = automático
+    DECODER_HWACCEL: bool = False
+    DECODE_MAX_SIZE: int = 0  # lado mayor de los frames decodificados; 0 = original (los umbrales en píxeles se miden a esta escala)
+    WARMUP_MODELS_ON_STARTUP: bool = True
+    PLAYER_TRACKER_MATCHING: Literal["greedy", "hungarian"] = "greedy"
+    COURT_ROI: str = ""  # "" = frame completo, "auto" o "x1,y1,x2,y2"
+    INFERENCE_SIZE: int = 0  # lado mayor del frame que recibe el modelo; 0 = por defecto del modelo
+    BALL_TRACKING_ENABLED: bool = False
+    BALL_ROI_SIZE: int = 320  # lado del recorte alrededor de la pelota predicha; 0 = siempre el frame completo
+    INFERENCE_BATCH_SIZE: int = 0  # 0 = automático según memoria disponible
+    PROCESSOR_EXECUTION_MODE: Literal["serial", "pipelined", "sharded", "shared_memory"] = "serial"
+    PROCESSOR_SHARD_WORKERS: int = 0  # 0 = un proceso por core (también para shared_memory)
+    FRAME_RING_SLOTS: int = 0  # frames en memoria compartida en modo shared_memory; 0 = 2 batches por worker + 1
+    MAX_CONCURRENT_JOBS: int = 1
+    JOB_RETENTION_SECONDS: int = 3600  # los jobs terminados (completed/failed) se olvidan pasado este tiempo
+    MAX_FINISHED_JOBS: int = 1000  # además, solo se guardan los N jobs terminados más recientes
+    DEFERRED_RENDERING: bool = False  # el job solo analiza y el video anotado se genera al pedirlo en /match/download-processed-video (requiere el cache de detecciones); el frontend carga el video directo de /videos
+    RENDER_RETENTION_SECONDS: int = 7 * 24 * 3600  # videos anotados pendientes que nadie descargó se descartan
+    MAX_PENDING_RENDERS: int = 1000
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    MAX_UPLOAD_SIZE_BYTES: int = 8 * 1024**3
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600  # uploads reanudables sin actividad se descartan junto con su .part
+    METRICS_ENABLED: bool = False  # tiempos por etapa y contadores en /status/metrics y en el resultado de cada job
+    PROFILING_ENABLED: bool = False  # perfila todos los jobs; por job con ?profile=true en la API
+    PROFILING_MODE: Literal["sampling", "cprofile"] = "sampling"
+    PROFILING_START_FRAME: int = 0  # 0 = incluye la carga de modelos (la ventana es solo del modo sampling)
+    PROFILING_FRAMES: int = 300
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    DETECTION_CACHE_ENABLED: bool = True
+    DETECTION_CACHE_DIR: str = "videos/.detection_cache"
+    DETECTION_CACHE_MAX_BYTES: int = 2 * 1024**3
 
 Settings = Settings()  # type: ignore
@@ -0,0 +1,8 @@
+from .overlay import OverlayRenderer
+from .reader import FfmpegPipeReader, OpenCVReader, PyAVReader, VideoReader, open_video_reader
+from .writer import FfmpegPipeWriter, open_video_writer
+
+__all__ = [
+    "FfmpegPipeReader", "FfmpegPipeWriter", "OpenCVReader", "OverlayRenderer", "PyAVReader", "VideoReader",
+    "open_video_reader", "open_video_writer"
+]
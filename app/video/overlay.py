@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from app.data_models import DetectionTable, HitEvent
+
+Color = tuple[int, int, int]
+
+WHITE: Color = (255, 255, 255)
+YELLOW: Color = (0, 255, 255)
+BALL_COLOR: Color = (0, 0, 255)  # BGR - Rojo
+
+
+def alternating_player_color(player_id: int) -> Color:
+    return (0, 255, 0) if player_id % 2 == 0 else (255, 0, 0)  # Verde o Azul
+
+
+@dataclass
+class OverlayRenderer:
+    """
+    Dibuja cajas, etiquetas, golpes e información del frame sobre los frames del video.
+    Cada etiqueta ("Player N (0.87)", "Ball (0.65)") es un rectángulo opaco con el
+    texto adentro, así que se renderiza una sola vez por texto y color (getTextSize
+    incluido) y después se copia como un bloque: el resultado es idéntico píxel a
+    píxel a dibujarla con cv2.rectangle + cv2.putText. Las confianzas se muestran con
+    dos decimales, así que hay a lo sumo 100 etiquetas por jugador y color; el cache
+    se vacía al llegar a max_labels. Los textos sobre el video (golpes, número de
+    frame) se siguen dibujando con putText. render() dibuja sobre el mismo buffer
+    salvo copy=True (si el frame original se vuelve a usar después).
+    """
+
+    font: int = cv2.FONT_HERSHEY_SIMPLEX
+    label_scale: float = 0.6
+    label_thickness: int = 2
+    max_labels: int = 4096
+    _labels: dict[tuple[str, Color], ndarray] = field(default_factory=dict, init=False, repr=False)
+
+    def render(
+        self,
+        frame: ndarray,
+        players: DetectionTable,
+        balls: DetectionTable,
+        hits: Iterable[HitEvent],
+        frame_info: str,
+        player_color: Callable[[int], Color] = alternating_player_color,
+        copy: bool = False
+    ) -> ndarray:
+        annotated_frame = frame.copy() if copy else frame
+        self.draw_players(annotated_frame, players, player_color)
+        self.draw_balls(annotated_frame, balls)
+        self.draw_hits(annotated_frame, hits)
+        cv2.putText(annotated_frame, frame_info, (10, annotated_frame.shape[0] - 20), self.font, 0.7, WHITE, 2)
+        return annotated_frame
+
+    def draw_players(
+        self, frame: ndarray, players: DetectionTable, player_color: Callable[[int], Color] = alternating_player_color
+    ) -> None:
+        for box, player_id, confidence in zip(players.boxes.tolist(), players.track_id.tolist(), players.confidence.tolist()):
+            self.draw_labeled_box(frame, box, f"Player {player_id} ({confidence:.2f})", player_color(player_id))
+
+    def draw_balls(self, frame: ndarray, balls: DetectionTable, color: Color = BALL_COLOR) -> None:
+        for box, confidence in zip(balls.boxes.tolist(), balls.confidence.tolist()):
+            self.draw_labeled_box(frame, box, f"Ball ({confidence:.2f})", color)
+
+    def draw_hits(self, frame: ndarray, hits: Iterable[HitEvent]) -> None:
+        for hit in hits:
+            # Línea amarilla entre el centro del jugador y el de la pelota
+            player_center = (int((hit.player_box[0] + hit.player_box[2]) / 2), int((hit.player_box[1] + hit.player_box[3]) / 2))
+            ball_center = (int((hit.ball_box[0] + hit.ball_box[2]) / 2), int((hit.ball_box[1] + hit.ball_box[3]) / 2))
+            cv2.line(frame, player_center, ball_center, YELLOW, 3)
+            cv2.putText(frame, f"HIT! Player {hit.player_id}", (10, 30), self.font, 1, YELLOW, 3)
+
+    def draw_labeled_box(self, frame: ndarray, box: list[float], label: str, color: Color) -> None:
+        x1, y1, x2, y2 = map(int, box)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        self._blit(frame, self._label(label, color), x1, y1)
+
+    def _label(self, label: str, color: Color) -> ndarray:
+        key = (label, color)
+        pixels = self._labels.get(key)
+        if pixels is None:
+            # Fondo lleno del tamaño del texto sobre la caja (de y1 - alto - 10 a y1), texto blanco encima
+            width, height = cv2.getTextSize(label, self.font, self.label_scale, self.label_thickness)[0]
+            pixels = np.empty((height + 11, width + 1, 3), dtype=np.uint8)
+            pixels[:] = color
+            cv2.putText(pixels, label, (0, height + 5), self.font, self.label_scale, WHITE, self.label_thickness)
+            if len(self._labels) >= self.max_labels:
+                self._labels.clear()
+            self._labels[key] = pixels
+        return pixels
+
+    @staticmethod
+    def _blit(frame: ndarray, pixels: ndarray, x1: int, y1: int) -> None:
+        """Copia la etiqueta con su borde inferior izquierdo en (x1, y1), recortada a los bordes del frame"""
+        height, width = pixels.shape[:2]
+        top = y1 - height + 1
+        frame_top, frame_left = max(top, 0), max(x1, 0)
+        frame_bottom, frame_right = min(top + height, frame.shape[0]), min(x1 + width, frame.shape[1])
+        if frame_top >= frame_bottom or frame_left >= frame_right:
+            return
+        frame[frame_top:frame_bottom, frame_left:frame_right] = pixels[
+            frame_top - top:frame_bottom - top, frame_left - x1:frame_right - x1
+        ]
@@ -0,0 +1,328 @@
+import io
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import TYPE_CHECKING, Iterator, Literal, cast
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from app.settings import Settings
+
+if TYPE_CHECKING:
+    from av.container import InputContainer
+    from av.video.frame import VideoFrame
+    from av.video.stream import VideoStream
+
+DecoderBackend = Literal["auto", "pyav", "ffmpeg", "opencv"]
+
+
+def scaled_size(width: int, height: int, max_size: int) -> tuple[int, int]:
+    """Tamaño de salida con el lado mayor <= max_size; par, como lo pide yuv420p"""
+    if max_size <= 0 or max(width, height) <= max_size:
+        return width, height
+    scale = max_size / max(width, height)
+    return max(2, round(width * scale / 2) * 2), max(2, round(height * scale / 2) * 2)
+
+
+@dataclass
+class VideoReader(ABC):
+    """
+    Base de los decoders. Expone la parte de la interfaz de cv2.VideoCapture que usa
+    el análisis (read, grab, get, set de la posición, isOpened, release), así que se
+    usan igual que un VideoCapture. La cantidad de frames y los FPS salen siempre del
+    mismo probe de OpenCV para que todos los backends reporten lo mismo.
+    read(image) escribe en `image` si tiene el tamaño de salida: reutilizar el buffer
+    evita reservar un ndarray nuevo por frame.
+    """
+
+    video_path: str
+    max_size: int = 0  # lado mayor de los frames decodificados; 0 = resolución original
+    threads: int = 0  # threads de decodificación; 0 = automático
+    hwaccel: bool = False
+    frame_count: int = field(default=0, init=False)
+    fps: float = field(default=0.0, init=False)
+    width: int = field(default=0, init=False)
+    height: int = field(default=0, init=False)
+    source_size: tuple[int, int] = field(default=(0, 0), init=False)
+    position: int = field(default=0, init=False)
+    _opened: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        probe = cv2.VideoCapture(self.video_path)
+        if probe.isOpened():
+            self.frame_count = int(probe.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.fps = probe.get(cv2.CAP_PROP_FPS)
+            self.source_size = int(probe.get(cv2.CAP_PROP_FRAME_WIDTH)), int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.width, self.height = scaled_size(*self.source_size, self.max_size)
+            self._opened = self._open(0)
+        probe.release()
+
+    @property
+    def resized(self) -> bool:
+        return (self.width, self.height) != self.source_size
+
+    def _buffer(self, image: ndarray | None) -> ndarray:
+        if image is not None and image.shape == (self.height, self.width, 3) and image.dtype == np.uint8:
+            return image
+        return np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self, image: ndarray | None = None) -> tuple[bool, ndarray | None]:
+        if not self._opened:
+            return False, None
+        frame = self._read(image)
+        if frame is None:
+            self.release()
+            return False, None
+        self.position += 1
+        return True, frame
+
+    def grab(self) -> bool:
+        """Avanza un frame sin convertirlo a BGR"""
+        if not self._opened or not self._skip():
+            self.release()
+            return False
+        self.position += 1
+        return True
+
+    def get(self, prop: int) -> float:
+        return {
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_POS_FRAMES: self.position
+        }.get(prop, 0.0)
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self.release()
+        self.position = int(value)
+        self._opened = self._open(self.position)
+        return self._opened
+
+    def release(self) -> None:
+        self._opened = False
+
+    @abstractmethod
+    def _open(self, start: int) -> bool:
+        pass
+
+    @abstractmethod
+    def _read(self, image: ndarray | None) -> ndarray | None:
+        pass
+
+    def _skip(self) -> bool:
+        return self._read(None) is not None
+
+
+@dataclass
+class PyAVReader(VideoReader):
+    """libavcodec vía PyAV: decodificación multithread (frame y slice) y escalado en swscale"""
+
+    _container: "InputContainer | None" = field(default=None, init=False, repr=False)
+    _frames: "Iterator[VideoFrame] | None" = field(default=None, init=False, repr=False)
+    _pending: "VideoFrame | None" = field(default=None, init=False, repr=False)
+
+    def _open(self, start: int) -> bool:
+        import av
+
+        container = None
+        if self.hwaccel:
+            from av.codec.hwaccel import HWAccel, hwdevices_available
+
+            for device_type in hwdevices_available():
+                try:
+                    container = av.open(self.video_path, hwaccel=HWAccel(device_type))
+                    break
+                except av.FFmpegError:
+                    continue
+        if container is None:
+            container = av.open(self.video_path)
+
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        stream.codec_context.thread_count = self.threads
+        self._container = container
+        self._frames = container.decode(stream)
+        self._pending = None
+        if start > 0:
+            self._seek(container, stream, start)
+        return True
+
+    def _seek(self, container: "InputContainer", stream: "VideoStream", start: int) -> None:
+        """Salta al keyframe anterior y descarta hasta `start`: la posición queda exacta al frame"""
+        time_base = stream.time_base
+        if time_base is None:
+            raise ValueError(f"El stream de video de {self.video_path} no tiene time_base: no se puede hacer seek")
+        offset = stream.start_time or 0
+        container.seek(offset + int(Fraction(start) / Fraction(self.fps) / time_base), stream=stream, backward=True)
+        self._frames = container.decode(stream)
+        for frame in self._frames:
+            if frame.pts is not None and round(float((frame.pts - offset) * time_base) * self.fps) >= start:
+                self._pending = frame
+                return
+
+    def _next_frame(self) -> "VideoFrame | None":
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            return frame
+        return next(self._frames, None) if self._frames is not None else None
+
+    def _read(self, image: ndarray | None) -> ndarray | None:
+        frame = self._next_frame()
+        if frame is None:
+            return None
+        converted = frame.reformat(width=self.width, height=self.height, format="bgr24", interpolation="AREA")
+        plane = converted.planes[0]
+        # Vista sobre la memoria del frame (las filas pueden traer padding), copiada al buffer de salida
+        view = np.frombuffer(memoryview(plane), np.uint8).reshape(self.height, plane.line_size)[:, :self.width * 3]
+        buffer = self._buffer(image)
+        np.copyto(buffer, view.reshape(self.height, self.width, 3))
+        return buffer
+
+    def _skip(self) -> bool:
+        return self._next_frame() is not None
+
+    def release(self) -> None:
+        super().release()
+        if self._container is not None:
+            self._container.close()
+            self._container = self._frames = self._pending = None
+
+
+@dataclass
+class FfmpegPipeReader(VideoReader):
+    """
+    Proceso ffmpeg que decodifica (con -threads y opcionalmente -hwaccel auto),
+    escala y entrega bgr24 crudo por un pipe; read() lee directo al buffer del frame.
+    """
+
+    ffmpeg_path: str = "ffmpeg"
+    _process: subprocess.Popen | None = field(default=None, init=False, repr=False)
+    _stdout: io.BufferedReader | None = field(default=None, init=False, repr=False)
+
+    def _open(self, start: int) -> bool:
+        command = [self.ffmpeg_path, "-loglevel", "error", "-nostdin"]
+        if self.hwaccel:
+            command += ["-hwaccel", "auto"]
+        command += ["-threads", str(self.threads)]
+        if start > 0:
+            # Seek de entrada: ffmpeg decodifica desde el keyframe anterior y descarta hasta el timestamp
+            command += ["-ss", f"{start / self.fps:.6f}"]
+        command += ["-i", self.video_path, "-map", "0:v:0", "-vsync", "0"]
+        if self.resized:
+            command += ["-vf", f"scale={self.width}:{self.height}:flags=area"]
+        command += ["-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+
+        self._process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=self.width * self.height * 3
+        )
+        # Con bufsize > 0 el stdout del proceso es un BufferedReader, que tiene readinto
+        self._stdout = cast(io.BufferedReader, self._process.stdout)
+        return True
+
+    def _read(self, image: ndarray | None) -> ndarray | None:
+        if self._stdout is None:
+            return None
+        buffer = self._buffer(image)
+        view = buffer.data.cast("B")
+        received = 0
+        while received < len(view):
+            count = self._stdout.readinto(view[received:])
+            if not count:
+                return None
+            received += count
+        return buffer
+
+    def release(self) -> None:
+        super().release()
+        if self._process is not None:
+            process, self._process = self._process, None
+            if self._stdout is not None:
+                self._stdout.close()
+                self._stdout = None
+            process.kill()
+            process.wait()
+
+
+@dataclass
+class OpenCVReader(VideoReader):
+    """cv2.VideoCapture con threads y aceleración por hardware pedidos al backend FFmpeg de OpenCV"""
+
+    _capture: cv2.VideoCapture | None = field(default=None, init=False, repr=False)
+    _decoded: ndarray | None = field(default=None, init=False, repr=False)
+
+    def _open(self, start: int) -> bool:
+        params = []
+        if self.threads > 0:
+            params += [cv2.CAP_PROP_N_THREADS, self.threads]
+        if self.hwaccel:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        self._capture = cv2.VideoCapture(self.video_path, cv2.CAP_ANY, params)
+        if start > 0:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        return self._capture.isOpened()
+
+    def _read(self, image: ndarray | None) -> ndarray | None:
+        if self._capture is None:
+            return None
+        if not self.resized:
+            ret, frame = self._capture.read(self._buffer(image))
+            return frame if ret else None
+
+        # OpenCV no decodifica a menor resolución: se escala al buffer de salida
+        ret, self._decoded = self._capture.read(self._decoded)
+        if not ret:
+            return None
+        return cv2.resize(self._decoded, (self.width, self.height), dst=self._buffer(image), interpolation=cv2.INTER_AREA)
+
+    def _skip(self) -> bool:
+        return self._capture is not None and self._capture.grab()
+
+    def release(self) -> None:
+        super().release()
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+def open_video_reader(
+    video_path: str,
+    backend: DecoderBackend = Settings.VIDEO_DECODER,
+    max_size: int = Settings.DECODE_MAX_SIZE,
+    threads: int = Settings.DECODER_THREADS,
+    hwaccel: bool = Settings.DECODER_HWACCEL
+) -> VideoReader:
+    """
+    Abre el decoder del video. "auto" prueba PyAV, después un pipe de ffmpeg si hay
+    ffmpeg en el PATH y por último OpenCV; un backend pedido que no está disponible
+    también cae a OpenCV.
+    """
+    if backend in ("auto", "pyav"):
+        try:
+            import av  # noqa: F401
+
+            return PyAVReader(video_path, max_size, threads, hwaccel)
+        except ImportError:
+            if backend == "pyav":
+                print("⚠️ PyAV no está instalado, se decodificará con OpenCV.")
+        except Exception as e:
+            print(f"⚠️ PyAV no pudo abrir {video_path} ({e}), se decodificará con OpenCV.")
+            backend = "opencv"
+
+    if backend in ("auto", "ffmpeg"):
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return FfmpegPipeReader(video_path, max_size, threads, hwaccel, ffmpeg_path=ffmpeg_path)
+        if backend == "ffmpeg":
+            print("⚠️ ffmpeg no encontrado en PATH, se decodificará con OpenCV.")
+
+    return OpenCVReader(video_path, max_size, threads, hwaccel)
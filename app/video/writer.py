@@ -0,0 +1,124 @@
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from app.metrics import StageTimings, metrics
+
+
+@dataclass
+class FfmpegPipeWriter:
+    """
+    Envía los frames anotados directamente a un único proceso ffmpeg (libx264)
+    por un pipe y agrega la pista de audio silenciosa en la misma pasada, sin
+    archivos intermedios. Expone la misma interfaz que cv2.VideoWriter.
+    """
+
+    output_path: str
+    fps: float
+    width: int
+    height: int
+    ffmpeg_path: str
+    add_silent_audio: bool = True
+    preset: str = "fast"
+    timings: StageTimings | None = None
+    _process: subprocess.Popen | None = field(default=None, init=False, repr=False)
+    _stderr: tempfile.SpooledTemporaryFile = field(init=False, repr=False)
+
+    def __post_init__(self):
+        command = [
+            self.ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{self.width}x{self.height}", "-r", f"{self.fps}",
+            "-i", "-",
+        ]
+        if self.add_silent_audio:
+            command += ["-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100"]
+        command += [
+            "-map", "0:v",
+            "-c:v", "libx264",
+            "-preset", self.preset,
+            "-pix_fmt", "yuv420p",    # formato compatible HTML5
+            "-movflags", "+faststart",
+        ]
+        if self.add_silent_audio:
+            command += ["-map", "1:a", "-c:a", "aac", "-shortest"]
+        command.append(self.output_path)
+
+        self._stderr = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def isOpened(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def write(self, frame: ndarray) -> None:
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            raise ValueError(f"Frame de {frame.shape[1]}x{frame.shape[0]}, se esperaba {self.width}x{self.height}")
+        if self._process is None or self._process.stdin is None:
+            raise RuntimeError("El writer de ffmpeg ya está cerrado")
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.release()
+
+    def release(self) -> None:
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            if process.stdin is not None:
+                process.stdin.close()
+        except BrokenPipeError:
+            pass
+        # Lo que ffmpeg tarda en terminar de codificar y cerrar el archivo después del último frame
+        with metrics.stage("ffmpeg", self.timings):
+            returncode = process.wait()
+        if returncode != 0:
+            self._stderr.seek(0)
+            error = self._stderr.read().decode(errors="replace")
+            raise RuntimeError(f"ffmpeg falló con código {returncode}: {error}")
+
+
+def open_video_writer(
+    output_path: str, fps: float, width: int, height: int, timings: StageTimings | None = None
+) -> tuple[FfmpegPipeWriter | cv2.VideoWriter, str]:
+    """
+    Abre el writer del video procesado. Si hay ffmpeg en el PATH se codifica una
+    sola vez a H.264 + AAC; si no, se prueban los codecs de OpenCV en orden de compatibilidad.
+    """
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path:
+        print(f"✅ Codificando a H.264 con ffmpeg: {ffmpeg_path}")
+        return FfmpegPipeWriter(output_path, fps, width, height, ffmpeg_path, timings=timings), output_path
+
+    print("⚠️ ffmpeg no encontrado en PATH, se usará un codec de OpenCV (sin H.264 ni audio).")
+
+    codecs_to_try = [
+        ('mp4v', '.mp4'),      # MP4 nativo de OpenCV
+        ('XVID', '.avi'),      # AVI como fallback
+        ('MJPG', '.avi')       # Motion JPEG como último recurso
+    ]
+
+    for codec, extension in codecs_to_try:
+        out = None
+        try:
+            fourcc = cv2.VideoWriter.fourcc(*codec)
+            test_path = output_path.replace('.mp4', extension)
+            out = cv2.VideoWriter(test_path, fourcc, fps, (width, height))
+
+            if out.isOpened():
+                print(f"✅ Codec {codec} inicializado correctamente")
+                return out, test_path
+
+            print(f"⚠️ Codec {codec} falló, probando siguiente...")
+            out.release()
+        except Exception as e:
+            print(f"⚠️ Error con codec {codec}: {e}")
+            if out:
+                out.release()
+
+    raise ValueError("No se pudo inicializar ningún codec de video")
@@ -1,5 +1,10 @@
 from .abstract import AbstractYoloDetector
 from .ball_detector import BallYoloDetector
 from .player_detector import PlayerYoloDetector
+from .backends import ExportedYoloModel, export_onnx
+from .registry import LoadedModel, ModelRegistry, model_registry
+from .tracker import IoUTracker
+from .ball_tracker import BallKalmanTracker
+from .preprocess import FramePreprocessor, FrameTransform, detect_court_roi
 
-__all__ = ["AbstractYoloDetector", "BallYoloDetector", "PlayerYoloDetector"]
\ No newline at end of file
+__all__ = ["AbstractYoloDetector", "BallYoloDetector", "PlayerYoloDetector", "ExportedYoloModel", "export_onnx", "LoadedModel", "ModelRegistry", "model_registry", "IoUTracker", "BallKalmanTracker", "FramePreprocessor", "FrameTransform", "detect_court_roi"]
@@ -1,15 +1,27 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from numpy import ndarray
+from typing import Literal, Sequence
 import cv2
 from tqdm import tqdm
-from app.data_models import DetectionResultFrame, DetectionResultVideo
+from app.data_models import DetectionResultFrame, DetectionTable
+from app.metrics import StageTimings, metrics
+from app.settings import Settings
+from .preprocess import FramePreprocessor
+from .registry import LoadedModel, model_registry
 
 
 @dataclass
 class AbstractYoloDetector(ABC):
     model_path: str
     model_threshold: float
+    device: str = Settings.MODEL_DEVICE
+    precision: str = Settings.MODEL_PRECISION
+    backend: str = Settings.INFERENCE_BACKEND
+    preprocessor: FramePreprocessor = field(default_factory=FramePreprocessor.from_settings)
+    inference_calls: int = field(default=0, init=False)
+    timings: StageTimings | None = field(default=None, init=False, repr=False)  # tiempos del job en curso, los asigna el processor
+    _loaded: LoadedModel | None = field(default=None, init=False, repr=False)
 
     @property
     @abstractmethod
@@ -18,17 +30,100 @@ class AbstractYoloDetector(ABC):
 
     @property
     @abstractmethod
-    def class_name(self) -> str:
+    def class_name(self) -> Literal["ball", "player"]:
         pass
+
+    def warmup(self) -> LoadedModel:
+        return model_registry.warmup(self.model_path, self.device, self.precision, self.backend)
+
+    def signature(self) -> dict:
+        """Parámetros que determinan las detecciones crudas (parte de la clave del cache de detecciones)"""
+        return {
+            "model_path": self.model_path,
+            "model_threshold": self.model_threshold,
+            "device": self.device,
+            "precision": self.precision,
+            "backend": self.backend,
+            "court_roi": self.preprocessor.court_roi,
+            "inference_size": self.preprocessor.inference_size
+        }
+
+    def _loaded_model(self) -> LoadedModel:
+        """Modelo del registry, buscado una sola vez por detector (y otra vez si cambia su configuración)"""
+        loaded = self._loaded
+        if loaded is None or (loaded.model_path, loaded.device, loaded.precision, loaded.backend) != (
+            self.model_path, self.device, self.precision, self.backend
+        ):
+            loaded = self._loaded = model_registry.get(self.model_path, self.device, self.precision, self.backend)
+        return loaded
+
+    def __getstate__(self) -> dict:
+        # Las copias para los workers (deepcopy / pickle) resuelven el modelo en su propio proceso
+        state = self.__dict__.copy()
+        state.pop("_loaded", None)
+        return state
+
+    def _predict(self, source: ndarray | list[ndarray], **overrides):
+        # Una lista de frames se infiere en una sola llamada al modelo
+        self.inference_calls += len(source) if isinstance(source, list) else 1
+        model = self._loaded_model()
+        with metrics.stage(f"{self.class_name}_inference", self.timings):
+            return model.predict(source, **overrides)
     
+    def _boxes_from_result(self, result) -> tuple[ndarray, ndarray]:
+        """Cajas xyxy y confianzas sobre el umbral, convertidas a numpy una sola vez y siempre emparejadas"""
+        boxes = result.boxes.xyxy.cpu().numpy()
+        confidences = result.boxes.conf.cpu().numpy()
+        keep = confidences >= self.model_threshold
+        return boxes[keep], confidences[keep]
+
+    def reset_tracking(self) -> None:
+        """Descarta el estado temporal de un video (tracks, región de cancha detectada) antes de analizar otro"""
+        self.preprocessor.reset()
+
     @abstractmethod
-    def process_frame(self, frame: ndarray) -> list[DetectionResultFrame]:
+    def _track_ids(self, boxes: ndarray, frame_step: int = 1) -> ndarray:
+        """ID de track de cada caja del frame (se guarda como class_id); frame_step son los frames desde el anterior"""
         pass
-    
+
+    def detect_batch(self, frames: Sequence[ndarray], first_frame: int = 0, frame_step: int = 1) -> DetectionTable:
+        """
+        Una inferencia sobre el batch; las detecciones quedan en formato columnar con
+        su número de frame (first_frame + i * frame_step cuando el video se muestrea)
+        """
+        detections = self._detect_frames(frames)
+        with metrics.stage("tracking", self.timings):
+            return DetectionTable.concatenate([
+                self.track_frame(first_frame + offset * frame_step, boxes, confidences, frame_step)
+                for offset, (boxes, confidences) in enumerate(detections)
+            ])
+
+    def track_frame(self, frame_number: int, boxes: ndarray, confidences: ndarray, frame_step: int = 1) -> DetectionTable:
+        """Aplica el estado temporal (tracking) a las detecciones crudas de un frame, en orden de frames"""
+        return DetectionTable.from_frame(frame_number, self.class_name, boxes, confidences, self._track_ids(boxes, frame_step))
+
+    def _detect_frames(self, frames: Sequence[ndarray]) -> list[tuple[ndarray, ndarray]]:
+        """Recorta/reduce los frames, los infiere en una llamada y devuelve las cajas en coordenadas originales"""
+        with metrics.stage("preprocess", self.timings):
+            prepared = [self.preprocessor.prepare(frame) for frame in frames]
+        results = self._predict([frame for frame, _ in prepared], **self.preprocessor.predict_overrides())
+        detections = []
+        for (_, transform), result in zip(prepared, results):
+            boxes, confidences = self._boxes_from_result(result)
+            detections.append((transform.to_source(boxes), confidences))
+        return detections
+
+    def process_frame(self, frame: ndarray) -> list[DetectionResultFrame]:
+        return self.detect_batch([frame]).to_detections()
+
+    def process_batch(self, frames: Sequence[ndarray]) -> list[list[DetectionResultFrame]]:
+        table = self.detect_batch(frames)
+        return [frame_table.to_detections() for _, frame_table in table.frames()]
+
     @abstractmethod
-    def process_video(self, video_path: str) -> DetectionResultVideo:
+    def process_video(self, video_path: str) -> DetectionTable:
         pass
 
     @abstractmethod
-    def process_video_with_output(self, video_path: str, output_path: str = None) -> DetectionResultVideo:
-        pass
\ No newline at end of file
+    def process_video_with_output(self, video_path: str, output_path: str = None) -> DetectionTable:
+        pass
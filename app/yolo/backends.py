@@ -0,0 +1,258 @@
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Literal, cast
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+from numpy import ndarray
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+from ultralytics.engine.results import Results
+from ultralytics.utils.ops import scale_boxes
+
+from app.hashing import file_sha256
+from app.settings import Settings
+
+ExportRuntime = Literal["onnxruntime", "openvino"]
+QUANTIZED_PRECISIONS = ("fp16", "int8_dynamic", "int8_static")
+
+MAX_BOX_SIZE = 7680  # offset por clase para hacer NMS de todas las clases en una sola llamada
+MAX_NMS_CANDIDATES = 30000
+
+_export_lock = threading.Lock()
+
+
+def export_onnx(model_path: str, export_dir: str | Path = Settings.MODEL_EXPORT_DIR) -> Path:
+    """
+    Exporta los pesos a ONNX (batch y resolución dinámicos) una sola vez. El archivo
+    se guarda en `export_dir` con el hash de los pesos en el nombre, así que volver a
+    entrenar el modelo genera un export nuevo y los procesos siguientes reutilizan el existente.
+    """
+    export_dir = Path(export_dir)
+    onnx_path = export_dir / f"{Path(model_path).stem}-{file_sha256(model_path)[:16]}.onnx"
+    metadata_path = onnx_path.with_suffix(".json")
+
+    with _export_lock:
+        if onnx_path.exists() and metadata_path.exists():
+            return onnx_path
+
+        export_dir.mkdir(parents=True, exist_ok=True)
+        model = YOLO(model_path)
+        detection_model = model.model
+        if not isinstance(detection_model, torch.nn.Module):
+            raise ValueError(f"{model_path} no es un modelo de PyTorch que se pueda exportar")
+        print(f"⏳ Exportando {model_path} a ONNX...")
+        exported = model.export(format="onnx", dynamic=True, simplify=True, verbose=False)
+
+        tmp_path = onnx_path.with_suffix(f".onnx.tmp-{os.getpid()}")
+        shutil.move(exported, tmp_path)
+        metadata_path.write_text(json.dumps({
+            "model_path": model_path,
+            "names": {int(index): name for index, name in model.names.items()},
+            "stride": int(max(detection_model.stride))
+        }))
+        os.replace(tmp_path, onnx_path)
+        print(f"✅ Modelo exportado: {onnx_path}")
+    return onnx_path
+
+
+def letterbox_batch(frames: list[ndarray], imgsz: int, stride: int, auto: bool = True) -> ndarray:
+    """Tensor BCHW RGB float32 en [0, 1], con el mismo letterbox que usa ultralytics"""
+    letterbox = LetterBox(imgsz, auto=auto, stride=stride)
+    # Sin labels, LetterBox devuelve solo la imagen
+    images = np.stack([cast(ndarray, letterbox(image=frame)) for frame in frames])
+    return np.ascontiguousarray(images[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+
+def calibration_frames(
+    video_dir: str | Path = Settings.QUANTIZATION_CALIBRATION_DIR,
+    count: int = Settings.QUANTIZATION_CALIBRATION_FRAMES
+) -> list[ndarray]:
+    """Frames espaciados uniformemente entre los videos del directorio (sin los videos procesados por la API)"""
+    videos = sorted(
+        path for path in Path(video_dir).glob("*.mp4")
+        if not path.name.startswith("processed_") and not path.stem.endswith("_h264")
+    )
+    if not videos:
+        raise FileNotFoundError(f"No hay videos para calibrar en {video_dir}: copiar ahí videos representativos (QUANTIZATION_CALIBRATION_DIR)")
+
+    frames = []
+    per_video = math.ceil(count / len(videos))
+    for video_path in videos:
+        cap = cv2.VideoCapture(str(video_path))
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for frame_number in np.linspace(0, max(total - 1, 0), per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(frame_number))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        cap.release()
+    return frames[:count]
+
+
+def _detect_head_prefix(graph) -> str:
+    """Prefijo de los nodos del módulo Detect (el último módulo del modelo)"""
+    modules = [int(match.group(1)) for node in graph.node if (match := re.match(r"/model\.(\d+)/", node.name))]
+    return f"/model.{max(modules)}/"
+
+
+def quantize_onnx(onnx_path: str | Path, precision: str) -> Path:
+    """
+    Variante cuantizada del export FP32, generada una sola vez junto a él:
+    - fp16: pesos y activaciones en float16 (entrada y salida siguen en float32)
+    - int8_dynamic: pesos int8, activaciones cuantizadas en tiempo de ejecución
+    - int8_static: pesos y activaciones int8 (QDQ), calibrado con frames de
+      Settings.QUANTIZATION_CALIBRATION_DIR; borrar el archivo para recalibrar
+    En int8 el decodificado de cajas del Detect queda en float: mezcla coordenadas
+    en píxeles con scores en [0, 1] y no tolera una escala compartida.
+    """
+    if precision not in QUANTIZED_PRECISIONS:
+        raise ValueError(f"Precisión no soportada: {precision}")
+
+    onnx_path = Path(onnx_path)
+    quantized_path = onnx_path.with_name(f"{onnx_path.stem}-{precision}.onnx")
+    metadata_path = quantized_path.with_suffix(".json")
+
+    with _export_lock:
+        if quantized_path.exists() and metadata_path.exists():
+            return quantized_path
+
+        import onnx
+        from onnxruntime import quantization
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+
+        print(f"⏳ Generando variante {precision} de {onnx_path}...")
+        tmp_path = quantized_path.with_suffix(f".onnx.tmp-{os.getpid()}")
+        if precision == "fp16":
+            from onnxruntime.transformers.float16 import convert_float_to_float16
+
+            onnx.save(convert_float_to_float16(onnx.load(str(onnx_path)), keep_io_types=True), str(tmp_path))
+        else:
+            # Fusiona y anota shapes antes de cuantizar (sin inferencia simbólica: el export tiene shapes dinámicos)
+            prepared_path = quantized_path.with_suffix(f".onnx.prep-{os.getpid()}")
+            quant_pre_process(str(onnx_path), str(prepared_path), skip_symbolic_shape=True)
+            graph = onnx.load(str(prepared_path)).graph
+            head_prefix = _detect_head_prefix(graph)
+            excluded = [node.name for node in graph.node if node.name.startswith(head_prefix) and node.op_type != "Conv"]
+
+            if precision == "int8_dynamic":
+                quantization.quantize_dynamic(
+                    prepared_path, tmp_path, weight_type=quantization.QuantType.QUInt8, nodes_to_exclude=excluded
+                )
+            else:
+                metadata = json.loads(onnx_path.with_suffix(".json").read_text())
+                quantization.quantize_static(
+                    prepared_path,
+                    tmp_path,
+                    _CalibrationReader(graph.input[0].name, calibration_frames(), metadata["stride"]),
+                    quant_format=quantization.QuantFormat.QDQ,
+                    activation_type=quantization.QuantType.QUInt8,
+                    weight_type=quantization.QuantType.QInt8,
+                    per_channel=True,
+                    nodes_to_exclude=excluded
+                )
+            prepared_path.unlink()
+
+        shutil.copyfile(onnx_path.with_suffix(".json"), metadata_path)
+        os.replace(tmp_path, quantized_path)
+        print(f"✅ Variante {precision} generada: {quantized_path}")
+    return quantized_path
+
+
+class _CalibrationReader:
+    """CalibrationDataReader de ONNX Runtime: un frame letterboxed a 640 por lectura"""
+
+    def __init__(self, input_name: str, frames: list[ndarray], stride: int):
+        self._batches = iter([{input_name: letterbox_batch([frame], 640, stride, auto=False)} for frame in frames])
+
+    def get_next(self) -> dict | None:
+        return next(self._batches, None)
+
+
+@dataclass
+class ExportedYoloModel:
+    """
+    Modelo YOLO exportado a ONNX, ejecutado con ONNX Runtime u OpenVINO en CPU.
+    Reproduce el pre y posprocesado de ultralytics (letterbox, NMS, reescalado de
+    cajas) y devuelve `Results`, así que los detectores lo usan igual que a YOLO.
+    """
+
+    onnx_path: Path
+    runtime: ExportRuntime
+    threads: int = 0  # 0 = por defecto del runtime
+    names: dict[int, str] = field(init=False)
+    stride: int = field(init=False)
+    _run: Callable[[ndarray], ndarray] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        metadata = json.loads(Path(self.onnx_path).with_suffix(".json").read_text())
+        self.names = {int(index): name for index, name in metadata["names"].items()}
+        self.stride = metadata["stride"]
+        self._run = self._onnxruntime_session() if self.runtime == "onnxruntime" else self._openvino_model()
+
+    def _onnxruntime_session(self) -> Callable[[ndarray], ndarray]:
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads > 0:
+            options.intra_op_num_threads = self.threads
+        session = onnxruntime.InferenceSession(str(self.onnx_path), options, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+        return lambda images: session.run(None, {input_name: images})[0]
+
+    def _openvino_model(self) -> Callable[[ndarray], ndarray]:
+        import openvino
+
+        config = {"INFERENCE_NUM_THREADS": self.threads} if self.threads > 0 else {}
+        compiled = openvino.Core().compile_model(str(self.onnx_path), "CPU", config)
+        output = compiled.output(0)
+        return lambda images: compiled(images)[output]
+
+    @property
+    def memory_bytes(self) -> int:
+        return os.path.getsize(self.onnx_path)
+
+    def __call__(
+        self,
+        source: ndarray | list[ndarray],
+        imgsz: int = 640,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300,
+        **_ignored  # device, verbose, half: los fija el runtime
+    ) -> list[Results]:
+        frames = source if isinstance(source, list) else [source]
+        imgsz = math.ceil(imgsz / self.stride) * self.stride
+        # Igual que ultralytics: con frames del mismo tamaño solo se rellena hasta múltiplo del stride
+        images = letterbox_batch(frames, imgsz, self.stride, auto=len({frame.shape for frame in frames}) == 1)
+
+        predictions = torch.from_numpy(self._run(images))
+        return [
+            self._result(frame, prediction, images.shape[2:], conf, iou, max_det)
+            for frame, prediction in zip(frames, predictions)
+        ]
+
+    def _result(self, frame: ndarray, prediction: torch.Tensor, input_shape, conf: float, iou: float, max_det: int) -> Results:
+        # prediction: (4 + clases, anclas) con cajas xywh y score por clase
+        prediction = prediction.T
+        scores, classes = prediction[:, 4:].max(1)
+        keep = scores > conf
+        boxes, scores, classes = prediction[keep, :4], scores[keep], classes[keep]
+        if len(scores) > MAX_NMS_CANDIDATES:
+            top = scores.argsort(descending=True)[:MAX_NMS_CANDIDATES]
+            boxes, scores, classes = boxes[top], scores[top], classes[top]
+
+        xyxy = torch.cat([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], dim=1)
+        kept = torchvision.ops.nms(xyxy + classes[:, None].float() * MAX_BOX_SIZE, scores, iou)[:max_det]
+        detections = torch.cat([xyxy[kept], scores[kept, None], classes[kept, None].float()], dim=1)
+        detections[:, :4] = torch.as_tensor(scale_boxes(input_shape, detections[:, :4], frame.shape))
+        return Results(frame, path="", names=self.names, boxes=detections)
@@ -1,12 +1,15 @@
 from .abstract import AbstractYoloDetector
 from app.settings import Settings
-from ultralytics import YOLO
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import numpy as np
 from numpy import ndarray
-from app.data_models import DetectionResultFrame, DetectionResultVideo
+from typing import Literal, Sequence
+from app.data_models import DetectionTable, DetectionTableBuilder
+from app.video import OverlayRenderer, open_video_reader
+from app.metrics import metrics
 import cv2
 from tqdm import tqdm
-from .config import COLORS
+from .ball_tracker import BallKalmanTracker
 import os
 
 
@@ -14,59 +17,103 @@ import os
 class BallYoloDetector(AbstractYoloDetector):
     model_path: str = Settings.BALL_MODEL_PATH
     model_threshold: float = 0.50
+    precision: str = Settings.BALL_MODEL_PRECISION or Settings.MODEL_PRECISION
+    tracking: bool = Settings.BALL_TRACKING_ENABLED
+    roi_size: int = Settings.BALL_ROI_SIZE
+    tracker: BallKalmanTracker = field(default_factory=BallKalmanTracker)
 
     @property
     def load_model(self):
-        return YOLO(self.model_path)
+        return self._loaded_model().model
 
     @property
-    def class_name(self) -> str:
+    def class_name(self) -> Literal["ball", "player"]:
         return "ball"
 
-    def process_frame(self, frame: ndarray) -> list[DetectionResultFrame]:
-        model = self.load_model
-        results = model(frame)
-        detections = list[DetectionResultFrame]()
-        for result in results:
-            for box in result.boxes:
-                conf = float(box.conf[0])
-                if conf >= self.model_threshold:
-                    xyxy = box.xyxy[0].cpu().numpy().tolist()
-                    detections.append(DetectionResultFrame(
-                        box=xyxy,
-                        confidence=conf,
-                        class_name=self.class_name,
-                        class_id="1"
-                    ))
-        return detections
-
-    def process_video(self, video_path: str) -> DetectionResultVideo:
-        cap = cv2.VideoCapture(video_path)
+    def signature(self) -> dict:
+        signature = super().signature()
+        if self.tracking:
+            signature["tracker"] = {
+                "roi_size": self.roi_size,
+                "process_noise": self.tracker.process_noise,
+                "measurement_noise": self.tracker.measurement_noise,
+                "gate_chi2": self.tracker.gate_chi2,
+                "min_hits": self.tracker.min_hits,
+                "max_gap_frames": self.tracker.max_gap_frames,
+                "fill_confidence_decay": self.tracker.fill_confidence_decay
+            }
+        return signature
+
+    def reset_tracking(self) -> None:
+        super().reset_tracking()
+        self.tracker.reset()
+
+    def _track_ids(self, boxes: ndarray, frame_step: int = 1) -> ndarray:
+        # Hay una sola pelota: todas las detecciones comparten el class_id "1"
+        return np.ones(len(boxes), dtype=np.int32)
+
+    def detect_batch(self, frames: Sequence[ndarray], first_frame: int = 0, frame_step: int = 1) -> DetectionTable:
+        if not self.tracking:
+            return super().detect_batch(frames, first_frame, frame_step)
+
+        # Con tracking cada frame depende de la predicción del anterior, así que se infiere de a uno
+        tables = []
+        for offset, frame in enumerate(frames):
+            boxes, confidences = self._detect_near_prediction(frame, frame_step)
+            with metrics.stage("tracking", self.timings):
+                tables.append(self.track_frame(first_frame + offset * frame_step, boxes, confidences, frame_step))
+        return DetectionTable.concatenate(tables)
+
+    def track_frame(self, frame_number: int, boxes: ndarray, confidences: ndarray, frame_step: int = 1) -> DetectionTable:
+        if self.tracking:
+            boxes, confidences = self.tracker.update(boxes, confidences, frame_step)
+        return super().track_frame(frame_number, boxes, confidences, frame_step)
+
+    def _detect_near_prediction(self, frame: ndarray, frame_step: int) -> tuple[ndarray, ndarray]:
+        """
+        Con el track confirmado, infiere solo sobre un recorte de roi_size x roi_size
+        alrededor de la posición predicha (a resolución nativa) y lleva las cajas
+        a coordenadas del frame; si no, usa el frame completo.
+        """
+        height, width = frame.shape[:2]
+        roi = self.tracker.roi(width, height, self.roi_size, frame_step) if self.roi_size > 0 else None
+        if roi is None:
+            return self._detect_frames([frame])[0]
+
+        x1, y1, x2, y2 = roi
+        boxes, confidences = self._boxes_from_result(self._predict(frame[y1:y2, x1:x2], imgsz=self.roi_size)[0])
+        return boxes + np.array([x1, y1, x1, y1], dtype=boxes.dtype), confidences
+
+    def process_video(self, video_path: str) -> DetectionTable:
+        cap = open_video_reader(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
         
-        frame_detections = list[DetectionResultFrame]()
+        detections = DetectionTableBuilder()
+        self.reset_tracking()
         
         with tqdm(total=total_frames, desc=f"Processing {self.class_name} detections", 
                  unit="frames") as pbar:
+            frame_number = 0
+            frame = None  # cada frame se decodifica sobre el buffer del anterior
             while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+                ret, frame = cap.read(frame)
+                if not ret or frame is None:
                     break
                     
-                detections = self.process_frame(frame)
-                frame_detections.extend(detections)
+                detections.append(self.detect_batch([frame], frame_number))
+                frame_number += 1
                 pbar.update(1)
                 
         cap.release()
-        return DetectionResultVideo(frame_detections=frame_detections)
+        return detections.build()
 
-    def process_video_with_output(self, video_path: str, output_path: str = None) -> DetectionResultVideo:
+    def process_video_with_output(self, video_path: str, output_path: str = None) -> DetectionTable:
         if output_path is None:
             base_name = os.path.splitext(os.path.basename(video_path))[0]
             output_path = f"data/output_{base_name}_ball_detected.mp4"
         
-        cap = cv2.VideoCapture(video_path)
+        cap = open_video_reader(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -75,41 +122,33 @@ class BallYoloDetector(AbstractYoloDetector):
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         
-        frame_detections: list[DetectionResultFrame] = []
+        detections = DetectionTableBuilder()
+        overlay = OverlayRenderer()
+        self.reset_tracking()
         
         with tqdm(total=total_frames, desc=f"Processing {self.class_name} with output", unit="frames") as pbar:
+            frame_number = 0
+            frame = None  # cada frame se decodifica sobre el buffer del anterior
             while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+                ret, frame = cap.read(frame)
+                if not ret or frame is None:
                     break
                 
-                detections = self.process_frame(frame)
-                frame_detections.extend(detections)
+                frame_detections = self.detect_batch([frame], frame_number)
+                detections.append(frame_detections)
+                frame_number += 1
                 
-                annotated_frame = frame.copy()
-                for detection in detections:
-                    x1, y1, x2, y2 = map(int, detection.box)
-                    confidence = detection.confidence
-                    
-                    color = (0, 0, 255) 
-                    
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    label = f"Ball ({confidence:.2f})"
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                                (x1 + label_size[0], y1), color, -1)
-                    cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                # El frame no se vuelve a usar: se anota sobre el mismo buffer
+                overlay.draw_balls(frame, frame_detections)
                 
-                out.write(annotated_frame)
+                out.write(frame)
                 pbar.update(1)
         
         cap.release()
         out.release()
         
         print(f"Video procesado guardado en: {output_path}")
-        return DetectionResultVideo(frame_detections=frame_detections)
+        return detections.build()
 
 
     
\ No newline at end of file
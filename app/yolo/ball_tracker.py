@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy import ndarray
+
+
+@dataclass
+class BallKalmanTracker:
+    """
+    Tracker de la pelota con un filtro de Kalman de velocidad constante sobre el
+    centro de la caja (estado x, y, vx, vy). Con el track confirmado descarta las
+    detecciones fuera de la compuerta (distancia de Mahalanobis) y, si la pelota
+    no se detecta durante hasta `max_gap_frames`, emite la posición predicha con
+    la confianza decayendo por frame. También da la región donde buscar la pelota
+    en el frame siguiente.
+    """
+
+    process_noise: float = 50.0  # aceleración (px/frame²) que el modelo tolera
+    measurement_noise: float = 4.0  # error de la detección, en px
+    gate_chi2: float = 9.21  # chi² con 2 grados de libertad al 99%
+    min_hits: int = 2  # detecciones asociadas para confirmar el track
+    max_gap_frames: int = 5
+    fill_confidence_decay: float = 0.9
+    state: ndarray | None = field(default=None, init=False, repr=False)
+    covariance: ndarray | None = field(default=None, init=False, repr=False)
+    box_size: ndarray = field(default_factory=lambda: np.zeros(2), init=False, repr=False)
+    confidence: float = field(default=0.0, init=False)
+    hits: int = field(default=0, init=False)
+    frames_missing: int = field(default=0, init=False)
+    filled_detections: int = field(default=0, init=False)
+    rejected_detections: int = field(default=0, init=False)
+
+    @property
+    def confirmed(self) -> bool:
+        return self.state is not None and self.hits >= self.min_hits and self.frames_missing <= self.max_gap_frames
+
+    def reset(self) -> None:
+        self.state = None
+        self.covariance = None
+        self.box_size = np.zeros(2)
+        self.confidence = 0.0
+        self.hits = 0
+        self.frames_missing = 0
+        self.filled_detections = 0
+        self.rejected_detections = 0
+
+    def predicted_center(self, frame_step: int = 1) -> ndarray | None:
+        if self.state is None:
+            return None
+        return self.state[:2] + self.state[2:] * frame_step
+
+    def roi(self, frame_width: int, frame_height: int, size: int, frame_step: int = 1) -> tuple[int, int, int, int] | None:
+        """Recorte cuadrado de `size` px centrado en la posición predicha, o None si no hay track confirmado"""
+        center = self.predicted_center(frame_step)
+        if center is None or not self.confirmed or size >= min(frame_width, frame_height):
+            return None
+        x1 = int(np.clip(center[0] - size / 2, 0, frame_width - size))
+        y1 = int(np.clip(center[1] - size / 2, 0, frame_height - size))
+        return x1, y1, x1 + size, y1 + size
+
+    def update(self, boxes: ndarray, confidences: ndarray, frame_step: int = 1) -> tuple[ndarray, ndarray]:
+        """
+        Avanza el filtro `frame_step` frames con las detecciones del frame y devuelve
+        la pelota a reportar (0 o 1 caja): la detección asociada, una predicción para
+        rellenar un hueco corto, o nada.
+        """
+        self._predict(frame_step)
+
+        chosen = self._associate(boxes, confidences)
+        if chosen is not None:
+            self._correct(boxes[chosen], float(confidences[chosen]))
+            return boxes[chosen:chosen + 1], confidences[chosen:chosen + 1]
+
+        if self.state is None:
+            return boxes[:0], confidences[:0]
+
+        self.frames_missing += frame_step
+        if not self.confirmed:
+            if self.frames_missing > self.max_gap_frames:
+                self.reset_track()
+            return boxes[:0], confidences[:0]
+
+        # Hueco corto: se reporta la posición predicha
+        self.filled_detections += 1
+        center = self.state[:2]
+        half = self.box_size / 2
+        filled_box = np.concatenate([center - half, center + half]).astype(boxes.dtype)[None, :]
+        filled_confidence = self.confidence * self.fill_confidence_decay ** self.frames_missing
+        return filled_box, np.array([filled_confidence], dtype=confidences.dtype)
+
+    def reset_track(self) -> None:
+        self.state = None
+        self.covariance = None
+        self.hits = 0
+        self.frames_missing = 0
+
+    def _associate(self, boxes: ndarray, confidences: ndarray) -> int | None:
+        if len(boxes) == 0:
+            return None
+
+        if self.state is None or self.covariance is None:
+            return int(np.argmax(confidences))
+
+        centers = (boxes[:, :2] + boxes[:, 2:]).astype(np.float64) / 2
+        innovations = centers - self.state[:2]
+        innovation_covariance = self.covariance[:2, :2] + np.eye(2) * self.measurement_noise ** 2
+        distances = np.einsum("ni,ij,nj->n", innovations, np.linalg.inv(innovation_covariance), innovations)
+
+        inside_gate = distances <= self.gate_chi2
+        if inside_gate.any():
+            self.rejected_detections += int((~inside_gate).sum())
+            return int(np.argmin(np.where(inside_gate, distances, np.inf)))
+
+        if self.confirmed:
+            # Detecciones lejos de la trayectoria: se consideran espurias
+            self.rejected_detections += len(boxes)
+            return None
+
+        # Track sin confirmar: se reinicia con la detección más confiable
+        self.reset_track()
+        return int(np.argmax(confidences))
+
+    def _predict(self, frame_step: int) -> None:
+        if self.state is None or self.covariance is None:
+            return
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = frame_step
+        # Ruido de aceleración constante por tramo
+        dt2, dt3, dt4 = frame_step ** 2, frame_step ** 3 / 2, frame_step ** 4 / 4
+        noise = np.array([
+            [dt4, 0, dt3, 0],
+            [0, dt4, 0, dt3],
+            [dt3, 0, dt2, 0],
+            [0, dt3, 0, dt2]
+        ]) * self.process_noise
+        self.state = transition @ self.state
+        self.covariance = transition @ self.covariance @ transition.T + noise
+
+    def _correct(self, box: ndarray, confidence: float) -> None:
+        center = (box[:2] + box[2:]).astype(np.float64) / 2
+        self.box_size = (box[2:] - box[:2]).astype(np.float64)
+        self.confidence = confidence
+        self.frames_missing = 0
+        self.hits += 1
+
+        if self.state is None or self.covariance is None:
+            self.state = np.array([center[0], center[1], 0.0, 0.0])
+            self.covariance = np.diag([self.measurement_noise ** 2] * 2 + [100.0 ** 2] * 2)
+            return
+
+        observation = np.zeros((2, 4))
+        observation[0, 0] = observation[1, 1] = 1
+        innovation_covariance = observation @ self.covariance @ observation.T + np.eye(2) * self.measurement_noise ** 2
+        gain = self.covariance @ observation.T @ np.linalg.inv(innovation_covariance)
+        self.state = self.state + gain @ (center - observation @ self.state)
+        self.covariance = (np.eye(4) - gain @ observation) @ self.covariance
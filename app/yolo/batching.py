@@ -0,0 +1,23 @@
+import psutil
+
+# Memoria estimada por frame dentro del modelo: tensor de entrada 640x640x3 float32 + activaciones intermedias
+MODEL_MEMORY_PER_FRAME_BYTES = 640 * 640 * 3 * 4 * 8
+MAX_AUTO_BATCH_SIZE = 16
+
+
+def auto_batch_size(frame_width: int, frame_height: int, memory_fraction: float = 0.10) -> int:
+    """
+    Elige el tamaño de batch según la memoria disponible: usa como máximo
+    `memory_fraction` de la RAM libre entre frames decodificados y tensores del modelo.
+    """
+    frame_bytes = frame_width * frame_height * 3
+    per_frame_bytes = frame_bytes + MODEL_MEMORY_PER_FRAME_BYTES
+    budget = psutil.virtual_memory().available * memory_fraction
+    return max(1, min(MAX_AUTO_BATCH_SIZE, int(budget // per_frame_bytes)))
+
+
+def resolve_batch_size(batch_size: int, frame_width: int, frame_height: int) -> int:
+    """batch_size <= 0 significa elegirlo automáticamente"""
+    if batch_size > 0:
+        return batch_size
+    return auto_batch_size(frame_width, frame_height)
@@ -1,149 +1,86 @@
 from .abstract import AbstractYoloDetector
 from app.settings import Settings
-from ultralytics import YOLO
 from dataclasses import dataclass, field
 import cv2
 from tqdm import tqdm
 from numpy import ndarray
-from app.data_models import DetectionResultFrame, DetectionResultVideo
+from app.data_models import DetectionTable, DetectionTableBuilder
+from app.video import OverlayRenderer, open_video_reader
 import numpy as np
 import os
+from typing import Literal
 from .config import COLORS
+from .tracker import IoUTracker
+
+
+def player_color(player_id: int) -> tuple[int, int, int]:
+    return COLORS[player_id % len(COLORS)]
+
 
 @dataclass
 class PlayerYoloDetector(AbstractYoloDetector):
     model_path: str = Settings.PLAYER_MODEL_PATH
     model_threshold: float = 0.60
+    precision: str = Settings.PLAYER_MODEL_PRECISION or Settings.MODEL_PRECISION
     max_distance: float = 80.0
-    next_player_id: int = field(default=0, init=False)
-    tracked_players: dict[int, list[float]] = field(default_factory=dict, init=False)
-    player_frames_missing: dict[int, int] = field(default_factory=dict, init=False)
+    tracker: IoUTracker = field(default_factory=lambda: IoUTracker(matching=Settings.PLAYER_TRACKER_MATCHING))
 
     @property
     def load_model(self):
-        return YOLO(self.model_path)
+        return self._loaded_model().model
 
     @property
-    def class_name(self) -> str:
+    def class_name(self) -> Literal["ball", "player"]:
         return "player"
 
-    def _get_iou(self, box_a: list[float], box_b: list[float]) -> float:
-        x_a = max(box_a[0], box_b[0])
-        y_a = max(box_a[1], box_b[1])
-        x_b = min(box_a[2], box_b[2])
-        y_b = min(box_a[3], box_b[3])
-
-        inter_area = max(0, x_b - x_a) * max(0, y_b - y_a)
-        box_a_area = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
-        box_b_area = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
-        iou = inter_area / float(box_a_area + box_b_area - inter_area + 1e-6)
-        return iou
-
-    def _assign_player_id(self, box: list[float]) -> int:
-        best_iou = 0
-        best_id = None
-        
-        for player_id, prev_box in self.tracked_players.items():
-            iou = self._get_iou(box, prev_box)
-            if iou > best_iou and iou > 0.3:
-                best_iou = iou
-                best_id = player_id
-
-        if best_id is None:
-            player_id = self.next_player_id
-            self.tracked_players[player_id] = box
-            self.player_frames_missing[player_id] = 0
-            self.next_player_id += 1
-            return player_id
-
-        self.tracked_players[best_id] = box
-        self.player_frames_missing[best_id] = 0
-        return best_id
-
-
-    def _cleanup_missing_players(self):
-        
-        max_frames_missing = 15 
-        
-        players_to_remove: list[int] = []
-        for player_id, frames_missing in self.player_frames_missing.items():
-            if frames_missing > max_frames_missing:
-                players_to_remove.append(player_id)
-        
-        for player_id in players_to_remove:
-            del self.tracked_players[player_id]
-            del self.player_frames_missing[player_id]
-        
-        for player_id in self.player_frames_missing:
-            self.player_frames_missing[player_id] += 1
-
-    def process_frame(self, frame: ndarray) -> list[DetectionResultFrame]:
-        model = self.load_model
-        results = model(frame)
-        detections: list[DetectionResultFrame] = []
-
-        self._cleanup_missing_players()
-        
-        current_frame_detections: list[list[float]] = []
-
-        for result in results:
-            for box in result.boxes:
-                conf = float(box.conf[0])
-                if conf >= self.model_threshold:
-                    xyxy = box.xyxy[0].cpu().numpy().tolist()
-                    current_frame_detections.append(xyxy)
-
-        for box in current_frame_detections:
-            player_id = self._assign_player_id(box)
-            for result in results:
-                for result_box in result.boxes:
-                    if float(result_box.conf[0]) >= self.model_threshold:
-                        result_xyxy = result_box.xyxy[0].cpu().numpy().tolist()
-                        if result_xyxy == box:
-                            conf = float(result_box.conf[0])
-                            detections.append(
-                                DetectionResultFrame(
-                                    box=box,
-                                    confidence=conf,
-                                    class_name=self.class_name,
-                                    class_id=str(player_id)
-                                )
-                            )
-                            break
-
-        return detections
-
-    def process_video(self, video_path: str) -> DetectionResultVideo:
-        cap = cv2.VideoCapture(video_path)
+    def signature(self) -> dict:
+        return {
+            **super().signature(),
+            "tracker": {
+                "iou_threshold": self.tracker.iou_threshold,
+                "max_frames_missing": self.tracker.max_frames_missing,
+                "matching": self.tracker.matching
+            }
+        }
+
+    def reset_tracking(self) -> None:
+        super().reset_tracking()
+        self.tracker.reset()
+
+    def _track_ids(self, boxes: ndarray, frame_step: int = 1) -> ndarray:
+        return self.tracker.update(boxes, frame_step)
+
+    def process_video(self, video_path: str) -> DetectionTable:
+        cap = open_video_reader(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
 
-        frame_detections: list[DetectionResultFrame] = []
+        detections = DetectionTableBuilder()
 
-        self.next_player_id = 0
-        self.tracked_players.clear()
-        self.player_frames_missing.clear()
+        self.reset_tracking()
 
         with tqdm(total=total_frames, desc=f"Processing {self.class_name} detections", unit="frames") as pbar:
+            frame_number = 0
+            frame = None  # cada frame se decodifica sobre el buffer del anterior
             while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+                ret, frame = cap.read(frame)
+                if not ret or frame is None:
                     break
 
-                detections = self.process_frame(frame)
-                frame_detections.extend(detections)
+                detections.append(self.detect_batch([frame], frame_number))
+                frame_number += 1
                 pbar.update(1)
 
         cap.release()
-        return DetectionResultVideo(frame_detections=frame_detections)
+        return detections.build()
 
-    def process_video_with_output(self, video_path: str, output_path: str = None) -> DetectionResultVideo:
+    def process_video_with_output(self, video_path: str, output_path: str = None) -> DetectionTable:
         #TODO: hacer que sea un error esto de aca abajo
         if output_path is None:
             base_name = os.path.splitext(os.path.basename(video_path))[0]
             output_path = f"data/output_{base_name}_detected.mp4"
         
-        cap = cv2.VideoCapture(video_path)
+        cap = open_video_reader(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -152,44 +89,33 @@ class PlayerYoloDetector(AbstractYoloDetector):
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         
-        frame_detections: list[DetectionResultFrame] = []
+        detections = DetectionTableBuilder()
+        
+        overlay = OverlayRenderer()
         
-        self.next_player_id = 0
-        self.tracked_players.clear()
-        self.player_frames_missing.clear()
+        self.reset_tracking()
         
         
         with tqdm(total=total_frames, desc=f"Processing {self.class_name} with output", unit="frames") as pbar:
+            frame_number = 0
+            frame = None  # cada frame se decodifica sobre el buffer del anterior
             while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+                ret, frame = cap.read(frame)
+                if not ret or frame is None:
                     break
                 
-                detections = self.process_frame(frame)
-                frame_detections.extend(detections)
+                frame_detections = self.detect_batch([frame], frame_number)
+                detections.append(frame_detections)
+                frame_number += 1
                 
-                annotated_frame = frame.copy()
-                for detection in detections:
-                    x1, y1, x2, y2 = map(int, detection.box)
-                    player_id = int(detection.class_id)
-                    confidence = detection.confidence
-                    
-                    color = COLORS[player_id % len(COLORS)]
-                    
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    label = f"Player {player_id} ({confidence:.2f})"
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
-                                (x1 + label_size[0], y1), color, -1)
-                    cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                # El frame no se vuelve a usar: se anota sobre el mismo buffer
+                overlay.draw_players(frame, frame_detections, player_color)
                 
-                out.write(annotated_frame)
+                out.write(frame)
                 pbar.update(1)
         
         cap.release()
         out.release()
         
         print(f"Video procesado guardado en: {output_path}")
-        return DetectionResultVideo(frame_detections=frame_detections)
\ No newline at end of file
+        return detections.build()
\ No newline at end of file
@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from app.settings import Settings
+
+Roi = tuple[int, int, int, int]
+
+
+@dataclass
+class FrameTransform:
+    """Recorte + escala aplicados a un frame; permite volver las cajas a coordenadas originales"""
+
+    offset_x: int = 0
+    offset_y: int = 0
+    scale_x: float = 1.0
+    scale_y: float = 1.0
+
+    def to_source(self, boxes: ndarray) -> ndarray:
+        if self.scale_x == 1.0 and self.scale_y == 1.0 and self.offset_x == 0 and self.offset_y == 0:
+            return boxes
+        scale = np.array([self.scale_x, self.scale_y, self.scale_x, self.scale_y], dtype=boxes.dtype)
+        offset = np.array([self.offset_x, self.offset_y, self.offset_x, self.offset_y], dtype=boxes.dtype)
+        return boxes / scale + offset
+
+
+def detect_court_roi(frame: ndarray, margin: float = 0.08, top_margin: float = 0.5, min_area: float = 0.1) -> Roi | None:
+    """
+    Estima la región de la cancha: el área conectada más grande del color
+    saturado dominante (superficie azul/verde), ampliada con un margen y con
+    más margen arriba para jugadores y globos. None si no encuentra una superficie clara.
+    """
+    height, width = frame.shape[:2]
+    small = cv2.resize(frame, (320, max(1, int(320 * height / width))), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+
+    saturated = hsv[..., 1] > 60
+    if not saturated.any():
+        return None
+    histogram = np.bincount((hsv[..., 0][saturated] // 10).ravel(), minlength=18)
+    dominant_hue = int(np.argmax(histogram))
+    mask = (saturated & (hsv[..., 0] // 10 == dominant_hue)).astype(np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    if count <= 1:
+        return None
+    largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    x, y, w, h, area = stats[largest]
+    if area < min_area * mask.size:
+        return None
+
+    scale = width / small.shape[1]
+    x1 = max(0, int((x - margin * w) * scale))
+    x2 = min(width, int((x + w + margin * w) * scale))
+    y1 = max(0, int((y - top_margin * h) * scale))
+    y2 = min(height, int((y + h + margin * h) * scale))
+    return x1, y1, x2, y2
+
+
+def parse_court_roi(value: str) -> Roi | str | None:
+    """Settings.COURT_ROI: "" (frame completo), "auto" o "x1,y1,x2,y2" en píxeles del video"""
+    value = value.strip()
+    if not value:
+        return None
+    if value == "auto":
+        return "auto"
+    x1, y1, x2, y2 = (int(part) for part in value.split(","))
+    return x1, y1, x2, y2
+
+
+@dataclass
+class FramePreprocessor:
+    """
+    Recorta el frame a la región de la cancha y lo reduce (INTER_AREA, manteniendo
+    la relación de aspecto) para que su lado mayor sea `inference_size`. El modelo
+    recibe imgsz=inference_size, así que el letterbox de ultralytics solo completa
+    el padding hasta múltiplo del stride sin volver a redimensionar.
+    """
+
+    court_roi: Roi | str | None = None  # None = frame completo, "auto" = detectar con el primer frame
+    inference_size: int = 0  # 0 = resolución por defecto del modelo, sin preprocesar
+    _resolved_roi: Roi | None = field(default=None, init=False, repr=False)
+    _roi_resolved: bool = field(default=False, init=False, repr=False)
+
+    @classmethod
+    def from_settings(cls) -> "FramePreprocessor":
+        return cls(court_roi=parse_court_roi(Settings.COURT_ROI), inference_size=Settings.INFERENCE_SIZE)
+
+    @property
+    def enabled(self) -> bool:
+        return self.court_roi is not None or self.inference_size > 0
+
+    def reset(self) -> None:
+        self._resolved_roi = None
+        self._roi_resolved = False
+
+    def roi_for(self, frame: ndarray) -> Roi | None:
+        if not self._roi_resolved:
+            if isinstance(self.court_roi, str):
+                self._resolved_roi = detect_court_roi(frame)
+                print(f"✅ Región de cancha detectada: {self._resolved_roi or 'frame completo'}")
+            else:
+                self._resolved_roi = self.court_roi
+            self._roi_resolved = True
+        return self._resolved_roi
+
+    def prepare(self, frame: ndarray) -> tuple[ndarray, FrameTransform]:
+        if not self.enabled:
+            return frame, FrameTransform()
+
+        transform = FrameTransform()
+        roi = self.roi_for(frame)
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            frame = frame[y1:y2, x1:x2]
+            transform.offset_x, transform.offset_y = x1, y1
+
+        if self.inference_size > 0:
+            height, width = frame.shape[:2]
+            scale = self.inference_size / max(height, width)
+            if scale < 1.0:
+                size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                transform.scale_x, transform.scale_y = size[0] / width, size[1] / height
+        return frame, transform
+
+    def predict_overrides(self) -> dict:
+        return {"imgsz": self.inference_size} if self.inference_size > 0 else {}
@@ -0,0 +1,137 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import psutil
+import torch
+from ultralytics import YOLO
+
+from app.metrics import metrics
+from app.settings import Settings
+from .backends import QUANTIZED_PRECISIONS, ExportedYoloModel, ExportRuntime, export_onnx, quantize_onnx
+
+
+@dataclass
+class LoadedModel:
+    model: YOLO | ExportedYoloModel
+    model_path: str
+    device: str
+    precision: str
+    backend: str
+    load_seconds: float
+    memory_bytes: int
+    rss_delta_bytes: int
+    # El predictor de ultralytics no es thread-safe: los jobs concurrentes comparten el modelo de a uno
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def predict(self, source, **overrides):
+        predict_kwargs = {"half": True} if self.precision == "fp16" else {}
+        with self.lock:
+            return self.model(source, device=self.device, verbose=False, **predict_kwargs, **overrides)
+
+
+@dataclass
+class ModelRegistry:
+    """
+    Cache de modelos YOLO a nivel de proceso.
+    Cada combinación (ruta, device, precisión, backend) se carga una sola vez y se
+    comparte entre todas las instancias de detectores y de PadelMatchProcessor.
+    Los backends "onnxruntime" y "openvino" usan el export ONNX cacheado de los pesos.
+    """
+
+    _models: dict[tuple[str, str, str, str], LoadedModel] = field(default_factory=dict, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def get(self, model_path: str, device: str = "cpu", precision: str = "fp32", backend: str = "torch") -> LoadedModel:
+        key = (model_path, device, precision, backend)
+        loaded = self._models.get(key)
+        if loaded is not None:
+            metrics.increment("padel_model_cache_requests_total", result="hit")
+            return loaded
+
+        with self._lock:
+            loaded = self._models.get(key)
+            if loaded is None:
+                loaded = self._load(model_path, device, precision, backend)
+                self._models[key] = loaded
+                metrics.increment("padel_model_cache_requests_total", result="miss")
+            else:
+                metrics.increment("padel_model_cache_requests_total", result="hit")
+        return loaded
+
+    def warmup(self, model_path: str, device: str = "cpu", precision: str = "fp32", backend: str = "torch") -> LoadedModel:
+        loaded = self.get(model_path, device, precision, backend)
+        # Una inferencia en vacío inicializa el predictor para que el primer frame real no pague ese costo
+        dummy_frame = np.zeros((640, 640, 3), dtype=np.uint8)
+        loaded.predict(dummy_frame)
+        return loaded
+
+    def loaded_models(self) -> list[LoadedModel]:
+        return list(self._models.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def _load(self, model_path: str, device: str, precision: str, backend: str) -> LoadedModel:
+        if backend not in ("torch", "onnxruntime", "openvino"):
+            raise ValueError(f"INFERENCE_BACKEND desconocido: {backend}")
+        if backend == "torch" and precision not in ("fp32", "fp16"):
+            raise ValueError(f"La precisión {precision} requiere INFERENCE_BACKEND onnxruntime u openvino")
+        if backend == "torch" and precision == "fp16" and not _supports_half(device):
+            # ultralytics ignora half=True en CPU: el modelo correría en fp32 y se reportaría como fp16
+            raise ValueError(f"fp16 con INFERENCE_BACKEND torch requiere GPU (device={device}); en CPU usar onnxruntime u openvino")
+        if backend != "torch":
+            # El export (y la cuantización) se hace una sola vez y no cuenta como tiempo de carga
+            onnx_path = export_onnx(model_path)
+            if precision in QUANTIZED_PRECISIONS:
+                onnx_path = quantize_onnx(onnx_path, precision)
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        start = time.perf_counter()
+
+        model: YOLO | ExportedYoloModel
+        if backend == "torch":
+            model = YOLO(model_path)
+            model.to(device)
+        else:
+            runtime: ExportRuntime = "onnxruntime" if backend == "onnxruntime" else "openvino"
+            model = ExportedYoloModel(onnx_path, runtime, threads=Settings.INFERENCE_THREADS)
+
+        load_seconds = time.perf_counter() - start
+        rss_delta_bytes = process.memory_info().rss - rss_before
+
+        if isinstance(model, ExportedYoloModel):
+            memory_bytes = model.memory_bytes
+        elif isinstance(model.model, torch.nn.Module):
+            memory_bytes = sum(tensor.numel() * tensor.element_size() for tensor in model.model.parameters())
+            memory_bytes += sum(tensor.numel() * tensor.element_size() for tensor in model.model.buffers())
+        else:
+            memory_bytes = 0
+
+        print(f"✅ Modelo cargado: {model_path} ({device}, {precision}, {backend}) en {load_seconds:.2f}s, {memory_bytes / (1024**2):.1f} MB")
+
+        return LoadedModel(
+            model=model,
+            model_path=model_path,
+            device=device,
+            precision=precision,
+            backend=backend,
+            load_seconds=load_seconds,
+            memory_bytes=memory_bytes,
+            rss_delta_bytes=rss_delta_bytes,
+        )
+
+
+def _supports_half(device: str) -> bool:
+    """Si ultralytics corre en fp16 en este device (en CPU descarta half=True)"""
+    if device == "cpu":
+        return False
+    if device.startswith("mps"):
+        return True
+    return torch.cuda.is_available()
+
+
+model_registry = ModelRegistry()
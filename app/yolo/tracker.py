@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+from numpy import ndarray
+
+
+def iou_matrix(boxes_a: ndarray, boxes_b: ndarray) -> ndarray:
+    """IoU entre todas las cajas (N x 4) y (M x 4) en formato xyxy, en una sola operación"""
+    x_a = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y_a = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x_b = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y_b = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+
+    inter_area = np.maximum(0, x_b - x_a) * np.maximum(0, y_b - y_a)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    return inter_area / (area_a[:, None] + area_b[None, :] - inter_area + 1e-6)
+
+
+@dataclass
+class IoUTracker:
+    """
+    Tracker de jugadores por IoU. Los tracks viven en arrays (cajas, IDs y frames
+    sin ver) y cada frame se asocia con la matriz de IoU completa, con matching
+    greedy o húngaro (uno a uno).
+    """
+
+    iou_threshold: float = 0.3
+    max_frames_missing: int = 15
+    matching: Literal["greedy", "hungarian"] = "greedy"
+    next_id: int = field(default=0, init=False)
+    boxes: ndarray = field(default_factory=lambda: np.empty((0, 4), dtype=np.float32), init=False)
+    ids: ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64), init=False)
+    frames_missing: ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64), init=False)
+
+    def reset(self) -> None:
+        self.next_id = 0
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.frames_missing = np.empty(0, dtype=np.int64)
+
+    def update(self, boxes: ndarray, frame_step: int = 1) -> ndarray:
+        """
+        Asocia las cajas del frame actual a los tracks y devuelve el ID de cada una.
+        frame_step son los frames de video desde la actualización anterior (más de 1
+        cuando el video se muestrea), así max_frames_missing se mide en frames reales.
+        """
+        # Descartar los tracks que llevan demasiados frames sin verse y envejecer el resto
+        alive = self.frames_missing <= self.max_frames_missing
+        if not alive.all():
+            self.boxes = self.boxes[alive]
+            self.ids = self.ids[alive]
+            self.frames_missing = self.frames_missing[alive]
+        self.frames_missing += frame_step
+
+        assigned_ids = np.full(len(boxes), -1, dtype=np.int64)
+        if len(boxes) == 0:
+            return assigned_ids
+
+        if len(self.ids) > 0:
+            detection_indices, track_indices = self._match(iou_matrix(boxes, self.boxes))
+            assigned_ids[detection_indices] = self.ids[track_indices]
+            self.boxes[track_indices] = boxes[detection_indices]
+            self.frames_missing[track_indices] = 0
+
+        new_tracks = np.flatnonzero(assigned_ids < 0)
+        if new_tracks.size > 0:
+            new_ids = np.arange(self.next_id, self.next_id + new_tracks.size, dtype=np.int64)
+            self.next_id += new_tracks.size
+            assigned_ids[new_tracks] = new_ids
+            self.boxes = np.concatenate([self.boxes, boxes[new_tracks].astype(self.boxes.dtype)])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.frames_missing = np.concatenate([self.frames_missing, np.zeros(new_tracks.size, dtype=np.int64)])
+
+        return assigned_ids
+
+    def _match(self, ious: ndarray) -> tuple[ndarray, ndarray]:
+        if self.matching == "hungarian":
+            from scipy.optimize import linear_sum_assignment
+
+            assigned_detections, assigned_tracks = linear_sum_assignment(-ious)
+            keep = ious[assigned_detections, assigned_tracks] > self.iou_threshold
+            return assigned_detections[keep], assigned_tracks[keep]
+
+        # Greedy: se aceptan los pares de mayor IoU primero, sin repetir detección ni track
+        detection_candidates, track_candidates = np.nonzero(ious > self.iou_threshold)
+        order = np.argsort(-ious[detection_candidates, track_candidates], kind="stable")
+        used_detections = np.zeros(ious.shape[0], dtype=bool)
+        used_tracks = np.zeros(ious.shape[1], dtype=bool)
+        detection_indices: list[int] = []
+        track_indices: list[int] = []
+        for detection_index, track_index in zip(detection_candidates[order], track_candidates[order]):
+            if used_detections[detection_index] or used_tracks[track_index]:
+                continue
+            used_detections[detection_index] = True
+            used_tracks[track_index] = True
+            detection_indices.append(detection_index)
+            track_indices.append(track_index)
+        return np.array(detection_indices, dtype=np.int64), np.array(track_indices, dtype=np.int64)
@@ -0,0 +1,57 @@
+"""
+Compara el análisis completo (process_video, ambos modelos en cada frame) contra
+process_video_adaptive con MotionGatedScheduler: porcentaje de frames salteados,
+tiempo total y recall de golpes respecto de la inferencia completa.
+
+Uso: python -m benchmarks.bench_adaptive_inference [videos...] [--idle-stride 8]
+"""
+import argparse
+import time
+
+from app.match import PadelMatchProcessor
+from app.match.scheduler import MotionGatedScheduler, hit_recall
+
+DEFAULT_VIDEOS = ["videos/video_cortado_5s.mp4", "videos/video_cortado.mp4"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="*", default=DEFAULT_VIDEOS)
+    parser.add_argument("--motion-stride", type=int, default=2)
+    parser.add_argument("--idle-stride", type=int, default=8)
+    parser.add_argument("--frame-tolerance", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for video_path in args.videos:
+        baseline = PadelMatchProcessor(detection_cache=None)
+        start = time.perf_counter()
+        baseline.process_video(video_path)
+        baseline_seconds = time.perf_counter() - start
+
+        adaptive = PadelMatchProcessor(detection_cache=None)
+        scheduler = MotionGatedScheduler(
+            motion_stride=args.motion_stride,
+            idle_stride=args.idle_stride,
+            contact_distance=adaptive.hit_distance_threshold * 1.5
+        )
+        start = time.perf_counter()
+        adaptive.process_video_adaptive(video_path, scheduler)
+        adaptive_seconds = time.perf_counter() - start
+
+        rows.append((
+            video_path,
+            scheduler.stats.skipped_share,
+            len(baseline.hit_events),
+            len(adaptive.hit_events),
+            hit_recall(baseline.hit_events, adaptive.hit_events, args.frame_tolerance),
+            baseline_seconds / adaptive_seconds
+        ))
+
+    print(f"\n{'video':<32} {'salteados':>9} {'golpes (full)':>13} {'golpes (adapt.)':>15} {'recall':>7} {'speedup':>8}")
+    for video_path, skipped, baseline_hits, adaptive_hits, recall, speedup in rows:
+        print(f"{video_path:<32} {skipped:>9.1%} {baseline_hits:>13} {adaptive_hits:>15} {recall:>7.1%} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
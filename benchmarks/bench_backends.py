@@ -0,0 +1,90 @@
+"""
+Paridad y rendimiento de los backends de inferencia (torch, onnxruntime, openvino)
+sobre los videos de ejemplo. Para cada detector compara las detecciones de cada
+backend exportado contra torch (precision/recall con IoU >= 0.5 y diferencia
+máxima de confianza en las cajas emparejadas) y mide latencia por frame (batch 1)
+y throughput con batches de `--batch-size` frames. Sale con código 1 si algún
+backend no alcanza `--min-recall`.
+
+Uso: python -m benchmarks.bench_backends [videos...] [--frames 32] [--batch-size 8] [--threads 0]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.settings import Settings
+from app.yolo import BallYoloDetector, PlayerYoloDetector
+from app.yolo.abstract import AbstractYoloDetector
+from app.yolo.tracker import iou_matrix
+from benchmarks.bench_preprocessing import precision_recall, read_frames
+
+DEFAULT_VIDEOS = ["videos/video_cortado_5s.mp4", "videos/video_cortado.mp4"]
+BACKENDS = ["torch", "onnxruntime", "openvino"]
+
+
+def max_confidence_diff(reference: list[tuple[np.ndarray, np.ndarray]], candidate: list[tuple[np.ndarray, np.ndarray]]) -> float:
+    diff = 0.0
+    for (reference_boxes, reference_conf), (candidate_boxes, candidate_conf) in zip(reference, candidate):
+        if len(reference_boxes) == 0 or len(candidate_boxes) == 0:
+            continue
+        ious = iou_matrix(reference_boxes, candidate_boxes)
+        best = ious.argmax(axis=1)
+        matched = ious[np.arange(len(reference_boxes)), best] >= 0.5
+        if matched.any():
+            diff = max(diff, float(np.abs(reference_conf[matched] - candidate_conf[best[matched]]).max()))
+    return diff
+
+
+def measure(detector: AbstractYoloDetector, frames: list[np.ndarray], batch_size: int) -> tuple[list[tuple[np.ndarray, np.ndarray]], float, float]:
+    """Detecciones por frame, ms por frame con batch 1 y frames/s con batches de batch_size"""
+    detector.warmup()
+    start = time.perf_counter()
+    detections = [detector._detect_frames([frame])[0] for frame in frames]
+    latency_ms = (time.perf_counter() - start) / len(frames) * 1000
+
+    start = time.perf_counter()
+    for index in range(0, len(frames), batch_size):
+        detector._detect_frames(frames[index:index + batch_size])
+    throughput = len(frames) / (time.perf_counter() - start)
+    return detections, latency_ms, throughput
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="*", default=DEFAULT_VIDEOS)
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=Settings.INFERENCE_THREADS, help="hilos de ONNX Runtime / OpenVINO")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--min-recall", type=float, default=0.99)
+    args = parser.parse_args()
+    Settings.INFERENCE_THREADS = args.threads
+
+    failed = False
+    print(f"{'video':<28} {'detector':<10} {'backend':<12} {'ms/frame':>9} {'fps (batch)':>11} {'P':>6} {'R':>6} {'Δconf':>8}")
+    for video_path in args.videos:
+        frames = read_frames(video_path, args.frames)
+        for name, detector_class in (("jugadores", PlayerYoloDetector), ("pelota", BallYoloDetector)):
+            reference = None
+            for backend in args.backends:
+                detector = detector_class(backend=backend)
+                detections, latency_ms, throughput = measure(detector, frames, args.batch_size)
+                if reference is None:
+                    reference = detections
+                precision, recall = precision_recall([boxes for boxes, _ in reference], [boxes for boxes, _ in detections])
+                confidence_diff = max_confidence_diff(reference, detections)
+                failed |= recall < args.min_recall or precision < args.min_recall
+                print(
+                    f"{video_path:<28} {name:<10} {backend:<12} {latency_ms:>9.1f} {throughput:>11.1f} "
+                    f"{precision:>6.2f} {recall:>6.2f} {confidence_diff:>8.4f}"
+                )
+
+    if failed:
+        print(f"❌ Algún backend no alcanza precision/recall >= {args.min_recall} contra {args.backends[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
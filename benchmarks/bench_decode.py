@@ -0,0 +1,87 @@
+"""
+Throughput de decodificación sola (sin modelos) para cada backend de
+app.video.open_video_reader: frames por segundo y ms por frame decodificando el
+video completo, con y sin reutilizar el buffer de salida, para cada cantidad de
+threads y resolución de salida. Los backends que no están disponibles se omiten.
+
+Uso: python -m benchmarks.bench_decode [video] [--backends pyav ffmpeg opencv] [--threads 0 1] [--sizes 0 640] [--repeat 3]
+"""
+import argparse
+import shutil
+import time
+from typing import Any
+
+from app.video import FfmpegPipeReader, OpenCVReader, PyAVReader, VideoReader
+
+BACKENDS: dict[str, type[VideoReader]] = {"pyav": PyAVReader, "ffmpeg": FfmpegPipeReader, "opencv": OpenCVReader}
+
+
+def available(backend: str) -> bool:
+    if backend == "pyav":
+        try:
+            import av  # noqa: F401
+        except ImportError:
+            return False
+    if backend == "ffmpeg":
+        return shutil.which("ffmpeg") is not None
+    return True
+
+
+def decode(reader: VideoReader, reuse_buffer: bool) -> tuple[int, float, str]:
+    """Frames decodificados, segundos que llevó leerlos todos y tamaño de salida"""
+    frames = 0
+    frame = None
+    start = time.perf_counter()
+    while True:
+        ret, decoded = reader.read(frame)
+        if not ret:
+            break
+        if reuse_buffer:
+            frame = decoded
+        frames += 1
+    elapsed = time.perf_counter() - start
+    reader.release()
+    return frames, elapsed, f"{reader.width}x{reader.height}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default="videos/video_cortado_5s.mp4")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--threads", nargs="+", type=int, default=[0, 1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[0, 640])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for backend in args.backends:
+        if not available(backend):
+            print(f"⚠️ Backend {backend} no disponible, se omite")
+            continue
+        reader_class = BACKENDS[backend]
+        extra: dict[str, Any] = {"ffmpeg_path": shutil.which("ffmpeg")} if backend == "ffmpeg" else {}
+        for threads in args.threads:
+            for max_size in args.sizes:
+                for reuse_buffer in (False, True):
+                    # Mejor de `repeat` corridas: la primera paga el cache de disco
+                    frames, elapsed, size = min(
+                        (decode(reader_class(args.video, max_size, threads, **extra), reuse_buffer) for _ in range(args.repeat)),
+                        key=lambda run: run[1]
+                    )
+                    rows.append((backend, threads, size, reuse_buffer, frames, elapsed))
+
+    # Referencia: lo que hacía el análisis antes (OpenCV por defecto, resolución original, un ndarray por frame)
+    reference = next((row for row in rows if row[0] == "opencv" and row[1] == 0 and not row[3]), rows[0])
+    reference_fps = reference[4] / reference[5]
+    print(f"\nDecodificación de {args.video}")
+    print(f"{'backend':<8} {'threads':>7} {'salida':>10} {'buffer':>7} {'frames':>7} {'ms/frame':>9} {'fps':>8} {'speedup':>8}")
+    for backend, threads, size, reuse_buffer, frames, elapsed in rows:
+        fps = frames / elapsed
+        print(
+            f"{backend:<8} {threads or 'auto':>7} {size:>10} {'reusa' if reuse_buffer else 'nuevo':>7} "
+            f"{frames:>7} {elapsed / frames * 1000:>9.2f} {fps:>8.1f} {fps / reference_fps:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
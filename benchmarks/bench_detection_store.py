@@ -0,0 +1,87 @@
+"""
+Comparación de memoria entre guardar las detecciones de un video como lista de
+DetectionResultFrame (pydantic, una lista de floats por caja) y como
+DetectionTable columnar. Por defecto simula un partido de 90 minutos a 30 FPS
+con 4 jugadores y 1 pelota por frame.
+
+Resultado de referencia (810.000 detecciones, medido con tracemalloc):
+  list[DetectionResultFrame]  ~1045 MB  (~1290 bytes por detección)
+  DetectionTable               ~24 MB  (29 bytes por detección), ~44x menos
+
+Uso: python -m benchmarks.bench_detection_store [--frames 162000]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, TypeVar
+
+import numpy as np
+
+from app.data_models import DetectionTable
+
+T = TypeVar("T")
+
+
+def synthetic_table(num_frames: int, players_per_frame: int, balls_per_frame: int, seed: int) -> DetectionTable:
+    rng = np.random.default_rng(seed)
+    per_frame = players_per_frame + balls_per_frame
+    count = num_frames * per_frame
+
+    top_left = rng.uniform(0, 1800, size=(count, 2)).astype(np.float32)
+    sizes = rng.uniform(10, 250, size=(count, 2)).astype(np.float32)
+    class_index = np.tile(np.array([1] * players_per_frame + [0] * balls_per_frame, dtype=np.uint8), num_frames)
+    track_id = np.tile(np.array(list(range(players_per_frame)) + [1] * balls_per_frame, dtype=np.int32), num_frames)
+
+    return DetectionTable(
+        frame_index=np.repeat(np.arange(num_frames, dtype=np.int32), per_frame),
+        class_index=class_index,
+        track_id=track_id,
+        confidence=rng.uniform(0.5, 1.0, size=count).astype(np.float32),
+        boxes=np.concatenate([top_left, top_left + sizes], axis=1),
+        frame_start=0,
+        frame_stop=num_frames
+    )
+
+
+def measure(build: Callable[[], T]) -> tuple[T, int, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=90 * 60 * 30)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--balls", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    source = synthetic_table(args.frames, args.players, args.balls, args.seed)
+
+    table, table_bytes, table_seconds = measure(lambda: DetectionTable(
+        source.frame_index.copy(), source.class_index.copy(), source.track_id.copy(), source.confidence.copy(),
+        source.boxes.copy(), 0, args.frames
+    ))
+    detections, pydantic_bytes, pydantic_seconds = measure(source.to_detections)
+    assert len(detections) == len(table)
+
+    start = time.perf_counter()
+    for frame_number in range(args.frames):
+        table.frame(frame_number)
+    slice_seconds = time.perf_counter() - start
+
+    print(f"Detecciones: {len(table):,} ({args.frames:,} frames)")
+    print(f"{'formato':<26} {'memoria (MB)':>12} {'bytes/detección':>16} {'construcción (s)':>17}")
+    print(f"{'list[DetectionResultFrame]':<26} {pydantic_bytes / 1e6:>12.1f} {pydantic_bytes / len(table):>16.0f} {pydantic_seconds:>17.2f}")
+    print(f"{'DetectionTable':<26} {table_bytes / 1e6:>12.1f} {table_bytes / len(table):>16.0f} {table_seconds:>17.2f}")
+    print(f"Reducción: {pydantic_bytes / table_bytes:.0f}x")
+    print(f"Slice por frame: {slice_seconds / args.frames * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
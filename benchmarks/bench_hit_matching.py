@@ -0,0 +1,234 @@
+"""
+Micro-benchmark del matching jugador-pelota: compara la versión original con
+loops de Python (HitCandidate y DetectionResultFrame por detección), una versión
+vectorizada con NumPy y PadelMatchProcessor._detect_table_hits (loops sobre las
+columnas de la DetectionTable), verificando que las tres produzcan exactamente
+los mismos golpes. Con las cantidades reales (4 jugadores, 1-2 pelotas) el costo
+fijo de cada operación de NumPy domina y la versión vectorizada es la más lenta.
+
+Uso: python -m benchmarks.bench_hit_matching
+"""
+import argparse
+import random
+import time
+from typing import Literal, Sequence
+
+import numpy as np
+
+from app.data_models import DetectionResultFrame, DetectionTable, HitCandidate, HitEvent
+from app.match import PadelMatchProcessor
+
+
+def detect_hits_loop(processor: PadelMatchProcessor, player_detections, ball_detections, frame_number: int, timestamp: float) -> list[HitEvent]:
+    """Implementación original con loops de Python, usada como referencia"""
+    hits: list[HitEvent] = []
+
+    valid_player_detections = [d for d in player_detections if d.confidence >= processor.min_confidence_threshold]
+    valid_ball_detections = [d for d in ball_detections if d.confidence >= processor.min_confidence_threshold]
+
+    if not valid_ball_detections or not valid_player_detections:
+        return hits
+
+    hit_candidates: list[HitCandidate] = []
+
+    for player_detection in valid_player_detections:
+        player_id = player_detection.class_id
+
+        if player_id in processor.last_hit_frame:
+            frames_since_last_hit = frame_number - processor.last_hit_frame[player_id]
+            if frames_since_last_hit < processor.min_frames_between_hits:
+                continue
+
+        best_distance = float('inf')
+        best_ball_detection = None
+
+        for ball_detection in valid_ball_detections:
+            player_center_x = (player_detection.box[0] + player_detection.box[2]) / 2
+            player_center_y = (player_detection.box[1] + player_detection.box[3]) / 2
+            ball_center_x = (ball_detection.box[0] + ball_detection.box[2]) / 2
+            ball_center_y = (ball_detection.box[1] + ball_detection.box[3]) / 2
+            distance = ((player_center_x - ball_center_x) ** 2 + (player_center_y - ball_center_y) ** 2) ** 0.5
+            if distance < best_distance:
+                best_distance = distance
+                best_ball_detection = ball_detection
+
+        if (processor.min_distance_threshold <= best_distance <= processor.hit_distance_threshold
+                and best_ball_detection is not None):
+            distance_score = 1.0 - (best_distance / processor.hit_distance_threshold)
+            confidence_score = (player_detection.confidence + best_ball_detection.confidence) / 2
+            hit_candidates.append(HitCandidate(
+                player_id=player_id,
+                player_detection=player_detection,
+                ball_detection=best_ball_detection,
+                distance=best_distance,
+                score=distance_score * confidence_score
+            ))
+
+    hit_candidates.sort(key=lambda x: x.score, reverse=True)
+
+    used_players = set()
+    used_ball_boxes = set()
+
+    for candidate in hit_candidates:
+        player_id = candidate.player_id
+        ball_detection = candidate.ball_detection
+        ball_box_tuple = tuple(ball_detection.box)
+
+        if player_id not in used_players and ball_box_tuple not in used_ball_boxes:
+            hits.append(HitEvent(
+                player_id=player_id,
+                frame_number=frame_number,
+                timestamp=timestamp,
+                player_confidence=candidate.player_detection.confidence,
+                ball_confidence=ball_detection.confidence,
+                player_box=candidate.player_detection.box,
+                ball_box=ball_detection.box
+            ))
+            used_players.add(player_id)
+            used_ball_boxes.add(ball_box_tuple)
+            processor.last_hit_frame[player_id] = frame_number
+
+    return hits
+
+
+def detect_hits_numpy(processor: PadelMatchProcessor, players: DetectionTable, balls: DetectionTable, frame_number: int, timestamp: float) -> list[HitEvent]:
+    """Matching vectorizado sobre los arrays (N x 4) de la DetectionTable, usado como referencia"""
+    player_ids = players.track_labels()
+    player_boxes = players.boxes.astype(np.float64)
+    player_confidences = players.confidence.astype(np.float64)
+    ball_boxes = balls.boxes.astype(np.float64)
+    ball_confidences = balls.confidence.astype(np.float64)
+
+    valid_players = player_confidences >= processor.min_confidence_threshold
+    valid_balls = ball_confidences >= processor.min_confidence_threshold
+    if not valid_players.any() or not valid_balls.any():
+        return []
+
+    player_boxes = player_boxes[valid_players]
+    player_confidences = player_confidences[valid_players]
+    player_ids = [player_id for player_id, valid in zip(player_ids, valid_players) if valid]
+    ball_boxes = ball_boxes[valid_balls]
+    ball_confidences = ball_confidences[valid_balls]
+
+    in_cooldown = np.array([
+        player_id in processor.last_hit_frame and frame_number - processor.last_hit_frame[player_id] < processor.min_frames_between_hits
+        for player_id in player_ids
+    ], dtype=bool)
+
+    player_centers = (player_boxes[:, :2] + player_boxes[:, 2:]) / 2
+    ball_centers = (ball_boxes[:, :2] + ball_boxes[:, 2:]) / 2
+    distances = (((player_centers[:, None, :] - ball_centers[None, :, :]) ** 2).sum(axis=2)) ** 0.5
+
+    best_balls = distances.argmin(axis=1)
+    best_distances = distances[np.arange(len(player_ids)), best_balls]
+
+    candidate_mask = (best_distances >= processor.min_distance_threshold) & (best_distances <= processor.hit_distance_threshold)
+    candidate_mask &= ~in_cooldown
+    candidates = candidate_mask.nonzero()[0]
+
+    distance_scores = 1.0 - (best_distances[candidates] / processor.hit_distance_threshold)
+    confidence_scores = (player_confidences[candidates] + ball_confidences[best_balls[candidates]]) / 2
+    candidates = candidates[np.argsort(-(distance_scores * confidence_scores), kind="stable")]
+
+    hits: list[HitEvent] = []
+    used_players = set()
+    used_ball_boxes = set()
+
+    for player_index in candidates:
+        player_id = player_ids[player_index]
+        ball_index = best_balls[player_index]
+        ball_box = ball_boxes[ball_index].tolist()
+        ball_box_tuple = tuple(ball_box)
+
+        if player_id not in used_players and ball_box_tuple not in used_ball_boxes:
+            hits.append(HitEvent(
+                player_id=player_id,
+                frame_number=frame_number,
+                timestamp=timestamp,
+                player_confidence=float(player_confidences[player_index]),
+                ball_confidence=float(ball_confidences[ball_index]),
+                player_box=player_boxes[player_index].tolist(),
+                ball_box=ball_box
+            ))
+            used_players.add(player_id)
+            used_ball_boxes.add(ball_box_tuple)
+            processor.last_hit_frame[player_id] = frame_number
+
+    return hits
+
+
+def synthetic_frames(rng: random.Random, num_frames: int, num_players: int, num_balls: int) -> list[tuple[list, list]]:
+    frames = []
+    for _ in range(num_frames):
+        players = []
+        for player_id in range(num_players):
+            x, y = rng.uniform(0, 1800), rng.uniform(0, 1000)
+            players.append(DetectionResultFrame(
+                box=[x, y, x + rng.uniform(40, 120), y + rng.uniform(100, 250)],
+                confidence=rng.uniform(0.3, 1.0),
+                class_name="player",
+                class_id=str(player_id)
+            ))
+        balls = []
+        for _ in range(num_balls):
+            anchor = rng.choice(players)
+            cx = (anchor.box[0] + anchor.box[2]) / 2 + rng.uniform(-90, 90)
+            cy = (anchor.box[1] + anchor.box[3]) / 2 + rng.uniform(-90, 90)
+            balls.append(DetectionResultFrame(
+                box=[cx - 6, cy - 6, cx + 6, cy + 6],
+                confidence=rng.uniform(0.3, 1.0),
+                class_name="ball",
+                class_id="1"
+            ))
+        frames.append((players, balls))
+    return frames
+
+
+def synthetic_table(class_name: Literal["ball", "player"], detections: list[DetectionResultFrame]) -> DetectionTable:
+    return DetectionTable.from_frame(
+        0, class_name,
+        np.array([detection.box for detection in detections], dtype=np.float32).reshape(-1, 4),
+        np.array([detection.confidence for detection in detections], dtype=np.float32),
+        np.array([int(detection.class_id) for detection in detections])
+    )
+
+
+def synthetic_tables(frames: list[tuple[list, list]]) -> list[tuple[DetectionTable, DetectionTable]]:
+    """Las mismas detecciones sintéticas como DetectionTable (float32), una por clase y frame"""
+    return [(synthetic_table("player", players), synthetic_table("ball", balls)) for players, balls in frames]
+
+
+def run(frames: Sequence[tuple], detect) -> tuple[float, list[HitEvent]]:
+    # Los detectores no llegan a cargar sus modelos: el matching recibe detecciones sintéticas
+    processor = PadelMatchProcessor()
+    hits: list[HitEvent] = []
+    start = time.perf_counter()
+    for frame_number, (players, balls) in enumerate(frames):
+        hits.extend(detect(processor, players, balls, frame_number, frame_number / 30))
+    return time.perf_counter() - start, hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'jugadores':>9} {'pelotas':>7} {'original (ms/frame)':>20} {'numpy (ms/frame)':>17} {'tabla (ms/frame)':>17}  iguales")
+    for num_players, num_balls in [(2, 1), (4, 1), (4, 2), (8, 4), (16, 8), (32, 16), (64, 32), (128, 64)]:
+        tables = synthetic_tables(synthetic_frames(random.Random(args.seed), args.frames, num_players, num_balls))
+        # La versión original recibe las detecciones ya redondeadas a float32, como salen de la tabla
+        frames = [(players.to_detections(), balls.to_detections()) for players, balls in tables]
+        loop_seconds, loop_hits = run(frames, detect_hits_loop)
+        numpy_seconds, numpy_hits = run(tables, detect_hits_numpy)
+        table_seconds, table_hits = run(tables, PadelMatchProcessor._detect_table_hits)
+        expected = [hit.model_dump() for hit in loop_hits]
+        same = expected == [hit.model_dump() for hit in numpy_hits] == [hit.model_dump() for hit in table_hits]
+        print(
+            f"{num_players:>9} {num_balls:>7} {loop_seconds / args.frames * 1000:>20.3f} "
+            f"{numpy_seconds / args.frames * 1000:>17.3f} {table_seconds / args.frames * 1000:>17.3f}  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
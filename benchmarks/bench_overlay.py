@@ -0,0 +1,118 @@
+"""
+Costo de anotar un frame: compara el dibujo original (frame.copy() y, por cada
+detección, cv2.getTextSize + rectángulo de fondo + cv2.putText) contra
+OverlayRenderer (dibujo sobre el mismo buffer y etiquetas pre-renderizadas,
+con el cache de etiquetas ya cargado),
+verificando que ambos produzcan exactamente los mismos píxeles. Las detecciones
+son sintéticas (4 jugadores y 0-2 pelotas por frame, incluidas cajas pegadas a
+los bordes) sobre frames reales del video.
+
+Uso: python -m benchmarks.bench_overlay [video] [--frames 150] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+import cv2
+import numpy as np
+
+from app.data_models import DetectionTable, HitEvent
+from app.video.overlay import OverlayRenderer, alternating_player_color
+from benchmarks.bench_preprocessing import read_frames
+
+
+def legacy_render(frame, players: DetectionTable, balls: DetectionTable, hits: list[HitEvent], frame_info: str):
+    """El dibujo que hacía PadelMatchProcessor._draw_annotated_frame antes de OverlayRenderer"""
+    annotated_frame = frame.copy()
+    for box, player_id, confidence in zip(players.boxes.tolist(), players.track_id.tolist(), players.confidence.tolist()):
+        x1, y1, x2, y2 = map(int, box)
+        color = alternating_player_color(player_id)
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+        label = f"Player {player_id} ({confidence:.2f})"
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+        cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), (x1 + label_size[0], y1), color, -1)
+        cv2.putText(annotated_frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    for box, confidence in zip(balls.boxes.tolist(), balls.confidence.tolist()):
+        x1, y1, x2, y2 = map(int, box)
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        label = f"Ball ({confidence:.2f})"
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+        cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), (x1 + label_size[0], y1), (0, 0, 255), -1)
+        cv2.putText(annotated_frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    for hit in hits:
+        player_center = (int((hit.player_box[0] + hit.player_box[2]) / 2), int((hit.player_box[1] + hit.player_box[3]) / 2))
+        ball_center = (int((hit.ball_box[0] + hit.ball_box[2]) / 2), int((hit.ball_box[1] + hit.ball_box[3]) / 2))
+        cv2.line(annotated_frame, player_center, ball_center, (0, 255, 255), 3)
+        cv2.putText(annotated_frame, f"HIT! Player {hit.player_id}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 3)
+    height = annotated_frame.shape[0]
+    cv2.putText(annotated_frame, frame_info, (10, height - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return annotated_frame
+
+
+def synthetic_overlays(rng: random.Random, frames: list[np.ndarray]) -> list[tuple]:
+    overlays: list[tuple] = []
+    height, width = frames[0].shape[:2]
+    for frame_number in range(len(frames)):
+        player_boxes = []
+        for _ in range(4):
+            # Algunas cajas arrancan fuera del frame para ejercitar el recorte de las etiquetas
+            x, y = rng.uniform(-60, width - 40), rng.uniform(-20, height - 100)
+            player_boxes.append([x, y, x + rng.uniform(40, 120), y + rng.uniform(100, 250)])
+        ball_boxes = []
+        for _ in range(rng.randint(0, 2)):
+            x, y = rng.uniform(0, width), rng.uniform(0, height)
+            ball_boxes.append([x - 6, y - 6, x + 6, y + 6])
+        players = DetectionTable.from_frame(
+            frame_number, "player", np.array(player_boxes, dtype=np.float32).reshape(-1, 4),
+            np.array([rng.uniform(0.3, 1.0) for _ in player_boxes], dtype=np.float32), np.arange(len(player_boxes)) + frame_number // 50
+        )
+        balls = DetectionTable.from_frame(
+            frame_number, "ball", np.array(ball_boxes, dtype=np.float32).reshape(-1, 4),
+            np.array([rng.uniform(0.3, 1.0) for _ in ball_boxes], dtype=np.float32), np.full(len(ball_boxes), -1)
+        )
+        hits = []
+        if ball_boxes and rng.random() < 0.1:
+            hits.append(HitEvent(
+                player_id=str(rng.randint(0, 3)), frame_number=frame_number, timestamp=0.0, player_confidence=0.9,
+                ball_confidence=0.9, player_box=player_boxes[0], ball_box=ball_boxes[0]
+            ))
+        overlays.append((players, balls, hits, f"Frame: {frame_number} | Hits: {frame_number // 10}"))
+    return overlays
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default="videos/video_cortado_5s.mp4")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    overlays = synthetic_overlays(random.Random(args.seed), frames)
+
+    # El cache de etiquetas se llena en los primeros frames y se reutiliza el resto del video
+    renderer = OverlayRenderer()
+    legacy_seconds, renderer_seconds = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        expected = [legacy_render(frame, *overlay) for frame, overlay in zip(frames, overlays)]
+        legacy_seconds.append(time.perf_counter() - start)
+
+        # En el análisis el frame decodificado no se vuelve a usar: se dibuja sobre él
+        buffers = [frame.copy() for frame in frames]
+        start = time.perf_counter()
+        rendered = [renderer.render(buffer, *overlay) for buffer, overlay in zip(buffers, overlays)]
+        renderer_seconds.append(time.perf_counter() - start)
+
+    mismatched = sum(not np.array_equal(a, b) for a, b in zip(expected, rendered))
+    legacy_ms = min(legacy_seconds) / len(frames) * 1000
+    renderer_ms = min(renderer_seconds) / len(frames) * 1000
+    print(f"\nAnotación de {len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]} ({args.video})")
+    print(f"  original (copy + getTextSize/putText): {legacy_ms:.3f} ms/frame")
+    print(f"  OverlayRenderer (in place + sprites):  {renderer_ms:.3f} ms/frame ({legacy_ms / renderer_ms:.2f}x)")
+    print(f"  frames con píxeles distintos: {mismatched}")
+
+
+if __name__ == "__main__":
+    main()
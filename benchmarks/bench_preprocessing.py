@@ -0,0 +1,104 @@
+"""
+Latencia y precisión de los detectores según la región de cancha y la resolución
+de inferencia (FramePreprocessor). La referencia es el frame completo inferido a
+su resolución nativa; para cada configuración se reporta ms por frame (recorte +
+resize + inferencia) y precision/recall por clase con IoU >= 0.5 contra la referencia.
+
+Uso: python -m benchmarks.bench_preprocessing [video] [--frames 60] [--sizes 1280 960 640 480 320]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.yolo import BallYoloDetector, FramePreprocessor, PlayerYoloDetector
+from app.yolo.abstract import AbstractYoloDetector
+from app.yolo.tracker import iou_matrix
+
+
+def read_frames(video_path: str, count: int) -> list[np.ndarray]:
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    step = max(1, total // count)
+    frames = []
+    for frame_number in range(0, total, step):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+        if len(frames) == count:
+            break
+    cap.release()
+    return frames
+
+
+def detect(detector: AbstractYoloDetector, frames: list[np.ndarray]) -> tuple[list[np.ndarray], float]:
+    detector.reset_tracking()
+    start = time.perf_counter()
+    boxes = [frame_boxes for frame_boxes, _ in (detector._detect_frames([frame])[0] for frame in frames)]
+    return boxes, (time.perf_counter() - start) / len(frames)
+
+
+def precision_recall(reference: list[np.ndarray], candidate: list[np.ndarray], iou_threshold: float = 0.5) -> tuple[float, float]:
+    matched = reference_total = candidate_total = 0
+    for reference_boxes, candidate_boxes in zip(reference, candidate):
+        reference_total += len(reference_boxes)
+        candidate_total += len(candidate_boxes)
+        if len(reference_boxes) == 0 or len(candidate_boxes) == 0:
+            continue
+        ious = iou_matrix(reference_boxes, candidate_boxes)
+        # Matching greedy 1 a 1 por IoU descendente
+        used_reference, used_candidate = set(), set()
+        for reference_index, candidate_index in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+            if ious[reference_index, candidate_index] < iou_threshold:
+                break
+            if reference_index in used_reference or candidate_index in used_candidate:
+                continue
+            used_reference.add(reference_index)
+            used_candidate.add(candidate_index)
+            matched += 1
+    precision = matched / candidate_total if candidate_total else 1.0
+    recall = matched / reference_total if reference_total else 1.0
+    return precision, recall
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default="videos/video_cortado.mp4")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1280, 960, 640, 480, 320])
+    parser.add_argument("--court-roi", default="auto", help='"auto", "x1,y1,x2,y2" o "" para no recortar')
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    height, width = frames[0].shape[:2]
+    native_size = (max(height, width) + 31) // 32 * 32
+    court_roi = FramePreprocessor(court_roi=args.court_roi or None).roi_for(frames[0]) if args.court_roi else None
+
+    detectors = {"jugadores": PlayerYoloDetector(), "pelota": BallYoloDetector(tracking=False)}
+    for detector in detectors.values():
+        detector.warmup()
+
+    reference = {}
+    for name, detector in detectors.items():
+        detector.preprocessor = FramePreprocessor(inference_size=native_size)
+        reference[name], _ = detect(detector, frames)
+
+    print(f"Video {width}x{height}, {len(frames)} frames, referencia: frame completo a {native_size}px, cancha: {court_roi}")
+    print("Detecciones de referencia: " + ", ".join(f"{name} {sum(len(boxes) for boxes in reference[name])}" for name in detectors))
+    print(f"{'recorte':<10} {'tamaño':>6} " + " ".join(f"{name + ' ms':>13} {'P':>6} {'R':>6}" for name in detectors))
+    for roi in [None, court_roi] if court_roi else [None]:
+        for size in args.sizes:
+            row = f"{'cancha' if roi else 'completo':<10} {size:>6} "
+            for name, detector in detectors.items():
+                detector.preprocessor = FramePreprocessor(court_roi=roi, inference_size=size)
+                boxes, seconds = detect(detector, frames)
+                precision, recall = precision_recall(reference[name], boxes)
+                row += f"{seconds * 1000:>13.1f} {precision:>6.2f} {recall:>6.2f} "
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
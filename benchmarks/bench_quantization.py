@@ -0,0 +1,62 @@
+"""
+Precisión contra velocidad de las variantes cuantizadas (fp16, int8_dynamic,
+int8_static) respecto del modelo FP32 del mismo backend. Para cada variante
+reporta precision/recall por detector con IoU >= 0.5 contra FP32 sobre frames
+de muestra, el total_hits de process_video sobre el video completo y los frames
+por segundo de ese análisis.
+
+Uso: python -m benchmarks.bench_quantization [video] [--backend onnxruntime] [--precisions fp16 int8_static] [--frames 32]
+"""
+import argparse
+import time
+
+from numpy import ndarray
+
+from app.match import PadelMatchProcessor
+from app.yolo import BallYoloDetector, PlayerYoloDetector
+from benchmarks.bench_backends import measure
+from benchmarks.bench_preprocessing import precision_recall, read_frames
+
+PRECISIONS = ["fp16", "int8_dynamic", "int8_static"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default="videos/video_cortado_5s.mp4")
+    parser.add_argument("--backend", default="onnxruntime", choices=["onnxruntime", "openvino"])
+    parser.add_argument("--precisions", nargs="+", default=PRECISIONS, choices=PRECISIONS)
+    parser.add_argument("--frames", type=int, default=32)
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    rows = []
+    reference: dict[str, list[ndarray]] = {}
+    for precision in ["fp32", *args.precisions]:
+        player_detector = PlayerYoloDetector(precision=precision, backend=args.backend)
+        ball_detector = BallYoloDetector(precision=precision, backend=args.backend)
+        detectors = {"jugadores": player_detector, "pelota": ball_detector}
+        scores = []
+        for name, detector in detectors.items():
+            detections, _, _ = measure(detector, frames, batch_size=1)
+            boxes = [frame_boxes for frame_boxes, _ in detections]
+            reference.setdefault(name, boxes)
+            scores.append(precision_recall(reference[name], boxes))
+
+        processor = PadelMatchProcessor(player_detector=player_detector, ball_detector=ball_detector, detection_cache=None)
+        start = time.perf_counter()
+        processor.process_video(args.video)
+        fps = processor.frames_analyzed / (time.perf_counter() - start)
+        rows.append((precision, scores, processor.match_stats.total_hits, fps))
+
+    reference_hits, reference_fps = rows[0][2], rows[0][3]
+    print(f"\nBackend {args.backend}, {len(frames)} frames de muestra, análisis completo de {args.video}")
+    print(f"{'precisión':<13} {'jug. P':>6} {'jug. R':>6} {'pel. P':>6} {'pel. R':>6} {'golpes':>7} {'Δgolpes':>8} {'fps':>7} {'speedup':>8}")
+    for precision, ((player_p, player_r), (ball_p, ball_r)), hits, fps in rows:
+        print(
+            f"{precision:<13} {player_p:>6.2f} {player_r:>6.2f} {ball_p:>6.2f} {ball_r:>6.2f} "
+            f"{hits:>7} {hits - reference_hits:>+8} {fps:>7.1f} {fps / reference_fps:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Suite de benchmarks reproducible del pipeline de análisis. Cada caso corre en un
+proceso nuevo (spawn) para que el tiempo de carga de modelos y el pico de RSS
+sean propios del caso:
+
+- model_load: carga de cada modelo y primera inferencia
+- process_frame: latencia de process_frame de cada detector sobre frames del video
+- detect_hits_synthetic: detección de golpes de _detect_table_hits (sin
+  inferencia) con detecciones sintéticas y semilla fija
+- process_video / process_video_with_output: fps del análisis completo y
+  latencia por etapa (decode, inferencia de jugadores y pelota, golpes, anotación, encoding)
+
+Las latencias se reportan como percentiles p50/p90/p99 en ms. El resultado se
+escribe en JSON y se compara contra un baseline guardado: una métrica que
+empeora más de --tolerance se marca como regresión; con --repeat N se guarda
+la mediana de N corridas para reducir el ruido. El baseline depende de la
+máquina y no está en el repo: la primera corrida en cada máquina se hace con
+--save-baseline.
+
+Uso:
+  python -m benchmarks.suite [--videos videos/video_cortado*.mp4] [--cases process_video ...]
+  python -m benchmarks.suite --save-baseline            # guarda el resultado como baseline
+  python -m benchmarks.suite --fail-on-regression       # sale con código 1 si hay regresiones
+"""
+import argparse
+import glob
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+CASES = ["model_load", "process_frame", "detect_hits_synthetic", "process_video", "process_video_with_output"]
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+DEFAULT_OUTPUT = "benchmarks/results/latest.json"
+
+
+class StageTimer:
+    """Mide cada llamada a métodos de un objeto ya construido, agrupadas por etapa"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def wrap(self, owner: Any, method_name: str, stage: str) -> None:
+        original = getattr(owner, method_name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+
+        setattr(owner, method_name, timed)
+
+    def wrap_iterator(self, owner: Any, method_name: str, stage: str) -> None:
+        """Para generadores: mide cada next(), que es donde ocurre el trabajo"""
+        original = getattr(owner, method_name)
+
+        def timed(*args, **kwargs):
+            iterator = iter(original(*args, **kwargs))
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.samples[stage].append(time.perf_counter() - start)
+                yield item
+
+        setattr(owner, method_name, timed)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {stage: latency_summary(samples) for stage, samples in self.samples.items()}
+
+
+class TimedWriter:
+    """Envuelve el writer de video (ffmpeg o cv2.VideoWriter) midiendo cada write"""
+
+    def __init__(self, writer: Any, samples: list[float]):
+        self.writer = writer
+        self.samples = samples
+
+    def write(self, frame: np.ndarray) -> None:
+        start = time.perf_counter()
+        self.writer.write(frame)
+        self.samples.append(time.perf_counter() - start)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.writer, name)
+
+
+def latency_summary(samples: list[float]) -> dict[str, float]:
+    milliseconds = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "total_s": float(milliseconds.sum() / 1000),
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p90_ms": float(np.percentile(milliseconds, 90)),
+        "p99_ms": float(np.percentile(milliseconds, 99))
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024**2 if sys.platform == "darwin" else 1024)
+
+
+def case_model_load(video_path: str, args: argparse.Namespace) -> dict:
+    from app.yolo import BallYoloDetector, PlayerYoloDetector
+    from benchmarks.bench_preprocessing import read_frames
+
+    frame = read_frames(video_path, 1)[0]
+    result = {}
+    for name, detector in (("player", PlayerYoloDetector()), ("ball", BallYoloDetector())):
+        loaded = detector.warmup()
+        start = time.perf_counter()
+        detector.process_frame(frame)
+        result[f"{name}_load_seconds"] = loaded.load_seconds
+        result[f"{name}_first_frame_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def case_process_frame(video_path: str, args: argparse.Namespace) -> dict:
+    from app.yolo import BallYoloDetector, PlayerYoloDetector
+    from benchmarks.bench_preprocessing import read_frames
+
+    frames = read_frames(video_path, args.frames)
+    result: dict[str, Any] = {}
+    for name, detector in (("player", PlayerYoloDetector()), ("ball", BallYoloDetector())):
+        detector.warmup()
+        detector.reset_tracking()
+        samples = []
+        for frame in frames:
+            start = time.perf_counter()
+            detector.process_frame(frame)
+            samples.append(time.perf_counter() - start)
+        result[f"{name}_fps"] = len(samples) / sum(samples)
+        result[f"{name}_latency"] = latency_summary(samples)
+    return result
+
+
+def case_detect_hits_synthetic(video_path: str, args: argparse.Namespace) -> dict:
+    from app.match import PadelMatchProcessor
+    from benchmarks.bench_hit_matching import synthetic_frames, synthetic_tables
+
+    tables = synthetic_tables(synthetic_frames(random.Random(args.seed), args.synthetic_frames, num_players=4, num_balls=2))
+
+    # Los detectores no llegan a cargar sus modelos: es el matching que hace _detect_table_hits después de inferir
+    processor = PadelMatchProcessor(detection_cache=None)
+    samples = []
+    hits = 0
+    for frame_number, (players, balls) in enumerate(tables):
+        start = time.perf_counter()
+        hits += len(processor._detect_table_hits(players, balls, frame_number, frame_number / 30))
+        samples.append(time.perf_counter() - start)
+    return {"fps": len(samples) / sum(samples), "hits": hits, "latency": latency_summary(samples)}
+
+
+def _instrumented_processor(timer: StageTimer):
+    from app.match import PadelMatchProcessor
+
+    processor = PadelMatchProcessor(detection_cache=None)
+    processor.player_detector.warmup()
+    processor.ball_detector.warmup()
+    timer.wrap_iterator(processor, "_read_frame_batches", "decode")
+    timer.wrap(processor.player_detector, "detect_batch", "player_inference")
+    timer.wrap(processor.ball_detector, "detect_batch", "ball_inference")
+    timer.wrap(processor, "_detect_table_hits", "hits")
+    timer.wrap(processor, "_create_annotated_frame", "annotate")
+    return processor
+
+
+def case_process_video(video_path: str, args: argparse.Namespace) -> dict:
+    timer = StageTimer()
+    processor = _instrumented_processor(timer)
+    start = time.perf_counter()
+    stats = processor.process_video(video_path)
+    seconds = time.perf_counter() - start
+    return {"fps": processor.frames_analyzed / seconds, "seconds": seconds, "total_hits": stats.total_hits, "stages": timer.summary()}
+
+
+def case_process_video_with_output(video_path: str, args: argparse.Namespace) -> dict:
+    from app.match import processor as processor_module
+
+    timer = StageTimer()
+    processor = _instrumented_processor(timer)
+
+    open_video_writer = processor_module.open_video_writer
+
+    def timed_writer(*writer_args, **writer_kwargs):
+        out, processed_path = open_video_writer(*writer_args, **writer_kwargs)
+        return TimedWriter(out, timer.samples["encode"]), processed_path
+
+    processor_module.open_video_writer = timed_writer
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        stats = processor.process_video_with_output(video_path, str(Path(output_dir) / "output.mp4"))
+        seconds = time.perf_counter() - start
+    return {"fps": processor.frames_analyzed / seconds, "seconds": seconds, "total_hits": stats.total_hits, "stages": timer.summary()}
+
+
+CASE_FUNCTIONS: dict[str, Callable[[str, argparse.Namespace], dict]] = {
+    "model_load": case_model_load,
+    "process_frame": case_process_frame,
+    "detect_hits_synthetic": case_detect_hits_synthetic,
+    "process_video": case_process_video,
+    "process_video_with_output": case_process_video_with_output
+}
+
+
+def run_case(case: str, video_path: str, args: argparse.Namespace) -> dict:
+    """Punto de entrada del proceso hijo"""
+    import torch
+
+    torch.set_num_threads(args.threads)
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    torch.manual_seed(args.seed)
+
+    result = CASE_FUNCTIONS[case](video_path, args)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def environment(args: argparse.Namespace) -> dict:
+    import cv2
+    import torch
+    import ultralytics
+
+    from app.settings import Settings
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "torch": torch.__version__,
+        "ultralytics": ultralytics.__version__,
+        "opencv": cv2.__version__,
+        "threads": args.threads,
+        "seed": args.seed,
+        "settings": {
+            key: getattr(Settings, key)
+            for key in (
+                "BALL_MODEL_PATH", "PLAYER_MODEL_PATH", "MODEL_DEVICE", "MODEL_PRECISION", "INFERENCE_BACKEND",
+                "INFERENCE_SIZE", "COURT_ROI", "BALL_TRACKING_ENABLED", "INFERENCE_BATCH_SIZE", "PROCESSOR_EXECUTION_MODE"
+            )
+        }
+    }
+
+
+def median_results(runs: list[dict]) -> dict:
+    """Mediana de cada métrica entre repeticiones del mismo caso"""
+    merged: dict[str, Any] = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            merged[key] = median_results([run[key] for run in runs])
+        else:
+            merged[key] = float(np.median([run[key] for run in runs]))
+    return merged
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[tuple[str, float, float, float, bool]]:
+    """(métrica, baseline, actual, cambio relativo, regresión) para las métricas de rendimiento"""
+    current = flatten(results)
+    previous = flatten(baseline)
+    rows = []
+    for name in sorted(current.keys() & previous.keys()):
+        metric = name.rsplit("/", 1)[-1]
+        if metric.endswith("fps"):
+            higher_is_better = True
+        elif metric.endswith(("_ms", "_seconds", "_mb")) or metric == "seconds":
+            higher_is_better = False
+        else:
+            continue  # conteos (frames, golpes): informativos
+        if previous[name] == 0:
+            continue
+        change = (current[name] - previous[name]) / previous[name]
+        regression = change < -tolerance if higher_is_better else change > tolerance
+        rows.append((name, previous[name], current[name], change, regression))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", nargs="+", default=sorted(glob.glob("videos/video_cortado*.mp4")))
+    parser.add_argument("--cases", nargs="+", default=CASES, choices=CASES)
+    parser.add_argument("--frames", type=int, default=60, help="frames para process_frame")
+    parser.add_argument("--synthetic-frames", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=1, help="hilos de torch en cada caso")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="corridas por caso; se guarda la mediana de cada métrica")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="empeoramiento relativo tolerado")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    results: dict[str, dict] = {}
+    context = get_context("spawn")
+    for case in args.cases:
+        # Los casos sin video (golpes sintéticos) corren una sola vez
+        videos = args.videos[:1] if case == "detect_hits_synthetic" else args.videos
+        for video_path in videos:
+            print(f"▶ {case} · {video_path}")
+            runs = []
+            for _ in range(args.repeat):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    runs.append(pool.submit(run_case, case, video_path, args).result())
+            result = median_results(runs) if len(runs) > 1 else runs[0]
+            results.setdefault(case, {})["synthetic" if case == "detect_hits_synthetic" else Path(video_path).name] = result
+
+    report = {"environment": environment(args), "results": results}
+    output_path = Path(args.baseline if args.save_baseline else args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"\nResultados guardados en {output_path}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline or not baseline_path.exists():
+        if not args.save_baseline:
+            # El baseline depende de la máquina y no se versiona: se crea con los mismos argumentos
+            command = " ".join(["python -m benchmarks.suite", *sys.argv[1:], "--save-baseline"])
+            print(f"No hay baseline en {baseline_path}; para crearlo en esta máquina:\n  {command}")
+        return
+
+    rows = compare(results, json.loads(baseline_path.read_text())["results"], args.tolerance)
+    print(f"\n{'métrica':<72} {'baseline':>10} {'actual':>10} {'cambio':>8}")
+    for name, previous, current, change, regression in rows:
+        print(f"{name:<72} {previous:>10.2f} {current:>10.2f} {change:>+7.1%} {'❌' if regression else ''}")
+    regressions = sum(row[4] for row in rows)
+    print(f"\n{regressions} regresiones sobre {len(rows)} métricas (tolerancia {args.tolerance:.0%})")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ export const API_CONFIG = {
     SYSTEM: '/status/system',
     API_INFO: '/status/api',
     UPLOAD_VIDEO: '/match/upload-video',
+    JOBS: '/match/jobs',
     HISTORY: '/match/history',
     REPORT: '/match/report',
   },
@@ -19,6 +20,9 @@ export const API_CONFIG = {
   // Configuración de reintentos
   RETRY_ATTEMPTS: 3,
   RETRY_DELAY: 1000, // 1 segundo
+
+  // Intervalo de consulta del estado de un job de procesamiento
+  JOB_POLL_INTERVAL: 1000, // 1 segundo
   
   // Configuración de archivos
   MAX_FILE_SIZE: 100 * 1024 * 1024, // 100MB
@@ -100,8 +100,11 @@ class PadelApiService {
         throw new Error(errorData.message || `HTTP error! status: ${response.status}`);
       }
 
+      // El backend responde con un job: consultar el estado hasta que termine
+      const job = await response.json();
+      onProgress(15);
+      const result = await this.waitForJob(job.job_id, onProgress);
       onProgress(100);
-      const result = await response.json();
       return result;
     } catch (error) {
       console.error('Error uploading video:', error);
@@ -109,6 +112,46 @@ class PadelApiService {
     }
   }
 
+  // Consultar el estado de un job hasta que termine y devolver su resultado
+  async waitForJob(jobId, onProgress) {
+    const jobUrl = buildApiUrl(`${API_CONFIG.ENDPOINTS.JOBS}/${jobId}`);
+
+    while (true) {
+      const statusResponse = await fetch(jobUrl, {
+        method: 'GET',
+        signal: AbortSignal.timeout(API_CONFIG.TIMEOUT),
+      });
+
+      if (!statusResponse.ok) {
+        throw new Error(`HTTP error! status: ${statusResponse.status}`);
+      }
+
+      const status = await statusResponse.json();
+
+      if (status.status === 'failed') {
+        throw new Error(status.error || 'El procesamiento del video falló');
+      }
+
+      if (status.status === 'completed') {
+        break;
+      }
+
+      onProgress(15 + Math.round(status.progress * 80));
+      await new Promise(resolve => setTimeout(resolve, API_CONFIG.JOB_POLL_INTERVAL));
+    }
+
+    const resultResponse = await fetch(`${jobUrl}/result`, {
+      method: 'GET',
+      signal: AbortSignal.timeout(API_CONFIG.TIMEOUT),
+    });
+
+    if (!resultResponse.ok) {
+      throw new Error(`HTTP error! status: ${resultResponse.status}`);
+    }
+
+    return await resultResponse.json();
+  }
+
   // Simular procesamiento de video (para desarrollo)
   async simulateVideoProcessing(file, onProgress) {
     return new Promise((resolve) => {